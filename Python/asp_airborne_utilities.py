@@ -56,6 +56,7 @@ def aux_reader(f_name_aux):
     import re
     import numpy as np
     import pandas as pd
+    from   processing_instrumentation import stage, file_size
         
     # parse header of ATM aux file and extract all information from header
     # this section of the code was written by C. Wayne Wright (https://github.com/lidar532)
@@ -169,7 +170,9 @@ def aux_reader(f_name_aux):
         os.sys.exit("Unable to extract lever arm parameters from ATM aux file. Check input data.")
         
     # read data from ATM aux file
-    df = pd.read_csv(f_name_aux, skiprows=header_data.data_start_row, names=header_data.headers)
+    with stage("AUX read CSV", f_name=f_name_aux, bytes_read=file_size(f_name_aux)) as st:
+        df = pd.read_csv(f_name_aux, skiprows=header_data.data_start_row, names=header_data.headers)
+        st.n_items = len(df)
  
     # some AUX files contain lon and lat at the beginning of the file that are zero. To remove them use:
     df = df.drop(df[np.abs(df.iloc[:, 3]) <= 0.5].index) # tested with WFF and other flights
@@ -218,6 +221,29 @@ def iso2epoch(date_str):
     
     return epoch_sec
 
+#%% helper function definition
+# =============================================================================
+# convert time window limits of the campaign stores to epoch nanoseconds
+# =============================================================================
+
+def to_epoch_ns(t):
+    """
+    converts epoch seconds or anything pandas.Timestamp accepts (UTC date string in ISO 8601
+    standard format with or without fractional seconds (2019-05-12T16:10:40.5), numpy.datetime64,
+    pandas.Timestamp, datetime) to epoch nanoseconds. time zone aware times are converted to UTC,
+    naive times are UTC. None is returned unchanged.
+    Usage  : t_ns = to_epoch_ns("2019-05-12T16:10:40.5")
+    """
+
+    import numbers
+    import pandas as pd
+
+    if t is None:
+        return None
+    if isinstance(t, numbers.Real):
+        return int(round(float(t) * 1e9))
+    return int(pd.Timestamp(t.strip() if isinstance(t, str) else t).value)
+
 #%% helper function definition
 # =============================================================================
 # locate UTC image timetags that match temporal search criteria
@@ -360,18 +386,22 @@ def df_spatial_search(aux_df,search_poly,*args):
     # find indices where indx_time is True
     indx_list_spatial = [i for i, x in enumerate(indx_inside_poly) if x]
     
-    if VERBOSE:
-        posix_utc = np.asarray(aux_df['PosixTime_UTC'])        
-        # verify that posix_utc time tags are increasing (is much faster than using diff apparently)
-        if (np.all(posix_utc[1:] >= posix_utc[:-1])) == True:
-            indx_s = indx_list_spatial[0]
-            indx_e = indx_list_spatial[-1]
-        else:
-            raise ValueError("\n\tERROR: time tags are more monotonically increasing. Abort.")
-        
-        t_s_str = aux_df['Timestamp_UTC'][indx_s]  
-        t_e_str = aux_df['Timestamp_UTC'][indx_e]
+    posix_utc = np.asarray(aux_df['PosixTime_UTC'])        
+    # verify that posix_utc time tags are increasing (is much faster than using diff apparently)
+    if (np.all(posix_utc[1:] >= posix_utc[:-1])) == True:
+        indx_s = indx_list_spatial[0]  if indx_list_spatial else None
+        indx_e = indx_list_spatial[-1] if indx_list_spatial else None
+    else:
+        raise ValueError("\n\tERROR: time tags are more monotonically increasing. Abort.")
+    
+    t_s_str = None
+    t_e_str = None
+    if indx_s is not None:
+        # use position based indexing. aux_reader() drops rows, so the index labels are not consecutive
+        t_s_str = aux_df['Timestamp_UTC'].iloc[indx_s]  
+        t_e_str = aux_df['Timestamp_UTC'].iloc[indx_e]
         
+    if VERBOSE and (indx_s is not None):
         t_s_str = t_s_str.replace("T"," ")
         t_e_str = t_e_str.replace("T"," ")
         
@@ -435,4 +465,218 @@ def kt19_to_datetime(yr, doy, sod, utc_offset):
     # note: DeprecationWarning: parsing timezone aware datetimes is deprecated; this will raise an error in the future
     # dt = dt.replace(tzinfo=timezone.utc)
 
-    return dt
\ No newline at end of file
+    return dt
+
+
+#%% helper function definition
+# =============================================================================
+# convert arrays of YR, DOY, SOD -> datetime64[ns] (vectorized)
+# =============================================================================
+
+def kt19_to_datetime64(yr, doy, sod, utc_offset=0):
+    """
+    Summary: vectorized version of kt19_to_datetime for entire columns of KT19 files (IAKST1B).
+             Fractions of seconds are rounded to 0.1 s like kt19_to_datetime (max. 10 Hz).
+    Usage  : utc_time = kt19_to_datetime64(kt19_df["year"], kt19_df["day_of_year"], kt19_df["seconds_of_day_utc"])
+
+    INPUT:
+    yr, doy, sod : arrays of year (YYYY), day of year and GPS seconds of day. sod >= 86400 is mapped into the next day
+    utc_offset   : UTC_TO_GPS_OFFSET in seconds
+
+    OUTPUT:
+    utc_time : array (datetime64[ns])
+        UTC time tags
+    """
+
+    import numpy as np
+
+    yr  = np.asarray(yr, dtype=np.int64)
+    doy = np.asarray(doy, dtype=np.int64)
+    sod = np.asarray(sod, dtype=np.float64)
+
+    sod_int = np.floor(sod)
+    tenths  = np.round(np.round(sod - sod_int, 1) * 10.0).astype(np.int64)
+
+    day_ns  = ((yr - 1970).astype('datetime64[Y]').astype('datetime64[D]') + (doy - 1)).astype(np.int64) * 86400 * 10**9
+    sec_ns  = (sod_int.astype(np.int64) - int(utc_offset)) * 10**9 + tenths * 10**8
+
+    return (day_ns + sec_ns).astype('datetime64[ns]')
+
+def clean_kt19_column_names(columns):
+    """ KT19 column names without spaces and brackets in lower case, e.g., "Seconds_of_Day(UTC)" -> "seconds_of_day_utc" """
+    return [c.replace("(", "_").replace(")", "").replace("#","").replace(" ", "").lower() for c in columns]
+
+#%% helper function definition
+# =============================================================================
+# convert CAMBOT image file names to epoch seconds (vectorized)
+# =============================================================================
+
+def image_names_to_epoch(f_names):
+    """
+    Summary: extract the trigger time encoded in CAMBOT image file names and convert it to epoch seconds
+             a.k.a. POSIX time for an entire directory listing at once using array operations.
+             Example file name: IOCAM0_2019_GR_NASA_20190906-132014.4217.jpg -> 2019-09-06T13:20:14.4217
+             Paths and suffixes such as _adj.jpg or .jpg.xml are permitted.
+    Usage  : epoch_sec = image_names_to_epoch(f_names)
+
+    INPUT:
+    f_names : list, array or Series of str
+        CAMBOT image file names (with or without directory)
+
+    OUTPUT:
+    epoch_sec: array (float64)
+        epoch seconds for each file name. NaN for names without a valid time tag.
+    """
+
+    import numpy as np
+
+    N_FRAC = 6 # maximum number of decimal places of the seconds that are evaluated
+
+    # convert names to a 2D array of bytes (one row per file name) for fixed-width array operations
+    names_b = np.array([str(f).encode('utf-8') for f in f_names], dtype=bytes)
+    n_names = len(names_b)
+    if n_names == 0:
+        return np.empty(0, dtype=float)
+    width   = names_b.dtype.itemsize
+    chars   = np.frombuffer(names_b.tobytes(), dtype=np.uint8).reshape(n_names, width)
+
+    # the time tag YYYYMMDD-HHMMSS.ffff is located around the last "-" in the file name
+    pos = np.char.rfind(names_b, b'-')
+
+    # gather the characters of the time tag: 8 date digits, "-", 6 time digits, ".", fraction digits
+    offsets = np.arange(-8, 8 + N_FRAC)
+    cols    = pos[:, np.newaxis] + offsets[np.newaxis, :]
+    inside  = (cols >= 0) & (cols < width)
+    tag     = np.take_along_axis(chars, np.clip(cols, 0, width - 1), axis=1)
+    tag     = np.where(inside, tag, 0)
+    digits  = tag.astype(np.int64) - ord('0')
+    is_dig  = (digits >= 0) & (digits <= 9)
+
+    # valid names need pos >= 8 and digits for YYYYMMDD and HHMMSS
+    valid = (pos >= 8) & np.all(is_dig[:, 0:8], axis=1) & np.all(is_dig[:, 9:15], axis=1)
+    digits = np.where(is_dig, digits, 0)
+
+    year   = digits[:, 0]*1000 + digits[:, 1]*100 + digits[:, 2]*10 + digits[:, 3]
+    month  = digits[:, 4]*10 + digits[:, 5]
+    day    = digits[:, 6]*10 + digits[:, 7]
+    hour   = digits[:, 9]*10 + digits[:, 10]
+    minute = digits[:, 11]*10 + digits[:, 12]
+    second = digits[:, 13]*10 + digits[:, 14]
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31) & (hour <= 23) & (minute <= 59) & (second <= 60)
+
+    # fractional seconds: consecutive digits after the "." (column 15)
+    has_dot   = tag[:, 15] == ord('.')
+    frac_dig  = np.cumprod(is_dig[:, 16:], axis=1) * has_dot[:, np.newaxis]
+    frac_sec  = np.sum(digits[:, 16:] * frac_dig * 10.0**-np.arange(1, N_FRAC + 1), axis=1)
+
+    # days since 1970-01-01 using numpy datetime64 arithmetic (invalid rows use a dummy date)
+    year  = np.where(valid, year, 1970)
+    month = np.where(valid, month, 1)
+    day   = np.where(valid, day, 1)
+    epoch_day = ((year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)).astype('datetime64[D]') + (day - 1)
+    epoch_day = epoch_day.astype(np.int64)
+
+    epoch_sec = epoch_day * 86400.0 + hour * 3600.0 + minute * 60.0 + second + frac_sec
+    epoch_sec[~valid] = np.nan
+
+    return epoch_sec
+
+#%% helper function definition
+# =============================================================================
+# match CAMBOT image file names to ATM AUX navigation records
+# =============================================================================
+
+def match_images_to_nav(aux_df,f_names,tol_sec=0.1,*args):
+    """
+    Summary     : match CAMBOT image file names to the nearest ATM AUX navigation record in time using a
+                  sorted nearest-neighbor join (numpy.searchsorted) instead of repeated df_temporal_search calls.
+                  Matches with a time difference larger than tol_sec are reported as unmatched.
+    Usage       : result_match = match_images_to_nav(aux_df,f_names,tol_sec,*args)
+    Dependencies: image_names_to_epoch from this module
+
+    INPUT:
+    aux_df : DataFrame created from ATM AUX file with function aux_reader()
+        input must be a Pandas DataFrame with specific column names/order created by aux_reader()
+    f_names : list, array or Series of str
+        CAMBOT image file names, e.g., from os.listdir()
+    tol_sec : float
+        maximum allowed time difference in seconds between image time tag and navigation record
+    *args: bool
+        optional input argument to display a summary of the results
+
+    OUTPUT:
+    result_match: class Result_Image_Nav_Match()
+        class with results of the match as attributes (defined below)
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    # check for optional input arguments to display summary
+    VERBOSE = False
+    if len(args) >= 1:
+        if isinstance(args[0], bool):
+            VERBOSE = args[0]
+
+    # check if input aux_df is a Pandas DataFrame with expected column labels
+    if hasattr(aux_df, 'gps_lon_deg') & hasattr(aux_df, 'gps_lat_deg') & hasattr(aux_df, 'PosixTime_UTC'):
+        posix_utc = np.asarray(aux_df['PosixTime_UTC'], dtype=float)
+    else:
+        raise ValueError("\n\tERROR: input variable aux_df must be a DataFrame created with function aux_reader(). Abort.")
+
+    # verify that posix_utc time tags are increasing (required for the sorted search)
+    if not np.all(posix_utc[1:] >= posix_utc[:-1]):
+        raise ValueError("\n\tERROR: time tags are not monotonically increasing. Abort.")
+
+    f_names   = np.asarray(f_names, dtype=object)
+    epoch_sec = image_names_to_epoch(f_names)
+
+    # nearest neighbor: compare the record before and after the insertion point
+    indx_right = np.searchsorted(posix_utc, epoch_sec, side='left')
+    indx_right = np.clip(indx_right, 0, len(posix_utc) - 1)
+    indx_left  = np.clip(indx_right - 1, 0, len(posix_utc) - 1)
+    dt_left    = np.abs(epoch_sec - posix_utc[indx_left])
+    dt_right   = np.abs(epoch_sec - posix_utc[indx_right])
+    indx_nav   = np.where(dt_left <= dt_right, indx_left, indx_right)
+    dt_sec     = epoch_sec - posix_utc[indx_nav] # NaN for file names without time tag
+
+    indx_matched = np.abs(dt_sec) <= tol_sec     # False for NaN
+
+    # duplicate frames: identical time tags, or several frames assigned to the same navigation record
+    dup_time = pd.Series(epoch_sec).duplicated(keep=False).to_numpy() & ~np.isnan(epoch_sec)
+    dup_nav  = pd.Series(np.where(indx_matched, indx_nav, -1)).duplicated(keep=False).to_numpy() & indx_matched
+    indx_duplicate = dup_time | dup_nav
+
+    # assemble navigation records for matched frames
+    nav_df = aux_df.iloc[indx_nav[indx_matched]].reset_index(drop=True)
+    nav_df.insert(0, 'image_file', f_names[indx_matched])
+    nav_df.insert(1, 'image_epoch_sec', epoch_sec[indx_matched])
+    nav_df.insert(2, 'dt_sec', dt_sec[indx_matched])
+
+    if VERBOSE:
+        print(f"Matched   : {np.count_nonzero(indx_matched):d} of {len(f_names):d} images (tolerance: {tol_sec:.3f} s)")
+        print(f"Unmatched : {np.count_nonzero(~indx_matched):d}")
+        print(f"Duplicates: {np.count_nonzero(indx_duplicate):d}")
+
+    # define a class Result_Image_Nav_Match for organizing the search results for return/output
+    class Result_Image_Nav_Match():
+        def __init__(self):
+            self.nav_df           = None # DataFrame with navigation records of matched images plus image_file, image_epoch_sec and dt_sec columns
+            self.indx_matched     = None # boolean array with True for images matched within tol_sec. same length as f_names
+            self.indx_nav         = None # index (row position) of nearest navigation record for every image. same length as f_names
+            self.dt_sec           = None # time difference image minus navigation record in seconds. same length as f_names
+            self.f_names_unmatched = None # list with file names without navigation record within tol_sec
+            self.f_names_duplicate = None # list with file names with duplicate time tags or shared navigation records
+
+    # create return variable "result_match" as a Result_Image_Nav_Match class
+    result_match = Result_Image_Nav_Match()
+
+    # populate attributes in class
+    result_match.nav_df            = nav_df
+    result_match.indx_matched      = indx_matched
+    result_match.indx_nav          = indx_nav
+    result_match.dt_sec            = dt_sec
+    result_match.f_names_unmatched = list(f_names[~indx_matched])
+    result_match.f_names_duplicate = list(f_names[indx_duplicate])
+
+    return result_match
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: one-time conversion of ATM ilatm1b and ilnsa1b HDF5 files into an uncompressed,
+         column-per-file binary point store that can be memory-mapped for repeated analysis:
+
+             https://nsidc.org/data/ilatm1b/versions/2
+             https://nsidc.org/data/ilnsa1b/versions/2
+
+         Each column is stored as a raw little-endian binary file next to a small JSON manifest
+         (see memmap_column_store.py):
+
+             ILATM1B_20190506_131600.ATM6AT6.atm/
+                 manifest.json
+                 lon_deg.<n>.bin      float64 longitude in degrees east wrapped to ±180°
+                 lat_deg.<n>.bin      float64 latitude in degrees north
+                 ele_m.<n>.bin        float64 elevation above WGS-84 ellipsoid in meters
+                 sigstr_cts.<n>.bin   float32 or uint16 received laser signal strength (rcv_sigstr)
+
+         <n> is the generation of the store. A conversion writes a new generation of column files and
+         replaces the manifest last and atomically, so that readers never see the manifest of one
+         generation together with the columns of another.
+
+         The reader returns zero-copy read-only numpy.memmap views. Multiple processes that open the
+         same store share one copy of the data in the operating system's page cache instead of
+         decoding HDF5 and holding a private copy in each worker's heap.
+
+usage in code:
+    from atm_memmap_point_store import convert_atm_H5_to_memmap_store, open_atm_memmap_store
+    f_dir_store = convert_atm_H5_to_memmap_store(f_name_atm)
+    atm_pts = open_atm_memmap_store(f_dir_store)
+    ele_mean = atm_pts.ele_m.mean()
+"""
+
+import os
+import numpy as np
+
+STORE_FORMAT  = "atm_memmap_point_store"
+STORE_VERSION = 1
+STORE_SUFFIX  = ".atm"
+
+#%% convert ATM HDF5 file to memory-mapped point store
+
+def convert_atm_H5_to_memmap_store(
+    f_name_atm:str,               # path to ATM point cloud lidar file in HDF5 format
+    f_dir_store:str = None,       # output directory. default: input file name with .h5 replaced by .atm
+    SIGSTR_DTYPE:str = "float32", # "float32" or "uint16" for the received signal strength
+    CHUNK_SIZE:int = 4000000,     # number of laser shots copied per chunk
+    OVERWRITE:bool = False,       # if False a complete store that is up to date (see processing_manifest.py) is not converted again
+    ) -> str:                     # directory of the point store
+
+    """
+      read ATM HDF5 L1B data file in chunks and write the longitude, latitude, elevation and
+      rcv_sigstr fields into a column-per-file binary point store with a JSON manifest.
+      A new generation of column files is written and the manifest is replaced last, so that incomplete
+      stores are never opened. The column files of the previous generation are removed afterwards.
+    """
+
+    import h5py
+    from   processing_instrumentation import stage, file_size
+    from   processing_manifest import needs_processing, record_run
+    from   memmap_column_store import read_store_manifest, replace_store_manifest, column_file_name, create_column, MANIFEST_NAME
+
+    if SIGSTR_DTYPE not in ("float32", "uint16"):
+        os.sys.exit("Parameter SIGSTR_DTYPE must either be float32 or uint16. Abort.")
+
+    if f_dir_store is None:
+        f_dir_store = os.path.splitext(f_name_atm)[0] + STORE_SUFFIX
+    f_name_manifest = os.path.join(f_dir_store, MANIFEST_NAME)
+
+    params = {"SIGSTR_DTYPE": SIGSTR_DTYPE}
+    if not needs_processing("ATM point store", f_name_atm, params, [f_name_manifest], OVERWRITE):
+        return f_dir_store
+
+    os.makedirs(f_dir_store, exist_ok=True)
+
+    # column name, HDF5 dataset, dtype in store
+    columns = [("lon_deg",    "/longitude",                        "<f8"),
+               ("lat_deg",    "/latitude",                         "<f8"),
+               ("ele_m",      "/elevation",                        "<f8"),
+               ("sigstr_cts", "/instrument_parameters/rcv_sigstr", "<f4" if SIGSTR_DTYPE == "float32" else "<u2")]
+
+    try:
+      data_hdf_atm = h5py.File(f_name_atm, 'r')
+    except:
+      print(f'Unable to read {f_name_atm}. Check path and input file name.')
+      raise
+
+    # previous generation of the store, if any. an unreadable manifest is replaced
+    try:
+        manifest_old = read_store_manifest(f_dir_store, STORE_FORMAT, "ATM point store") or {}
+    except ValueError:
+        manifest_old = {}
+    f_names_old = [info["file"] for info in manifest_old.get("columns", {}).values()]
+    generation  = manifest_old.get("generation", 0) + 1
+
+    manifest = {"format": STORE_FORMAT, "version": STORE_VERSION, "generation": generation,
+                "source": os.path.basename(f_name_atm), "columns": {}}
+
+    with data_hdf_atm, stage("ATM convert to point store", f_name=f_name_atm, bytes_read=file_size(f_name_atm)) as st:
+        n_points = data_hdf_atm['/longitude'].shape[0]
+        st.n_items = n_points
+        manifest["n_points"] = int(n_points)
+
+        for col, dset_name, dtype in columns:
+            dset = data_hdf_atm[dset_name]
+            f_name_col = column_file_name(col, generation)
+            out = create_column(f_dir_store, f_name_col, dtype, n_points)
+            for i_s in range(0, n_points, CHUNK_SIZE):
+                i_e = min(i_s + CHUNK_SIZE, n_points)
+                chunk = dset[i_s:i_e]
+                if col == "lon_deg":
+                    chunk = np.mod(chunk - 180.0, 360.0) - 180.0 # wrap longitudes to ±180°
+                elif dtype == "<u2":
+                    chunk = np.clip(np.rint(chunk), 0, 65535)
+                out[i_s:i_e] = chunk
+            if n_points > 0:
+                out.flush()
+            del out
+            manifest["columns"][col] = {"file": f_name_col, "dtype": dtype}
+            st.bytes_written += n_points * np.dtype(dtype).itemsize
+
+    # write manifest last and atomically, then remove the previous generation
+    replace_store_manifest(f_dir_store, manifest, f_names_old)
+
+    record_run("ATM point store", f_name_atm, params, [f_name_manifest])
+
+    return f_dir_store
+
+#%% open memory-mapped point store
+
+def open_atm_memmap_store(
+    f_dir_store:str,          # directory of the point store
+    columns:list = None,      # list of columns to map. default: all columns
+    ) -> object:              # a class with one read-only numpy.memmap per column as attributes
+
+    """
+      open a point store written by convert_atm_H5_to_memmap_store() and return a class with zero-copy,
+      read-only numpy.memmap views of the columns (lon_deg, lat_deg, ele_m, sigstr_cts).
+      No data is read until the arrays are accessed.
+    """
+
+    from memmap_column_store import read_store_manifest, map_column
+
+    manifest = read_store_manifest(f_dir_store, STORE_FORMAT, "ATM point store")
+    if manifest is None:
+        raise FileNotFoundError(f"\n\tERROR: {f_dir_store} is not a complete ATM point store (manifest.json not found). Abort.")
+
+    if columns is None:
+        columns = list(manifest["columns"].keys())
+
+    # define a class AtmPointStore for organizing the memory-mapped columns
+    class AtmPointStore():
+        def __init__(self):
+            self.n_points   = None # number of laser shots
+            self.source     = None # name of the ATM HDF5 file the store was created from
+            self.manifest   = None # content of manifest.json
+            self.lon_deg    = None # longitude in degrees east wrapped to ±180°
+            self.lat_deg    = None # latitude in degrees north
+            self.ele_m      = None # elevation above WGS-84 ellipsoid in meters
+            self.sigstr_cts = None # received laser signal strength (relative) in digitizer counts
+
+    atm_pts = AtmPointStore()
+    atm_pts.n_points = manifest["n_points"]
+    atm_pts.source   = manifest["source"]
+    atm_pts.manifest = manifest
+
+    for col in columns:
+        info = manifest["columns"][col]
+        setattr(atm_pts, col, map_column(f_dir_store, info["file"], info["dtype"], atm_pts.n_points))
+
+    return atm_pts
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_name_atm = r".." + os.sep + "data" + os.sep + "example_files" + os.sep + "ILATM1B_20190506_131600.ATM6AT6.h5"
+
+    tic = time.perf_counter()
+    f_dir_store = convert_atm_H5_to_memmap_store(f_name_atm)
+    toc = time.perf_counter()
+    print(f"\tTime to convert HDF5 file to point store: {toc - tic:0.1f} seconds")
+
+    tic = time.perf_counter()
+    atm_pts = open_atm_memmap_store(f_dir_store)
+    ele_mean = np.mean(atm_pts.ele_m)
+    toc = time.perf_counter()
+    print(f"\tTime to open point store and average {atm_pts.n_points:d} elevations: {toc - tic:0.3f} seconds ({ele_mean:.2f} m)")
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: single command-line entry point for the Python™ tools in this repository.
+         Each tool is a subcommand. Heavy dependencies (h5py, pandas, geopandas, rioxarray,
+         laspy, ...) are only imported by the subcommand that needs them, so printing help
+         or starting a worker in a cluster job array does not pay their import time.
+
+Usage:   python atm_sfm_cli.py <subcommand> [options]
+
+             atm       convert ATM HDF5 lidar point clouds to CSV, GPKG, LAS/LAZ or a memory-mapped point store
+             kt19      convert KT19 surface temperature files to GeoPackage (GPKG)
+             residual  convert ASP residual output files to GeoPackage (GPKG)
+             tsai      parse ASP Tsai camera models and print intrinsic and extrinsic parameters
+             ndwi      calculate NDWI_ice GeoTiffs from CAMBOT L1B RGB GeoTiffs and optionally mosaic them into a COG
+             lum       convert CAMBOT L0 RGB images to single-channel luminance images for ASP
+             lakes     detect supraglacial lakes in NDWI_ice GeoTiffs and save one GPKG per flight
+             surface   fit water-surface elevation and slope of lakes from ATM lidar shots
+             depth     calculate a refraction-corrected lake depth raster from a lakebed DEM and lake water surfaces
+             glint     predict sun glint of CAMBOT frames over water from ASP camera models
+             campaign  ingest ATM HDF5 granules into a tiled and partitioned Parquet campaign dataset
+             kt19store ingest KT19 surface temperature files into a time-sorted campaign store
+             ior       calculate the index of refraction of water
+             catalog   build or update the granule catalog from .xml sidecar files
+
+         Use --timing to print the cold-start (interpreter start and tool import) time and a
+         per-stage summary table after the subcommand has finished. The import cost can be
+         inspected in detail with:  python -X importtime atm_sfm_cli.py <subcommand> ...
+
+         Converted files are recorded in a processing manifest (see processing_manifest.py) and are
+         skipped when run again with unchanged inputs, parameters and outputs. Use --force to process
+         all files and --dry-run to only list the files that would be processed. With --hash the
+         content of the input files is compared when only their modification time changed.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# make modules from this folder importable when the script is started from elsewhere
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+_T_IMPORT_CLI = time.perf_counter()
+
+#%% lazy import of tool modules
+
+def _lazy_import(module_name):
+    """ import a tool module on first use and record the import time as stage "import <module_name>" """
+    import importlib
+    from processing_instrumentation import stage
+    with stage(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+#%% subcommand handlers. heavy imports happen inside the handlers only
+
+def run_atm(args):
+    atm = _lazy_import("convert_ATM_H5_to_csv_and_gpkd")
+    for f_name_atm in args.f_names:
+        print(f_name_atm)
+        if args.csv or args.gpkg:
+            atm.convert_atm_H5_to_csv_and_gpkg(f_name_atm, args.csv, args.gpkg, args.angle_wrap, args.force)
+        if args.las or args.laz:
+            atm.convert_atm_H5_to_las(f_name_atm, EPSG_OUT=args.epsg, COMPRESS=args.laz, FORCE=args.force)
+        if args.memmap:
+            _lazy_import("atm_memmap_point_store").convert_atm_H5_to_memmap_store(f_name_atm, OVERWRITE=args.force)
+
+def run_kt19(args):
+    kt19_to_gdf = _lazy_import("convert_KT19_to_gpkg").kt19_to_gdf
+    for f_name_kt19 in args.f_names:
+        print(f_name_kt19)
+        kt19_to_gdf(f_name_kt19, True, args.force)
+
+def run_residual(args):
+    convert_asp_res_to_gpkg = _lazy_import("convert_asp_residual_output_to_gpkg").convert_asp_res_to_gpkg
+    for f_name_res in args.f_names:
+        print(f_name_res)
+        convert_asp_res_to_gpkg(f_name_res, args.force)
+
+def run_tsai(args):
+    parse_asp_tsai_file = _lazy_import("parse_ASP_TSAI_camera_calibration_files").parse_asp_tsai_file
+    for f_name in args.f_names:
+        tsai_params = parse_asp_tsai_file(f_name)
+        print(f"{os.path.basename(f_name):s}")
+        print(f"\tfu = {tsai_params.fu:.4f}  fv = {tsai_params.fv:.4f}  cu = {tsai_params.cu:.2f}  cv = {tsai_params.cv:.2f}  pitch = {tsai_params.pitch}")
+        print(f"\tk1 = {tsai_params.k1}  k2 = {tsai_params.k2}  p1 = {tsai_params.p1}  p2 = {tsai_params.p2}")
+        if hasattr(tsai_params, 'x') & hasattr(tsai_params, 'm1'):
+            print(f"\tC  = {tsai_params.x:.4f} {tsai_params.y:.4f} {tsai_params.z:.4f}")
+        else:
+            print("\tcamera pose is undefined.")
+
+def run_ndwi(args):
+    calculate_ndwi_geotiffs = _lazy_import("calculate_L1B_NDWI_geotiffs").calculate_ndwi_geotiffs
+    list_of_files = calculate_ndwi_geotiffs(args.f_dir, args.prefix, args.cog, args.force,
+                                            N_READERS=args.readers, N_WRITERS=args.writers, QUEUE_DEPTH=args.queue_depth)
+    if args.dry_run:
+        return
+    # save list with file names to use with ASP dem_mosaic
+    f_name_list = args.list_file or os.path.join(args.f_dir, "f_name_list_to_mosaic.txt")
+    with open(f_name_list, 'w', newline='\n') as f_obj:
+        for f_name in list_of_files:
+            f_obj.write(f'{f_name:s}\n')
+    if args.mosaic:
+        mosaic_geotiffs_to_cog = _lazy_import("mosaic_geotiffs_to_cog").mosaic_geotiffs_to_cog
+        mosaic_geotiffs_to_cog([os.path.join(args.f_dir, f) for f in list_of_files], args.mosaic)
+        print(f"NDWI_ice mosaic: {args.mosaic:s}")
+
+def run_lum(args):
+    convert_rgb_to_luminance = _lazy_import("convert_rgb_to_luminance").convert_rgb_to_luminance
+    convert_rgb_to_luminance(args.f_names, args.f_dir_out, WEIGHTS=args.weights, DRIVER="GTiff" if args.gtiff else "JPEG",
+                             FORCE=args.force, N_READERS=args.readers, N_WRITERS=args.writers, QUEUE_DEPTH=args.queue_depth)
+
+def run_lakes(args):
+    detect_supraglacial_lakes = _lazy_import("detect_supraglacial_lakes").detect_supraglacial_lakes
+    detect_supraglacial_lakes(args.f_dir, f_dir_out=args.out or args.f_dir, N_CLASSES=args.classes, NDWI_MIN=args.ndwi_min,
+                              MIN_AREA_M2=args.min_area, N_WORKERS=args.workers, VERBOSE=True)
+
+def run_surface(args):
+    import geopandas as gpd
+    fit_lake_water_surfaces_from_files = _lazy_import("fit_lake_water_surface").fit_lake_water_surfaces_from_files
+    lakes_gdf = gpd.read_file(args.f_name_lakes)
+    lakes_gdf = fit_lake_water_surfaces_from_files(lakes_gdf, args.f_names_atm, SIGSTR_MIN=args.sigstr_min, SHORE_BUFFER_M=args.shore_buffer)
+    f_name_out = args.out or args.f_name_lakes.replace(".gpkg", "_surface.gpkg")
+    lakes_gdf.to_file(f_name_out, driver="GPKG")
+    print(f"{len(lakes_gdf):d} lakes, {int((lakes_gdf['n_shots_used'] > 0).sum()):d} with ATM shots: {f_name_out}")
+
+def run_depth(args):
+    import geopandas as gpd
+    calculate_lake_depth_raster = _lazy_import("calculate_lake_depth_raster").calculate_lake_depth_raster
+    lakes_gdf = gpd.read_file(args.lakes) if args.lakes else None
+    temp = args.temp_raster if args.temp_raster else args.temp
+    calculate_lake_depth_raster(args.f_name_bed, args.f_name_out, lakes_gdf=lakes_gdf, f_name_surface=args.surface,
+                                SURFACE_COLUMN=args.surface_column, TEMP=temp, WAVELENGTH_NM=args.wavelength,
+                                IOR_MODEL=args.ior_model, N_WORKERS=args.workers)
+
+def run_glint(args):
+    predict_sun_glint = _lazy_import("predict_sun_glint").predict_sun_glint
+    glint = predict_sun_glint(args.f_names, STEP=args.step, GLINT_ANGLE_DEG=args.angle, RETURN_MASKS=args.masks is not None)
+    glint.frames.to_csv(args.out, index=False, float_format='%.6f')
+    if args.masks is not None:
+        import numpy as np
+        np.savez_compressed(args.masks, f_name=glint.frames['f_name'].to_numpy(), masks=glint.masks,
+                            pix_col=glint.pix_col, pix_row=glint.pix_row)
+    n_glint = int((glint.frames['glint_fraction'] > args.max_fraction).sum())
+    print(f"{n_glint:d} of {len(glint.frames):d} frames with more than {args.max_fraction*100:.1f}% glint pixels: {args.out:s}")
+
+def run_campaign(args):
+    build_atm_campaign_dataset = _lazy_import("build_atm_campaign_dataset").build_atm_campaign_dataset
+    build_atm_campaign_dataset(args.f_names, args.f_dir_dataset, TILE_SIZE_M=args.tile_size, N_WORKERS=args.workers, VERBOSE=True)
+
+def run_kt19store(args):
+    build_kt19_campaign_store = _lazy_import("kt19_campaign_store").build_kt19_campaign_store
+    build_kt19_campaign_store(args.f_names, args.f_dir_store, VERBOSE=True)
+
+def run_ior(args):
+    ior_mod = _lazy_import("calc_refractive_index_of_water")
+    WATER = 0 if args.water == "fresh" else 1
+    water = "freshwater" if WATER == 0 else "seawater"
+    try:
+        ior = ior_mod.ior_parrish_2020(args.temp, args.wavelength, WATER)
+    except ValueError as err:
+        sys.exit(str(err))
+    print(f'\n\tThe index of refraction of {water:s} at {args.temp:.1f}°C and {args.wavelength:.0f} nm is: {ior:.4f}')
+    nw_532 = ior_mod.ior_dietrich_parrish_2025(args.temp, args.salinity)
+    print(f'\n\tDietrich and Parrish 2025 for S = {args.salinity:.1f} PSU (practical salinity units)')
+    print(f'\tThe index of refraction at {args.temp:.1f}°C and 532 nm is: {nw_532:.4f}')
+
+def run_catalog(args):
+    _lazy_import("build_image_catalog").build_image_catalog(args.f_name_db, args.dirs, N_WORKERS=args.workers, VERBOSE=True)
+
+#%% cold start time
+
+def _cold_start_s():
+    """ seconds since the start of the process (Linux via /proc, other platforms via psutil if available, otherwise since import of this module) """
+    try:
+        with open(f"/proc/{os.getpid():d}/stat") as f_obj:
+            start_ticks = float(f_obj.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f_obj:
+            uptime_s = float(f_obj.read().split()[0])
+        return uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return time.time() - psutil.Process().create_time()
+    except ImportError:
+        return time.perf_counter() - _T_IMPORT_CLI
+
+#%% argument parser
+
+# subcommands that check the processing manifest and therefore support --dry-run
+DRY_RUN_COMMANDS = ("atm", "kt19", "residual", "ndwi", "lum")
+
+def add_pipeline_arguments(p):
+    """ options of the prefetching pipeline (see prefetch_pipeline.py) """
+    p.add_argument("--readers", type=int, default=2, help="number of reader threads (default: 2)")
+    p.add_argument("--writers", type=int, default=2, help="number of writer threads (default: 2)")
+    p.add_argument("--queue-depth", type=int, default=4, help="maximum number of frames waiting between pipeline stages (default: 4)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="atm_sfm_cli.py", description="ATM-SfM-Bathymetry command-line tools.")
+    parser.add_argument("--timing", action="store_true", help="print cold-start time and per-stage summary table")
+    parser.add_argument("--force", action="store_true", help="process all files even if their outputs are up to date in the processing manifest")
+    parser.add_argument("--dry-run", action="store_true", help=f"only report which files would be processed ({', '.join(DRY_RUN_COMMANDS)})")
+    parser.add_argument("--hash", action="store_true", help="record the BLAKE2 hash of the input files, so that copies with a new modification time are not processed again")
+    sub = parser.add_subparsers(dest="command", metavar="subcommand")
+    sub.required = True
+
+    p = sub.add_parser("atm", help="convert ATM HDF5 lidar point clouds")
+    p.add_argument("f_names", nargs="+", help="ATM ilatm1b/ilnsa1b HDF5 files")
+    p.add_argument("--csv", action="store_true", help="save ASCII CSV file")
+    p.add_argument("--gpkg", action="store_true", help="save GeoPackage (GPKG) file")
+    p.add_argument("--las", action="store_true", help="save LAS 1.4 file")
+    p.add_argument("--laz", action="store_true", help="save compressed LAZ file")
+    p.add_argument("--memmap", action="store_true", help="save memory-mapped point store")
+    p.add_argument("--epsg", type=int, choices=[3413, 4326], default=3413, help="coordinate system for LAS/LAZ (default: 3413)")
+    p.add_argument("--angle-wrap", type=float, choices=[180.0, 360.0], default=180.0, help="longitude wrapping for CSV (default: 180)")
+    p.set_defaults(func=run_atm)
+
+    p = sub.add_parser("kt19", help="convert KT19 surface temperature files to GPKG")
+    p.add_argument("f_names", nargs="+", help="IAKST1B KT19 text files")
+    p.set_defaults(func=run_kt19)
+
+    p = sub.add_parser("residual", help="convert ASP residual output files to GPKG")
+    p.add_argument("f_names", nargs="+", help="ASP residual pointmap CSV files")
+    p.set_defaults(func=run_residual)
+
+    p = sub.add_parser("tsai", help="parse ASP Tsai camera models")
+    p.add_argument("f_names", nargs="+", help="ASP .tsai camera model files")
+    p.set_defaults(func=run_tsai)
+
+    p = sub.add_parser("ndwi", help="calculate NDWI_ice GeoTiffs from CAMBOT L1B GeoTiffs")
+    p.add_argument("f_dir", help="directory with CAMBOT L1B RGB GeoTiffs")
+    p.add_argument("--prefix", default="IOCAM1B", help="file name prefix of input GeoTiffs (IOCAM1B for NSIDC, 2019 for RAMP)")
+    p.add_argument("--list-file", default=None, help="file name list for ASP dem_mosaic (default: <f_dir>/f_name_list_to_mosaic.txt)")
+    p.add_argument("--cog", action="store_true", help="save NDWI_ice GeoTiffs as Cloud-Optimized GeoTIFFs")
+    p.add_argument("--mosaic", default=None, help="mosaic all NDWI_ice GeoTiffs into this Cloud-Optimized GeoTIFF")
+    add_pipeline_arguments(p)
+    p.set_defaults(func=run_ndwi)
+
+    p = sub.add_parser("lum", help="convert CAMBOT L0 RGB images to luminance images")
+    p.add_argument("f_dir_out", help="output directory for luminance images with the input file names")
+    p.add_argument("f_names", nargs="+", help="CAMBOTv2 L0 RGB JPEG images")
+    p.add_argument("--weights", choices=["rec601", "rec709"], default="rec601", help="luminance weights of R, G and B (default: rec601)")
+    p.add_argument("--gtiff", action="store_true", help="save LZW-compressed GeoTiffs instead of JPEGs")
+    add_pipeline_arguments(p)
+    p.set_defaults(func=run_lum)
+
+    p = sub.add_parser("lakes", help="detect supraglacial lakes in NDWI_ice GeoTiffs")
+    p.add_argument("f_dir", help="directory with NDWI_ice GeoTiffs (*_ndwi.tif)")
+    p.add_argument("--out", default=None, help="output directory for <flight>_lakes.gpkg files (default: f_dir)")
+    p.add_argument("--classes", type=int, default=3, help="number of Otsu classes (default: 3)")
+    p.add_argument("--ndwi-min", type=float, default=0.25, help="lower bound for the lake NDWI_ice threshold (default: 0.25)")
+    p.add_argument("--min-area", type=float, default=100.0, help="minimum lake area in m² (default: 100)")
+    p.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    p.set_defaults(func=run_lakes)
+
+    p = sub.add_parser("surface", help="fit lake water surfaces from ATM lidar shots")
+    p.add_argument("f_name_lakes", help="GPKG file with lake polygons, e.g., from the lakes subcommand")
+    p.add_argument("f_names_atm", nargs="+", help="ATM HDF5 files or memory-mapped point store directories")
+    p.add_argument("--out", default=None, help="output GPKG file (default: <f_name_lakes>_surface.gpkg)")
+    p.add_argument("--sigstr-min", type=float, default=None, help="minimum rcv_sigstr of water-surface shots (default: none)")
+    p.add_argument("--shore-buffer", type=float, default=2.0, help="shrink lake polygons by this distance in m (default: 2)")
+    p.set_defaults(func=run_surface)
+
+    p = sub.add_parser("depth", help="calculate a refraction-corrected lake depth raster")
+    p.add_argument("f_name_bed", help="ASP lakebed DEM GeoTiff (apparent lakebed elevation)")
+    p.add_argument("f_name_out", help="output lake depth GeoTiff")
+    p.add_argument("--lakes", default=None, help="GPKG with lake polygons and water-surface elevations, e.g., from the surface subcommand")
+    p.add_argument("--surface", default=None, help="water-surface DEM GeoTiff (default: water-surface elevation of the lake polygons)")
+    p.add_argument("--surface-column", default="ele_median_m", help="column with the water-surface elevation (default: ele_median_m)")
+    p.add_argument("--temp", type=float, default=0.0, help="water temperature in °C (default: 0)")
+    p.add_argument("--temp-raster", default=None, help="GeoTiff with water temperatures in °C (overrides --temp)")
+    p.add_argument("--wavelength", type=float, default=532.0, help="wavelength in nm for Parrish (2020) (default: 532)")
+    p.add_argument("--ior-model", choices=["parrish_2020", "dietrich_parrish_2025"], default="parrish_2020", help="index of refraction model (default: parrish_2020)")
+    p.add_argument("--workers", type=int, default=None, help="number of threads (default: number of CPUs)")
+    p.set_defaults(func=run_depth)
+
+    p = sub.add_parser("glint", help="predict sun glint of CAMBOT frames from ASP camera models")
+    p.add_argument("f_names", nargs="+", help="ASP .tsai camera model files named after the CAMBOT frames")
+    p.add_argument("--out", default="sun_glint.csv", help="CSV file with per-frame results (default: sun_glint.csv)")
+    p.add_argument("--masks", default=None, help="save low-resolution glint masks to this .npz file")
+    p.add_argument("--angle", type=float, default=15.0, help="maximum specular angle of glint pixels in degrees (default: 15)")
+    p.add_argument("--step", type=int, default=32, help="pixel spacing of the glint grid (default: 32)")
+    p.add_argument("--max-fraction", type=float, default=0.01, help="glint fraction above which frames are counted as affected (default: 0.01)")
+    p.set_defaults(func=run_glint)
+
+    p = sub.add_parser("campaign", help="ingest ATM HDF5 granules into a partitioned Parquet campaign dataset")
+    p.add_argument("f_dir_dataset", help="root directory of the dataset. created if it does not exist")
+    p.add_argument("f_names", nargs="+", help="ATM ilatm1b/ilnsa1b HDF5 files. already ingested granules are skipped")
+    p.add_argument("--tile-size", type=float, default=10000.0, help="tile size in meters in EPSG:3413 (default: 10000)")
+    p.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    p.set_defaults(func=run_campaign)
+
+    p = sub.add_parser("kt19store", help="ingest KT19 surface temperature files into a time-sorted campaign store")
+    p.add_argument("f_dir_store", help="directory of the campaign store. created if it does not exist")
+    p.add_argument("f_names", nargs="+", help="IAKST1B KT19 text files. unchanged files are skipped, modified files are replaced")
+    p.set_defaults(func=run_kt19store)
+
+    p = sub.add_parser("ior", help="calculate the index of refraction of water")
+    p.add_argument("--temp", type=float, default=0.0, help="temperature in °C (default: 0)")
+    p.add_argument("--wavelength", type=float, default=532.0, help="wavelength in nm (default: 532)")
+    p.add_argument("--water", choices=["fresh", "sea"], default="fresh", help="freshwater or seawater (default: fresh)")
+    p.add_argument("--salinity", type=float, default=0.1, help="salinity in PSU for Dietrich and Parrish (2025) (default: 0.1)")
+    p.set_defaults(func=run_ior)
+
+    p = sub.add_parser("catalog", help="build or update the granule catalog from .xml sidecar files")
+    p.add_argument("f_name_db", help="SQLite catalog file")
+    p.add_argument("dirs", nargs="+", help="directories searched recursively for sidecar files")
+    p.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    p.set_defaults(func=run_catalog)
+
+    return parser
+
+def main(argv=None):
+    t_cli = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    t_start_s = _cold_start_s()
+
+    if args.timing:
+        from processing_instrumentation import enable_instrumentation
+        enable_instrumentation()
+
+    if args.dry_run and args.command not in DRY_RUN_COMMANDS:
+        sys.exit(f"--dry-run is only supported by: {', '.join(DRY_RUN_COMMANDS)}. Abort.")
+    if args.force or args.dry_run or args.hash:
+        from processing_manifest import set_force, set_dry_run, set_hash
+        set_force(args.force)
+        set_dry_run(args.dry_run)
+        set_hash(args.hash)
+
+    args.func(args)
+
+    if args.dry_run:
+        from processing_manifest import print_dry_run_report
+        print_dry_run_report()
+
+    if args.timing:
+        from processing_instrumentation import get_records, summarize_records
+        records = get_records()
+        t_total  = time.perf_counter() - t_cli
+        t_import = sum(rec["wall_s"] for rec in records if rec["name"].startswith("import "))
+        print(f"\nCold start (interpreter and CLI until argument parsing): {t_start_s:0.3f} seconds")
+        print(f"Import of tool modules: {t_import:0.3f} seconds, total run time: {t_total:0.2f} seconds\n") # stages can be nested, so the stage times do not add up
+        summarize_records(records)
+
+    return 0
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: benchmark suite for the Python™ tools in this repository using synthetic data
+         at configurable, campaign-like scale. The example files in data/example_files are
+         too small to expose scaling problems, so this script generates:
+
+             ATM ilatm1b-like HDF5 granules (longitude, latitude, elevation, rcv_sigstr)
+             IOCAM0 AUX navigation CSV files with CAMBOTv2 header
+             IAKST1B KT19 surface temperature text files
+             ASP bundle adjustment residual CSV files
+             ASP .tsai camera model files
+             CAMBOT L1B-like RGB GeoTIFFs in EPSG:3413
+
+         and measures wall time, peak Python memory (tracemalloc) and the increase of the
+         peak resident set size for each public entry point. Results are stored as JSON, so
+         that runs can be compared for regressions:
+
+             python benchmark_atm_sfm_tools.py --scale 1.0 --out bench_new.json --compare bench_old.json
+
+Note:    the synthetic data are statistically plausible but not physically meaningful.
+         Scale 1.0 corresponds to roughly one ATM granule with 1 million laser shots,
+         20,000 navigation records and 100,000 KT19 samples.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+
+# make modules from this folder importable when the script is started from elsewhere
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+#%% synthetic data generators
+
+# center of the synthetic survey area near the 2019 CAMBOT example frames (degrees)
+LON_0 = -49.5
+LAT_0 =  69.0
+T_0   = 1557148560.0 # 2019-05-06T13:16:00 UTC in epoch seconds
+
+def make_synthetic_atm_h5(f_name_h5, n_shots, seed=0):
+    """ write an ATM ilatm1b-like HDF5 file with longitude (0°-360°), latitude, elevation and rcv_sigstr """
+    import h5py
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    with h5py.File(f_name_h5, 'w') as f_h5:
+        f_h5['/longitude'] = (LON_0 + rng.uniform(-0.5, 0.5, n_shots)) % 360.0
+        f_h5['/latitude']  = LAT_0 + rng.uniform(-0.2, 0.2, n_shots)
+        f_h5['/elevation'] = rng.normal(900.0, 50.0, n_shots)
+        f_h5['/instrument_parameters/rcv_sigstr'] = rng.integers(0, 4000, n_shots).astype('float32')
+    return f_name_h5
+
+def make_synthetic_aux_csv(f_name_aux, n_records, seed=0):
+    """ write an IOCAM0 AUX navigation file with a CAMBOTv2 header that aux_reader() can parse (2 Hz frames) """
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    posix = T_0 + np.arange(n_records) * 0.5 + 0.4217
+    stamp = pd.to_datetime(posix, unit='s').strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-2]
+    name  = pd.to_datetime(posix, unit='s').strftime('IOCAM0_2019_GR_NASA_%Y%m%d-%H%M%S.') + pd.Series(np.round(posix % 1 * 1e4).astype(int)).map('{:04d}'.format) + '.jpg'
+    lat   = LAT_0 + np.linspace(-0.2, 0.2, n_records)
+    lon   = LON_0 + np.linspace(-0.5, 0.5, n_records)
+    with open(f_name_aux, 'w', newline='\n') as f_obj:
+        f_obj.write("# Synthetic CAMBOTv2 ancillary file for benchmarking\n")
+        f_obj.write("# Input ancillary file: synthetic.csv,\n")
+        f_obj.write("# Sensor offset from GPS antenna [x-forward, y-starboard, z-down]: 1.234, -0.567, 2.345\n")
+        f_obj.write("# Sensor mounting angles [pitch, roll, heading]: 0.1, -0.2, 0.3\n")
+        f_obj.write("# Time offset (s): 0.0\n")
+        f_obj.write("# ImageFilename, Timestamp(UTC), PosixTime(UTC), Lat(deg), Lon(deg), AntAlt(m), AGL(m), Roll(deg), Pitch(deg), Heading(deg)\n")
+        df = pd.DataFrame({'name': name, 'stamp': stamp, 'posix': posix, 'lat': lat, 'lon': lon,
+                           'alt': 1500.0 + rng.normal(0, 5, n_records), 'agl': 600.0 + rng.normal(0, 5, n_records),
+                           'roll': rng.normal(0, 1, n_records), 'pitch': rng.normal(2, 1, n_records), 'heading': rng.uniform(0, 360, n_records)})
+        df.to_csv(f_obj, header=False, index=False, float_format='%.7f')
+    return f_name_aux
+
+def make_synthetic_kt19_txt(f_name_kt19, n_samples, seed=0):
+    """ write an IAKST1B-like KT19 text file with 10 header lines that kt19_to_gdf() can read (10 Hz) """
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    sod = 48960.0 + np.arange(n_samples) * 0.1
+    with open(f_name_kt19, 'w', newline='\n') as f_obj:
+        for i in range(10):
+            f_obj.write(f"# synthetic KT19 header line {i + 1:d}\n")
+        f_obj.write("Year, Day_of_Year, Seconds_of_Day(UTC), Latitude(deg), Longitude(deg), Elevation(m), Surface_Temperature(C), Internal_Temperature(C)\n")
+        df = pd.DataFrame({'year': 2019, 'doy': 126, 'sod': np.round(sod, 1),
+                           'lat': LAT_0 + np.linspace(-0.2, 0.2, n_samples), 'lon': (LON_0 + np.linspace(-0.5, 0.5, n_samples)) % 360.0,
+                           'ele': 1500.0 + rng.normal(0, 5, n_samples), 'ts': rng.normal(-5, 2, n_samples), 'ti': rng.normal(20, 1, n_samples)})
+        df.to_csv(f_obj, header=False, index=False, float_format='%.6f')
+    return f_name_kt19
+
+def make_synthetic_residual_csv(f_name_res, n_points, seed=0):
+    """ write an ASP residual pointmap CSV file in the format read by convert_asp_res_to_gpkg() """
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    with open(f_name_res, 'w', newline='\n') as f_obj:
+        f_obj.write("# lon, lat, height_above_datum, mean_residual, num_observations\n")
+        f_obj.write("# Geodetic Datum --> Name: WGS_1984  Spheroid: WGS 84\n")
+        df = pd.DataFrame({'lon': LON_0 + rng.uniform(-0.01, 0.01, n_points), 'lat': LAT_0 + rng.uniform(-0.01, 0.01, n_points),
+                           'h': rng.normal(870, 5, n_points), 'res': rng.gamma(2.0, 0.05, n_points), 'n': rng.integers(2, 6, n_points)})
+        df.to_csv(f_obj, header=False, index=False, float_format='%.12f')
+    return f_name_res
+
+def make_synthetic_tsai_files(f_dir_tsai, n_files, seed=0):
+    """ write a set of ASP .tsai pinhole camera models with camera pose in ECEF coordinates """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    os.makedirs(f_dir_tsai, exist_ok=True)
+    f_names = []
+    for i in range(n_files):
+        f_name = os.path.join(f_dir_tsai, f"synthetic_{i:06d}.tsai")
+        c = np.array([1487583.9, -1740435.1, 5934253.1]) + rng.normal(0, 50, 3)
+        r = rng.normal(0, 1, 9)
+        with open(f_name, 'w', newline='\n') as f_obj:
+            f_obj.write("VERSION_4\nPINHOLE\n")
+            f_obj.write(f"fu = {5235.99 + rng.normal():.13f}\nfv = {5235.99 + rng.normal():.13f}\n")
+            f_obj.write(f"cu = {2462.58 + rng.normal():.13f}\ncv = {1616.55 + rng.normal():.13f}\n")
+            f_obj.write("u_direction = 1 0 0\nv_direction = 0 1 0\nw_direction = 0 0 1\n")
+            f_obj.write(f"C = {c[0]:.9f} {c[1]:.9f} {c[2]:.9f}\n")
+            f_obj.write("R = " + " ".join(f"{x:.17f}" for x in r) + "\n")
+            f_obj.write("pitch = 1\nTSAI\n")
+            f_obj.write(f"k1 = {-0.0941 + rng.normal(0, 1e-3):.17f}\nk2 = {0.1069 + rng.normal(0, 1e-3):.17f}\n")
+            f_obj.write(f"p1 = {0.0011 + rng.normal(0, 1e-4):.17f}\np2 = {-0.0004 + rng.normal(0, 1e-4):.17f}\n")
+        f_names.append(f_name)
+    return f_names
+
+def make_synthetic_rgb_geotiffs(f_dir_tif, n_files, size=1024, seed=0):
+    """ write CAMBOT L1B-like 3-band uint8 RGB GeoTIFFs (0 = nodata) with one blue lake in EPSG:3413 with 0.5 m pixels """
+    import numpy as np
+    import rasterio
+    from   rasterio.transform import from_origin
+    rng = np.random.default_rng(seed)
+    os.makedirs(f_dir_tif, exist_ok=True)
+    f_names = []
+    for i in range(n_files):
+        f_name = os.path.join(f_dir_tif, f"IOCAM1B_2019_GR_NASA_20190506-1316{i % 60:02d}.{i:04d}.tif")
+        rgb = rng.integers(1, 256, (3, size, size), dtype=np.uint8)
+        rows, cols = np.ogrid[:size, :size]
+        lake = (rows - size // 2)**2 + (cols - size // 2)**2 < (size // 6)**2
+        rgb[0][lake] = rgb[0][lake] // 4 # low red and high blue reflectance of lake water
+        rgb[2][lake] = 128 + rgb[2][lake] // 2
+        rgb[:, :size // 16, :] = 0 # nodata border
+        profile = {'driver': 'GTiff', 'dtype': 'uint8', 'count': 3, 'width': size, 'height': size, 'crs': 'EPSG:3413',
+                   'transform': from_origin(-300000.0 + i * size * 0.25, -1680000.0, 0.5, 0.5), 'compress': 'LZW'}
+        with rasterio.open(f_name, 'w', **profile) as dst:
+            dst.write(rgb)
+        f_names.append(f_name)
+    return f_names
+
+def make_synthetic_lakebed_dem(f_name_dem, bounds, size=4096, seed=0):
+    """ write a float32 lakebed DEM in EPSG:3413 covering bounds (x_min, y_min, x_max, y_max) with a gently sloping surface """
+    import numpy as np
+    import rasterio
+    from   rasterio.transform import from_bounds
+    rng = np.random.default_rng(seed)
+    profile = {'driver': 'GTiff', 'dtype': 'float32', 'count': 1, 'width': size, 'height': size, 'crs': 'EPSG:3413',
+               'transform': from_bounds(*bounds, size, size), 'nodata': -9999.0, 'tiled': True, 'compress': 'DEFLATE'}
+    rows, cols = np.mgrid[:size, :size]
+    dem = (895.0 + 0.002 * cols - 0.001 * rows + rng.normal(0.0, 0.1, (size, size))).astype(np.float32)
+    with rasterio.open(f_name_dem, 'w', **profile) as dst:
+        dst.write(dem, 1)
+    return f_name_dem
+
+def make_synthetic_lakes_gdf(n_lakes, seed=0):
+    """ circular lake polygons with 100 m to 300 m radius in EPSG:3413 within the synthetic survey area """
+    import numpy as np
+    import shapely
+    import geopandas as gpd
+    from crs_transformer_registry import geo_to_epsg3413
+    rng = np.random.default_rng(seed)
+    x, y = geo_to_epsg3413(LON_0 + rng.uniform(-0.45, 0.45, n_lakes), LAT_0 + rng.uniform(-0.18, 0.18, n_lakes))
+    return gpd.GeoDataFrame({'lake_id': np.arange(n_lakes)}, geometry=shapely.buffer(shapely.points(x, y), rng.uniform(100.0, 300.0, n_lakes)), crs="EPSG:3413")
+
+def generate_synthetic_campaign(f_dir_out, scale=1.0, seed=0):
+    """
+    generate all synthetic input files in f_dir_out at the requested scale and return a dictionary
+    with the file names. Existing files are overwritten.
+    """
+    os.makedirs(f_dir_out, exist_ok=True)
+    n = lambda base: max(1, int(round(base * scale)))
+    files = {}
+    files['atm']  = make_synthetic_atm_h5(os.path.join(f_dir_out, "ILATM1B_20190506_131600.ATM6AT6.h5"), n(1000000), seed)
+    files['aux']  = make_synthetic_aux_csv(os.path.join(f_dir_out, "IOCAM0_2019_GR_NASA_20190506_ancillary_data.csv"), n(20000), seed)
+    files['kt19'] = make_synthetic_kt19_txt(os.path.join(f_dir_out, "IAKST1B_KT19_PROCESSED_20190506_131600.txt"), n(100000), seed)
+    files['res']  = make_synthetic_residual_csv(os.path.join(f_dir_out, "asp_ba_out-final_residuals_pointmap.csv"), n(100000), seed)
+    files['tsai'] = make_synthetic_tsai_files(os.path.join(f_dir_out, "tsai"), n(200), seed)
+    files['tif']  = make_synthetic_rgb_geotiffs(os.path.join(f_dir_out, "CAMBOT_L1"), n(4), 1024, seed)
+    return files
+
+#%% measurement of a single entry point
+
+def _peak_rss_mb():
+    """ peak resident set size of this process in MB (None if not available on this platform) """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024.0**2 if sys.platform == 'darwin' else peak / 1024.0 # bytes on macOS, kilobytes on Linux
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024.0**2 # Windows
+        except (ImportError, AttributeError):
+            return None
+
+def benchmark_entry_point(name, func, repeat=3, n_items=None):
+    """
+    call func() repeat times and return a dictionary with the best and median wall time in seconds,
+    the peak memory allocated through Python/NumPy during the first call (tracemalloc) and the increase
+    of the process' peak resident set size. n_items is used to report throughput (items per second).
+    """
+    import statistics
+    from   contextlib import redirect_stdout
+
+    times = []
+    rss_before = _peak_rss_mb()
+    for i in range(repeat):
+        if i == 0:
+            tracemalloc.start()
+        with open(os.devnull, 'w') as f_null, redirect_stdout(f_null): # suppress progress output of the tools
+            tic = time.perf_counter()
+            func()
+            toc = time.perf_counter()
+        if i == 0:
+            _, peak_py = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        times.append(toc - tic)
+    rss_after = _peak_rss_mb()
+
+    result = {'name': name, 'repeat': repeat, 'time_best_s': min(times), 'time_median_s': statistics.median(times),
+              'peak_py_mb': peak_py / 1024.0**2,
+              'peak_rss_increase_mb': (rss_after - rss_before) if (rss_after is not None and rss_before is not None) else None}
+    if n_items:
+        result['n_items'] = int(n_items)
+        result['items_per_s'] = n_items / min(times)
+
+    print(f"\t{name:40s} {result['time_best_s']:9.3f} s  {result['peak_py_mb']:9.1f} MB")
+    return result
+
+#%% run all benchmarks
+
+def run_benchmarks(f_dir_data, scale=1.0, repeat=3, seed=0):
+    """ generate synthetic data, benchmark all public entry points and return a results dictionary """
+
+    import numpy as np
+    from shapely import geometry
+
+    from asp_airborne_utilities import aux_reader, df_spatial_search, df_temporal_search, match_images_to_nav
+    from convert_ATM_H5_to_csv_and_gpkd import convert_atm_H5_to_csv_and_gpkg
+    from convert_KT19_to_gpkg import kt19_to_gdf
+    from convert_asp_residual_output_to_gpkg import convert_asp_res_to_gpkg
+    from parse_ASP_TSAI_camera_calibration_files import parse_asp_tsai_file
+    from calculate_L1B_NDWI_geotiffs import calculate_ndwi_geotiff, calculate_ndwi_geotiffs
+    from convert_rgb_to_luminance import convert_rgb_to_luminance, read_rgb_image, compute_luminance, write_luminance
+    from detect_supraglacial_lakes import detect_lakes_in_ndwi_geotiff
+    from calculate_lake_depth_raster import calculate_lake_depth_raster
+    from fit_lake_water_surface import fit_lake_water_surfaces_from_files
+    from predict_sun_glint import predict_sun_glint
+    from build_atm_campaign_dataset import build_atm_campaign_dataset, read_atm_campaign_dataset
+    from kt19_campaign_store import build_kt19_campaign_store, read_kt19_campaign_store
+    from navigation_interpolator import NavInterpolator
+
+    print(f"Generating synthetic data with scale {scale:.2f} in {f_dir_data}")
+    tic = time.perf_counter()
+    files = generate_synthetic_campaign(f_dir_data, scale, seed)
+    print(f"\tTime to generate synthetic data: {time.perf_counter() - tic:0.1f} seconds\n")
+
+    aux_df, _, _ = aux_reader(files['aux'])
+    n_aux = len(aux_df)
+    search_poly = geometry.box(LON_0 - 0.1, LAT_0 - 0.05, LON_0 + 0.1, LAT_0 + 0.05)
+    t_s = aux_df['Timestamp_UTC'].iloc[n_aux // 4]
+    t_e = aux_df['Timestamp_UTC'].iloc[n_aux // 2]
+    f_names_img = np.asarray(aux_df['ID'])
+
+    import h5py
+    with h5py.File(files['atm'], 'r') as f_h5:
+        n_shots = f_h5['/longitude'].shape[0]
+
+    # repeated runs must not be skipped as up to date by the processing manifest. the manifest is kept
+    # with the synthetic data instead of the user cache directory
+    from processing_manifest import set_force, MANIFEST_NAME
+    os.environ.setdefault("ATM_SFM_MANIFEST", os.path.join(f_dir_data, MANIFEST_NAME))
+    set_force(True)
+
+    results = []
+    print("Benchmarks (best time, peak Python memory):")
+    results.append(benchmark_entry_point("aux_reader", lambda: aux_reader(files['aux']), repeat, n_aux))
+    results.append(benchmark_entry_point("df_spatial_search", lambda: df_spatial_search(aux_df, search_poly, False), repeat, n_aux))
+    results.append(benchmark_entry_point("df_temporal_search", lambda: df_temporal_search(aux_df, t_s, t_e, False), repeat, n_aux))
+    results.append(benchmark_entry_point("match_images_to_nav", lambda: match_images_to_nav(aux_df, f_names_img, 0.1, False), repeat, n_aux))
+    nav = NavInterpolator(aux_df, np.array([1.234, -0.567, 2.345]))
+    t_nav = np.sort(np.random.default_rng(seed).uniform(nav.epoch_sec[0], nav.epoch_sec[-1], n_aux * 50))
+    results.append(benchmark_entry_point("NavInterpolator.interpolate", lambda: nav.interpolate(t_nav, LEVER_ARM=True), repeat, len(t_nav)))
+    results.append(benchmark_entry_point("kt19_to_gdf", lambda: kt19_to_gdf(files['kt19'], False), repeat))
+    f_dir_kt19 = os.path.join(f_dir_data, "KT19_campaign.kt19")
+    if os.path.isdir(f_dir_kt19):
+        import shutil
+        shutil.rmtree(f_dir_kt19) # the ingest skips files that are already in the store
+    results.append(benchmark_entry_point("build_kt19_campaign_store", lambda: build_kt19_campaign_store([files['kt19']], f_dir_kt19), 1))
+    results.append(benchmark_entry_point("read_kt19_campaign_store", lambda: read_kt19_campaign_store(f_dir_kt19, ["utc_time", "surface_temperature_c"], t_s=T_0, t_e=T_0 + 600.0), repeat))
+    results.append(benchmark_entry_point("convert_atm_H5_to_csv_and_gpkg[csv]", lambda: convert_atm_H5_to_csv_and_gpkg(files['atm'], True, False, 180), repeat, n_shots))
+    results.append(benchmark_entry_point("convert_atm_H5_to_csv_and_gpkg[gpkg]", lambda: convert_atm_H5_to_csv_and_gpkg(files['atm'], False, True, 180), 1, n_shots))
+    f_dir_campaign = os.path.join(f_dir_data, "ATM_campaign")
+    if os.path.isdir(f_dir_campaign):
+        import shutil
+        shutil.rmtree(f_dir_campaign) # the ingest skips granules that are already in the dataset
+    results.append(benchmark_entry_point("build_atm_campaign_dataset", lambda: build_atm_campaign_dataset([files['atm']], f_dir_campaign), 1, n_shots))
+    from crs_transformer_registry import geo_to_epsg3413
+    x_0, y_0 = geo_to_epsg3413(LON_0, LAT_0)
+    results.append(benchmark_entry_point("read_atm_campaign_dataset", lambda: read_atm_campaign_dataset(f_dir_campaign, bbox=(x_0 - 2000.0, y_0 - 2000.0, x_0 + 2000.0, y_0 + 2000.0)), repeat))
+    results.append(benchmark_entry_point("convert_asp_res_to_gpkg", lambda: convert_asp_res_to_gpkg(files['res']), 1))
+    results.append(benchmark_entry_point("parse_asp_tsai_file", lambda: [parse_asp_tsai_file(f) for f in files['tsai']], repeat, len(files['tsai'])))
+    epoch_tsai = T_0 + 0.5 * np.arange(len(files['tsai']))
+    results.append(benchmark_entry_point("predict_sun_glint", lambda: predict_sun_glint(files['tsai'], epoch_tsai), repeat, len(files['tsai'])))
+    results.append(benchmark_entry_point("calculate_ndwi_geotiff", lambda: [calculate_ndwi_geotiff(f, f.replace(".tif", "_ndwi.tif")) for f in files['tif']], repeat, len(files['tif'])))
+    f_dir_tif = os.path.dirname(files['tif'][0])
+    results.append(benchmark_entry_point("calculate_ndwi_geotiffs[pipeline]", lambda: calculate_ndwi_geotiffs(f_dir_tif, "IOCAM1B"), repeat, len(files['tif'])))
+    f_dir_lum = os.path.join(f_dir_data, "CAMBOT_lum")
+    os.makedirs(f_dir_lum, exist_ok=True)
+    results.append(benchmark_entry_point("convert_rgb_to_luminance[serial]", lambda: [write_luminance(compute_luminance(read_rgb_image(f)), os.path.join(f_dir_lum, os.path.basename(f)), "GTiff") for f in files['tif']], repeat, len(files['tif'])))
+    results.append(benchmark_entry_point("convert_rgb_to_luminance[pipeline]", lambda: convert_rgb_to_luminance(files['tif'], f_dir_lum, DRIVER="GTiff"), repeat, len(files['tif'])))
+    lakes_gdf = make_synthetic_lakes_gdf(max(10, int(round(2000 * scale))), seed)
+    results.append(benchmark_entry_point("fit_lake_water_surfaces_from_files", lambda: fit_lake_water_surfaces_from_files(lakes_gdf, [files['atm']]), repeat, len(lakes_gdf)))
+    lakes_gdf['ele_median_m'] = 900.0
+    f_name_dem = make_synthetic_lakebed_dem(os.path.join(f_dir_data, "lakebed_dem.tif"), lakes_gdf.total_bounds, max(512, int(round(8192 * np.sqrt(scale)))), seed)
+    results.append(benchmark_entry_point("calculate_lake_depth_raster", lambda: calculate_lake_depth_raster(f_name_dem, f_name_dem.replace(".tif", "_depth.tif"), lakes_gdf), repeat))
+    results.append(benchmark_entry_point("detect_lakes_in_ndwi_geotiff", lambda: [detect_lakes_in_ndwi_geotiff(f.replace(".tif", "_ndwi.tif")) for f in files['tif']], repeat, len(files['tif'])))
+
+    return {'scale': scale, 'seed': seed, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'results': results}
+
+def save_benchmarks(results, f_name_json):
+    """ save benchmark results as JSON """
+    with open(f_name_json, 'w') as f_obj:
+        json.dump(results, f_obj, indent=2)
+
+def compare_benchmarks(f_name_json_old, f_name_json_new, threshold=0.10):
+    """
+    compare two benchmark result files and print the relative change of the best time per entry point.
+    entry points that are slower by more than threshold (fraction) are flagged as regressions.
+    returns the list of names of entry points with regressions.
+    """
+    with open(f_name_json_old) as f_obj:
+        old = {r['name']: r for r in json.load(f_obj)['results']}
+    with open(f_name_json_new) as f_obj:
+        new = {r['name']: r for r in json.load(f_obj)['results']}
+
+    regressions = []
+    print(f"\n{'entry point':40s} {'old [s]':>9s} {'new [s]':>9s} {'change':>8s}")
+    for name, r_new in new.items():
+        if name not in old:
+            print(f"{name:40s} {'-':>9s} {r_new['time_best_s']:9.3f}      new")
+            continue
+        t_old = old[name]['time_best_s']
+        t_new = r_new['time_best_s']
+        change = (t_new - t_old) / t_old if t_old > 0 else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:40s} {t_old:9.3f} {t_new:9.3f} {change*100:+7.1f}%{flag}")
+
+    return regressions
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark ATM-SfM-Bathymetry tools with synthetic data.")
+    parser.add_argument("--scale", type=float, default=1.0, help="data volume scale factor (1.0 = one ATM granule with 1 million shots)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions per entry point")
+    parser.add_argument("--data-dir", default=None, help="directory for synthetic data (default: temporary directory)")
+    parser.add_argument("--out", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous run to compare against")
+    args = parser.parse_args()
+
+    if args.data_dir is None:
+        with tempfile.TemporaryDirectory() as f_dir_tmp:
+            results = run_benchmarks(f_dir_tmp, args.scale, args.repeat)
+    else:
+        results = run_benchmarks(args.data_dir, args.scale, args.repeat)
+
+    save_benchmarks(results, args.out)
+    print(f"\nSaved benchmark results: {args.out}")
+
+    if args.compare:
+        compare_benchmarks(args.compare, args.out)
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: ingest all ATM ilatm1b/ilnsa1b HDF5 granules of a campaign into one spatially tiled and
+         partitioned Parquet dataset, so that the laser shots of a lake or a time window can be read
+         without opening thousands of granules:
+
+             https://nsidc.org/data/ilatm1b/versions/2
+             https://nsidc.org/data/ilnsa1b/versions/2
+
+         Granules are read in parallel by a process pool and the shots are reprojected to polar
+         stereographic coordinates (EPSG:3413). Each granule is split into square tiles (TILE_SIZE_M)
+         and UTC dates and written as one Parquet file per partition in Hive directory layout:
+
+             ATM_campaign/
+                 atm_campaign_dataset.sqlite                              granules and per-file statistics
+                 tile=-30_-169/date=2019-05-06/ILATM1B_20190506_131600.ATM6AT6.parquet
+                 tile=-30_-168/date=2019-05-06/ILATM1B_20190506_131600.ATM6AT6.parquet
+                 ...
+
+         Columns: x_m, y_m (EPSG:3413), lon_deg (±180°), lat_deg, ele_m, sigstr_cts, t_sec (epoch seconds).
+         The time of each shot is taken from /instrument_parameters/time_hhmmss if the granule contains
+         it, otherwise the granule start time from the file name is used for all shots.
+
+         The number of shots, bounding box, time range and elevation statistics of every file are
+         stored in a SQLite database (view "partitions" for per-partition statistics). Queries by
+         bounding box and time select the files from the statistics first, so only the relevant
+         partitions are opened. Re-running the ingest only adds granules that are new or modified.
+
+usage in code:
+    from build_atm_campaign_dataset import build_atm_campaign_dataset, read_atm_campaign_dataset
+    n_new  = build_atm_campaign_dataset(f_names_atm, "ATM_campaign")
+    atm_df = read_atm_campaign_dataset("ATM_campaign", bbox=(-300000.0, -1690000.0, -295000.0, -1685000.0),
+                                       t_s="2019-05-06T13:00:00.0", t_e="2019-05-06T14:00:00.0")
+"""
+
+import os
+import re
+import sqlite3
+import numpy as np
+
+DATASET_DB  = "atm_campaign_dataset.sqlite"
+TILE_SIZE_M = 10000.0 # default tile size in meters (EPSG:3413)
+DATASET_COLUMNS = ("x_m", "y_m", "lon_deg", "lat_deg", "ele_m", "sigstr_cts", "t_sec")
+
+# SQLite schema with one row per ingested granule and one row per Parquet file (granule, tile, date)
+DATASET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS granules (
+    granule      TEXT PRIMARY KEY,
+    input_path   TEXT,
+    input_size   INTEGER,
+    input_mtime  REAL,
+    n_points     INTEGER,
+    t_start      REAL,
+    t_end        REAL,
+    t_ingest     REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    file         TEXT PRIMARY KEY,
+    granule      TEXT NOT NULL,
+    tile         TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    n_points     INTEGER,
+    x_min        REAL,
+    x_max        REAL,
+    y_min        REAL,
+    y_max        REAL,
+    t_min        REAL,
+    t_max        REAL,
+    ele_min      REAL,
+    ele_max      REAL,
+    ele_mean     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_files_partition ON files (tile, date);
+CREATE INDEX IF NOT EXISTS idx_files_granule ON files (granule);
+CREATE VIEW IF NOT EXISTS partitions AS
+    SELECT tile, date, COUNT(*) AS n_files, SUM(n_points) AS n_points,
+           MIN(x_min) AS x_min, MAX(x_max) AS x_max, MIN(y_min) AS y_min, MAX(y_max) AS y_max,
+           MIN(t_min) AS t_min, MAX(t_max) AS t_max, MIN(ele_min) AS ele_min, MAX(ele_max) AS ele_max,
+           SUM(ele_mean * n_points) / SUM(n_points) AS ele_mean
+    FROM files GROUP BY tile, date;
+"""
+
+#%% granule time
+
+def granule_start_epoch(f_name_atm:str) -> float:
+    """ granule start time in epoch seconds from ATM file names such as ILATM1B_20190506_131600.ATM6AT6.h5 """
+
+    re_srch = re.search(r"_(\d{8})_(\d{6})", os.path.basename(f_name_atm))
+    if not re_srch:
+        raise ValueError(f"\n\tERROR: no date and time found in file name {f_name_atm}. Abort.")
+    date_str, time_str = re_srch.groups()
+    day = np.datetime64(f"{date_str[0:4]}-{date_str[4:6]}-{date_str[6:8]}", "D").astype(np.int64)
+    return day * 86400.0 + int(time_str[0:2]) * 3600.0 + int(time_str[2:4]) * 60.0 + int(time_str[4:6])
+
+def _shot_times(data_hdf_atm, t_granule, n_points):
+    """ epoch seconds of each shot from time_hhmmss (UTC time of day) or the granule start time """
+
+    if '/instrument_parameters/time_hhmmss' not in data_hdf_atm:
+        return np.full(n_points, t_granule)
+
+    hhmmss = data_hdf_atm['/instrument_parameters/time_hhmmss'][:].astype(np.float64)
+    hh     = np.floor(hhmmss / 10000.0)
+    mm     = np.floor((hhmmss - hh * 10000.0) / 100.0)
+    sod    = hh * 3600.0 + mm * 60.0 + (hhmmss - hh * 10000.0 - mm * 100.0)
+
+    # granules can cross midnight: times of day much earlier than the granule start belong to the next day
+    day_start = np.floor(t_granule / 86400.0) * 86400.0
+    sod_start = t_granule - day_start
+    return day_start + sod + np.where(sod < sod_start - 43200.0, 86400.0, 0.0)
+
+#%% ingest a single granule
+
+def ingest_atm_granule(
+    f_name_atm:str,                 # path to ATM point cloud lidar file in HDF5 format
+    f_dir_dataset:str,              # root directory of the partitioned dataset
+    TILE_SIZE_M:float = TILE_SIZE_M,# tile size in meters (EPSG:3413)
+    COMPRESSION:str = "zstd",       # Parquet compression
+    ) -> list:                      # one dictionary with statistics per written Parquet file
+
+    """
+      read an ATM HDF5 granule, reproject the shots to EPSG:3413, split them by tile and UTC date and
+      write one Parquet file per partition. Files are written to a temporary name and renamed, so
+      that interrupted runs do not leave truncated files behind.
+    """
+
+    import h5py
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from   crs_transformer_registry import geo_to_epsg3413
+
+    granule   = os.path.splitext(os.path.basename(f_name_atm))[0]
+    t_granule = granule_start_epoch(f_name_atm)
+
+    with h5py.File(f_name_atm, 'r') as data_hdf_atm:
+        lon = data_hdf_atm['/longitude'][:]
+        lat = data_hdf_atm['/latitude'][:]
+        ele = data_hdf_atm['/elevation'][:]
+        sig = data_hdf_atm['/instrument_parameters/rcv_sigstr'][:]
+        t_sec = _shot_times(data_hdf_atm, t_granule, len(lon))
+
+    lon = np.mod(lon - 180.0, 360.0) - 180.0 # wrap longitudes to ±180°
+    x, y = geo_to_epsg3413(lon, lat)
+    x, y = np.asarray(x), np.asarray(y)
+
+    # partition key: tile indices and day number combined into one integer. a stable sort keeps the shots of
+    # each partition in time order. numpy uses a linear-time radix sort for stable sorts of 16-bit integers
+    tile_x = np.floor(x / TILE_SIZE_M).astype(np.int64)
+    tile_y = np.floor(y / TILE_SIZE_M).astype(np.int64)
+    day    = np.floor(t_sec / 86400.0).astype(np.int64)
+    if len(x):
+        tx_0, ty_0, d_0 = tile_x.min(), tile_y.min(), day.min()
+        n_ty, n_d = tile_y.max() - ty_0 + 1, day.max() - d_0 + 1
+        key = ((tile_x - tx_0) * n_ty + (tile_y - ty_0)) * n_d + (day - d_0)
+    else:
+        tx_0 = ty_0 = d_0 = n_ty = n_d = 0
+        key = np.empty(0, dtype=np.int64)
+    if key.size and key.max() < 65536:
+        key = key.astype(np.uint16)
+    order   = np.argsort(key, kind="stable")
+    counts  = np.bincount(key) if key.size else np.empty(0, dtype=np.int64)
+    key_u   = np.flatnonzero(counts)
+    bounds  = np.concatenate([[0], np.cumsum(counts[key_u])])
+    key_u   = np.stack([key_u // n_d // n_ty + tx_0, key_u // n_d % n_ty + ty_0, key_u % n_d + d_0], axis=1) if key_u.size else np.empty((0, 3), dtype=np.int64)
+
+    columns = dict(zip(DATASET_COLUMNS, (x, y, lon, lat, ele, sig.astype(np.float32), t_sec)))
+    columns = {name: arr[order] for name, arr in columns.items()}
+
+    # per-partition statistics with reduceat on the sorted columns
+    starts = bounds[:-1]
+    stats_min = {name: np.minimum.reduceat(columns[name], starts) for name in ("x_m", "y_m", "t_sec", "ele_m")} if len(starts) else {}
+    stats_max = {name: np.maximum.reduceat(columns[name], starts) for name in ("x_m", "y_m", "t_sec", "ele_m")} if len(starts) else {}
+    ele_sum   = np.add.reduceat(columns["ele_m"], starts) if len(starts) else []
+
+    records = []
+    for k, (tx, ty, d) in enumerate(key_u):
+        tile = f"{tx:d}_{ty:d}"
+        date = str(np.datetime64(int(d), "D"))
+        f_dir_part = os.path.join(f_dir_dataset, f"tile={tile:s}", f"date={date:s}")
+        os.makedirs(f_dir_part, exist_ok=True)
+        f_name_part = os.path.join(f_dir_part, granule + ".parquet")
+
+        i_s, i_e = bounds[k], bounds[k + 1]
+        table = pa.table({name: arr[i_s:i_e] for name, arr in columns.items()})
+        pq.write_table(table, f_name_part + ".tmp", compression=COMPRESSION)
+        os.replace(f_name_part + ".tmp", f_name_part)
+
+        records.append({"file": os.path.relpath(f_name_part, f_dir_dataset), "granule": granule, "tile": tile, "date": date,
+                        "n_points": int(i_e - i_s),
+                        "x_min": float(stats_min["x_m"][k]), "x_max": float(stats_max["x_m"][k]),
+                        "y_min": float(stats_min["y_m"][k]), "y_max": float(stats_max["y_m"][k]),
+                        "t_min": float(stats_min["t_sec"][k]), "t_max": float(stats_max["t_sec"][k]),
+                        "ele_min": float(stats_min["ele_m"][k]), "ele_max": float(stats_max["ele_m"][k]),
+                        "ele_mean": float(ele_sum[k] / (i_e - i_s))})
+
+    return records
+
+def _ingest_atm_granule_safe(args):
+    """ worker function for the process pool. returns (f_name_atm, records or None, error message or None) """
+    f_name_atm, f_dir_dataset, tile_size_m, compression = args
+    try:
+        return f_name_atm, ingest_atm_granule(f_name_atm, f_dir_dataset, tile_size_m, compression), None
+    except Exception as err:
+        return f_name_atm, None, str(err)
+
+#%% build or update the campaign dataset
+
+def build_atm_campaign_dataset(
+    f_names_atm:list,               # list of ATM HDF5 granules
+    f_dir_dataset:str,              # root directory of the partitioned dataset. created if it does not exist
+    TILE_SIZE_M:float = TILE_SIZE_M,# tile size in meters (EPSG:3413). must not change for an existing dataset
+    COMPRESSION:str = "zstd",       # Parquet compression
+    N_WORKERS:int = None,           # number of worker processes. None = number of CPUs
+    VERBOSE:bool = False,           # print summary
+    ) -> int:                       # number of ingested (new or modified) granules
+
+    """
+      build or incrementally update the partitioned campaign dataset. Only granules that are new or
+      whose size or modification time changed since the last run are ingested. The Parquet files of
+      modified granules are replaced.
+    """
+
+    import time
+    from   concurrent.futures import ProcessPoolExecutor
+    from   processing_instrumentation import stage, file_size
+
+    os.makedirs(f_dir_dataset, exist_ok=True)
+    con = sqlite3.connect(os.path.join(f_dir_dataset, DATASET_DB))
+    con.executescript(DATASET_SCHEMA)
+    con.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+
+    # the tile size defines the partitions and is fixed when the dataset is created
+    row = con.execute("SELECT value FROM settings WHERE name = 'tile_size_m'").fetchone()
+    if row is None:
+        with con:
+            con.execute("INSERT INTO settings (name, value) VALUES ('tile_size_m', ?)", (repr(float(TILE_SIZE_M)),))
+    elif float(row[0]) != float(TILE_SIZE_M):
+        con.close()
+        raise ValueError(f"\n\tERROR: dataset {f_dir_dataset} uses tiles of {float(row[0]):.0f} m, not {TILE_SIZE_M:.0f} m. Abort.")
+
+    in_db = {row[0]: (row[1], row[2]) for row in con.execute("SELECT granule, input_size, input_mtime FROM granules")}
+    to_ingest = []
+    for f_name_atm in f_names_atm:
+        st = os.stat(f_name_atm)
+        granule = os.path.splitext(os.path.basename(f_name_atm))[0]
+        if in_db.get(granule) != (st.st_size, st.st_mtime):
+            to_ingest.append(f_name_atm)
+
+    # ingest granules in parallel. single granules are ingested in this process
+    tasks = [(f_name_atm, f_dir_dataset, TILE_SIZE_M, COMPRESSION) for f_name_atm in to_ingest]
+    with stage("campaign ingest granules", n_items=len(tasks), bytes_read=sum(file_size(f) for f in to_ingest)):
+        if len(tasks) > 1 and (N_WORKERS is None or N_WORKERS > 1):
+            with ProcessPoolExecutor(max_workers=N_WORKERS) as pool:
+                results = list(pool.map(_ingest_atm_granule_safe, tasks))
+        else:
+            results = [_ingest_atm_granule_safe(task) for task in tasks]
+
+    # a granule is registered only after all its files are written
+    n_err = 0
+    n_points = 0
+    with stage("campaign update SQLite", n_items=len(results)), con:
+        for f_name_atm, records, err in results:
+            if records is None:
+                n_err += 1
+                print(f"Unable to ingest {f_name_atm}: {err}")
+                continue
+            granule = os.path.splitext(os.path.basename(f_name_atm))[0]
+            new_files = {rec["file"] for rec in records}
+            for (f_old,) in con.execute("SELECT file FROM files WHERE granule = ?", (granule,)).fetchall():
+                if f_old not in new_files and os.path.exists(os.path.join(f_dir_dataset, f_old)):
+                    os.remove(os.path.join(f_dir_dataset, f_old)) # partitions of the previous version of a modified granule
+            con.execute("DELETE FROM files WHERE granule = ?", (granule,))
+            con.executemany("INSERT INTO files (file, granule, tile, date, n_points, x_min, x_max, y_min, y_max, "
+                            "t_min, t_max, ele_min, ele_max, ele_mean) VALUES (:file, :granule, :tile, :date, :n_points, "
+                            ":x_min, :x_max, :y_min, :y_max, :t_min, :t_max, :ele_min, :ele_max, :ele_mean)", records)
+            st = os.stat(f_name_atm)
+            n_granule = sum(rec["n_points"] for rec in records)
+            con.execute("INSERT OR REPLACE INTO granules (granule, input_path, input_size, input_mtime, n_points, t_start, t_end, t_ingest) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (granule, os.path.abspath(f_name_atm), st.st_size, st.st_mtime, n_granule,
+                         min((rec["t_min"] for rec in records), default=None), max((rec["t_max"] for rec in records), default=None),
+                         time.time()))
+            n_points += n_granule
+    con.close()
+
+    if VERBOSE:
+        print(f"Granules: {len(f_names_atm):d}, ingested: {len(to_ingest) - n_err:d}, errors: {n_err:d}, laser shots added: {n_points:d}")
+
+    return len(to_ingest) - n_err
+
+#%% query campaign dataset
+
+def _to_epoch(t):
+    """ epoch seconds of a time window limit (see to_epoch_ns() in asp_airborne_utilities.py) """
+    from asp_airborne_utilities import to_epoch_ns
+    t_ns = to_epoch_ns(t)
+    return None if t_ns is None else t_ns / 1e9
+
+def query_atm_campaign_files(
+    f_dir_dataset:str,              # root directory of the partitioned dataset
+    bbox:tuple = None,              # bounding box (x_min, y_min, x_max, y_max) in meters (EPSG:3413)
+    t_s = None,                     # start of time window: UTC date string in ISO 8601 format (2019-05-06T13:16:00.0), numpy.datetime64, pandas.Timestamp or epoch seconds
+    t_e = None,                     # end   of time window: UTC date string in ISO 8601 format (2019-05-06T13:16:00.0), numpy.datetime64, pandas.Timestamp or epoch seconds
+    ):
+
+    """ return the per-file statistics (Pandas DataFrame) of all Parquet files that overlap the bounding box and time window """
+
+    import pandas as pd
+
+    t_s, t_e = _to_epoch(t_s), _to_epoch(t_e)
+
+    where  = []
+    params = []
+    if bbox is not None:
+        where.append("x_max >= ? AND x_min <= ? AND y_max >= ? AND y_min <= ?")
+        params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+    if t_s is not None:
+        where.append("t_max >= ?")
+        params.append(t_s)
+    if t_e is not None:
+        where.append("t_min <= ?")
+        params.append(t_e)
+
+    sql = "SELECT * FROM files" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY t_min"
+
+    f_name_db = os.path.join(f_dir_dataset, DATASET_DB)
+    if not os.path.exists(f_name_db):
+        raise FileNotFoundError(f"\n\tERROR: {f_dir_dataset} is not an ATM campaign dataset ({DATASET_DB} not found). Abort.")
+    con = sqlite3.connect(f_name_db)
+    try:
+        files_df = pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+    return files_df
+
+def read_atm_campaign_dataset(
+    f_dir_dataset:str,              # root directory of the partitioned dataset
+    bbox:tuple = None,              # bounding box (x_min, y_min, x_max, y_max) in meters (EPSG:3413)
+    t_s = None,                     # start of time window: UTC date string in ISO 8601 format, numpy.datetime64, pandas.Timestamp or epoch seconds
+    t_e = None,                     # end   of time window: UTC date string in ISO 8601 format, numpy.datetime64, pandas.Timestamp or epoch seconds
+    columns:list = None,            # columns to read. default: all columns
+    ):
+
+    """
+      read the laser shots inside a bounding box and time window into a Pandas DataFrame. Only the
+      Parquet files whose statistics overlap the query are opened, and the rows are filtered with
+      pyarrow.dataset, which also skips Parquet row groups outside the query. An empty DataFrame with
+      the dataset columns is returned if no file overlaps the query.
+    """
+
+    import pandas as pd
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from   processing_instrumentation import stage
+
+    t_s, t_e = _to_epoch(t_s), _to_epoch(t_e)
+    files_df = query_atm_campaign_files(f_dir_dataset, bbox, t_s, t_e)
+
+    if files_df.empty:
+        # column types depend on the ingested granules. use the schema of any file in the dataset
+        f_names_all = query_atm_campaign_files(f_dir_dataset)["file"]
+        if len(f_names_all):
+            return pq.read_schema(os.path.join(f_dir_dataset, f_names_all.iloc[0])).empty_table().select(columns or DATASET_COLUMNS).to_pandas()
+        return pd.DataFrame({name: np.empty(0, dtype=np.float64) for name in (columns or DATASET_COLUMNS)})
+
+    with stage("campaign read Parquet", n_items=len(files_df)) as st:
+        dataset = ds.dataset([os.path.join(f_dir_dataset, f) for f in files_df["file"]], format="parquet")
+
+        expr = None
+        conditions = []
+        if bbox is not None:
+            conditions += [ds.field("x_m") >= bbox[0], ds.field("x_m") <= bbox[2], ds.field("y_m") >= bbox[1], ds.field("y_m") <= bbox[3]]
+        if t_s is not None:
+            conditions.append(ds.field("t_sec") >= t_s)
+        if t_e is not None:
+            conditions.append(ds.field("t_sec") <= t_e)
+        for cond in conditions:
+            expr = cond if expr is None else expr & cond
+
+        atm_df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+        st.n_items = len(atm_df)
+
+    return atm_df
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_dir_atm     = r".." + os.sep + "data" + os.sep + "example_files"
+    f_dir_dataset = r"ATM_campaign"
+    f_names_atm   = sorted(os.path.join(f_dir_atm, f) for f in os.listdir(f_dir_atm) if f.startswith("ILATM1B") and f.endswith(".h5"))
+
+    tic = time.perf_counter()
+    n_new = build_atm_campaign_dataset(f_names_atm, f_dir_dataset, VERBOSE=True)
+    toc = time.perf_counter()
+    print(f"\tTime to ingest {n_new:d} granules: {toc - tic:0.1f} seconds")
+
+    tic = time.perf_counter()
+    atm_df = read_atm_campaign_dataset(f_dir_dataset, bbox=(-300000.0, -1690000.0, -295000.0, -1685000.0))
+    toc = time.perf_counter()
+    print(f"\tTime to read {len(atm_df):d} laser shots inside the bounding box: {toc - tic:0.2f} seconds")
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: build and query a local, indexed catalog of NSIDC granules from the ECS metadata
+         sidecar files (.xml) that are distributed with each data file, e.g.:
+
+             IOCAM0_2019_GR_NASA_20190906-132014.4217.jpg.xml     (CAMBOTv2 L0 images, data set ID: IOCAM0)
+             IAKST1B_KT19_PROCESSED_20190506_102239.txt.xml       (KT19 surface temperature, data set ID: IAKST1B)
+
+         The sidecar files are parsed in parallel with a streaming XML parser and time, bounding box,
+         instrument/camera, campaign and file paths are stored in a SQLite database with a time index
+         and an R*Tree spatial index. Re-running the catalog builder only parses new or modified
+         sidecar files, so the catalog can be updated incrementally when new files arrive.
+
+usage in code:
+    from build_image_catalog import build_image_catalog, query_image_catalog
+    n_new = build_image_catalog(f_name_db, [f_dir_imagery])
+    cat_df = query_image_catalog(f_name_db, t_s="2019-09-06T13:20:00.0", t_e="2019-09-06T13:21:00.0",
+                                 bbox=(-56.0, 74.0, -55.0, 75.0))
+"""
+
+import os
+import sqlite3
+
+# SQLite schema with one row per granule, a time index and an R*Tree spatial index (bounding box in degrees)
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS granules (
+    id          INTEGER PRIMARY KEY,
+    xml_path    TEXT UNIQUE NOT NULL,
+    data_path   TEXT,
+    granule     TEXT,
+    short_name  TEXT,
+    instrument  TEXT,
+    sensor      TEXT,
+    platform    TEXT,
+    campaign    TEXT,
+    t_start     REAL,
+    t_end       REAL,
+    lon_min     REAL,
+    lon_max     REAL,
+    lat_min     REAL,
+    lat_max     REAL,
+    xml_size    INTEGER,
+    xml_mtime   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_granules_time ON granules (t_start, t_end);
+CREATE INDEX IF NOT EXISTS idx_granules_short_name ON granules (short_name);
+CREATE VIRTUAL TABLE IF NOT EXISTS granules_rtree USING rtree (id, lon_min, lon_max, lat_min, lat_max);
+"""
+
+#%% parse a single ECS metadata sidecar file
+
+def parse_granule_xml(f_name_xml:str) -> dict:
+    """
+      Parse an NSIDC ECS granule metadata sidecar file (.xml) with a streaming parser and return a
+      dictionary with granule name, data set short name, instrument, time range (epoch seconds) and
+      bounding box (degrees). Elements that are not found are returned as None.
+      For CAMBOT images the sub-second trigger time is taken from the file name, since the
+      sidecar files only contain the time of day with a resolution of one second.
+    """
+
+    import xml.etree.ElementTree as ET
+    from   datetime import datetime, timezone
+    from   asp_airborne_utilities import image_names_to_epoch
+
+    tags = {}
+    lon  = []
+    lat  = []
+
+    # iterparse streams the file. elements are cleared once they have been read
+    for event, elem in ET.iterparse(f_name_xml, events=("end",)):
+        tag = elem.tag
+        if tag == "PointLongitude":
+            lon.append(float(elem.text))
+        elif tag == "PointLatitude":
+            lat.append(float(elem.text))
+        elif tag in ("DistributedFileName", "LocalGranuleID", "ShortName", "InstrumentShortName", "SensorShortName",
+                     "PlatformShortName", "CampaignShortName", "CalendarDate", "TimeofDay",
+                     "RangeBeginningDate", "RangeBeginningTime", "RangeEndingDate", "RangeEndingTime"):
+            # keep first occurrence
+            if tag not in tags and elem.text is not None:
+                tags[tag] = elem.text.strip()
+        elem.clear()
+
+    def to_epoch(date_str, time_str):
+        if (date_str is None) or (time_str is None):
+            return None
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if "." in time_str else "%Y-%m-%d %H:%M:%S"
+        return datetime.strptime(f"{date_str} {time_str}", fmt).replace(tzinfo=timezone.utc).timestamp()
+
+    if "CalendarDate" in tags:
+        t_start = to_epoch(tags.get("CalendarDate"), tags.get("TimeofDay"))
+        t_end   = t_start
+    else:
+        t_start = to_epoch(tags.get("RangeBeginningDate"), tags.get("RangeBeginningTime"))
+        t_end   = to_epoch(tags.get("RangeEndingDate"), tags.get("RangeEndingTime"))
+
+    granule = tags.get("DistributedFileName", tags.get("LocalGranuleID"))
+
+    # CAMBOT file names encode the trigger time with sub-second resolution
+    if granule is not None and t_start is not None and t_start == t_end:
+        t_name = image_names_to_epoch([granule])[0]
+        if (t_name == t_name) and abs(t_name - t_start) < 1.0: # not NaN and consistent with the sidecar
+            t_start = t_end = float(t_name)
+
+    # wrap longitudes to ±180°
+    lon = [((x - 180.0) % 360.0) - 180.0 for x in lon]
+
+    return {
+        "granule"    : granule,
+        "short_name" : tags.get("ShortName"),
+        "instrument" : tags.get("InstrumentShortName"),
+        "sensor"     : tags.get("SensorShortName"),
+        "platform"   : tags.get("PlatformShortName"),
+        "campaign"   : tags.get("CampaignShortName"),
+        "t_start"    : t_start,
+        "t_end"      : t_end,
+        "lon_min"    : min(lon) if lon else None,
+        "lon_max"    : max(lon) if lon else None,
+        "lat_min"    : min(lat) if lat else None,
+        "lat_max"    : max(lat) if lat else None,
+    }
+
+def _parse_granule_xml_safe(f_name_xml):
+    """ worker function for the process pool. returns (f_name_xml, record or None, error message or None) """
+    try:
+        return f_name_xml, parse_granule_xml(f_name_xml), None
+    except Exception as err:
+        return f_name_xml, None, str(err)
+
+#%% build or update catalog
+
+def _scan_sidecar_files(dirs_inp, suffixes):
+    """ recursively list sidecar files with size and modification time using os.scandir """
+    found = {}
+    stack = [os.path.abspath(d) for d in dirs_inp]
+    while stack:
+        f_dir = stack.pop()
+        try:
+            with os.scandir(f_dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffixes):
+                        st = entry.stat()
+                        found[entry.path] = (st.st_size, st.st_mtime)
+        except FileNotFoundError:
+            print(f"Directory not found: {f_dir}")
+    return found
+
+def build_image_catalog(
+    f_name_db:str,              # path to SQLite catalog file. created if it does not exist
+    dirs_inp:list,              # list of directories that are searched recursively for sidecar files
+    suffixes:tuple = (".jpg.xml", ".tif.xml", ".txt.xml", ".h5.xml"), # sidecar file name endings to catalog
+    N_WORKERS:int = None,       # number of worker processes for parsing. None = number of CPUs
+    PRUNE:bool = True,          # remove catalog entries whose sidecar file no longer exists
+    VERBOSE:bool = False,       # print summary
+    ) -> int:                   # number of parsed (new or modified) sidecar files
+
+    """
+      build or incrementally update the SQLite granule catalog. Only sidecar files that are new or whose
+      size or modification time changed since the last run are parsed.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+    from processing_instrumentation import stage
+
+    if isinstance(dirs_inp, str):
+        dirs_inp = [dirs_inp]
+
+    con = sqlite3.connect(f_name_db)
+    con.executescript(CATALOG_SCHEMA)
+
+    # compare files on disk with catalog content
+    with stage("catalog scan sidecar files") as st:
+        on_disk = _scan_sidecar_files(dirs_inp, tuple(suffixes))
+        st.n_items = len(on_disk)
+    in_db   = {row[0]: (row[1], row[2], row[3]) for row in con.execute("SELECT xml_path, xml_size, xml_mtime, id FROM granules")}
+
+    to_parse = [f for f, (size, mtime) in on_disk.items() if (f not in in_db) or (in_db[f][0] != size) or (in_db[f][1] != mtime)]
+
+    # parse new/modified sidecar files in parallel. small batches are parsed in this process
+    with stage("catalog parse sidecar files", n_items=len(to_parse), bytes_read=sum(on_disk[f][0] for f in to_parse)):
+        if len(to_parse) > 64 and (N_WORKERS is None or N_WORKERS > 1):
+            with ProcessPoolExecutor(max_workers=N_WORKERS) as pool:
+                results = list(pool.map(_parse_granule_xml_safe, to_parse, chunksize=256))
+        else:
+            results = [_parse_granule_xml_safe(f) for f in to_parse]
+
+    n_err = 0
+    with stage("catalog update SQLite", f_name=f_name_db, n_items=len(results)), con:
+        for f_name_xml, rec, err in results:
+            if rec is None:
+                n_err += 1
+                print(f"Unable to parse {f_name_xml}: {err}")
+                continue
+            size, mtime = on_disk[f_name_xml]
+            data_path = f_name_xml[:-4] # remove ".xml"
+            if f_name_xml in in_db:
+                row_id = in_db[f_name_xml][2]
+                con.execute("DELETE FROM granules_rtree WHERE id = ?", (row_id,))
+                con.execute("DELETE FROM granules WHERE id = ?", (row_id,))
+            cur = con.execute(
+                "INSERT INTO granules (xml_path, data_path, granule, short_name, instrument, sensor, platform, campaign, "
+                "t_start, t_end, lon_min, lon_max, lat_min, lat_max, xml_size, xml_mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (f_name_xml, data_path, rec["granule"], rec["short_name"], rec["instrument"], rec["sensor"],
+                 rec["platform"], rec["campaign"], rec["t_start"], rec["t_end"],
+                 rec["lon_min"], rec["lon_max"], rec["lat_min"], rec["lat_max"], size, mtime))
+            if rec["lon_min"] is not None:
+                con.execute("INSERT INTO granules_rtree (id, lon_min, lon_max, lat_min, lat_max) VALUES (?, ?, ?, ?, ?)",
+                            (cur.lastrowid, rec["lon_min"], rec["lon_max"], rec["lat_min"], rec["lat_max"]))
+
+        n_pruned = 0
+        if PRUNE:
+            for f_name_xml, (size, mtime, row_id) in in_db.items():
+                if f_name_xml not in on_disk:
+                    con.execute("DELETE FROM granules_rtree WHERE id = ?", (row_id,))
+                    con.execute("DELETE FROM granules WHERE id = ?", (row_id,))
+                    n_pruned += 1
+    con.close()
+
+    if VERBOSE:
+        print(f"Sidecar files found: {len(on_disk):d}, parsed: {len(to_parse):d}, errors: {n_err:d}, removed: {n_pruned:d}")
+
+    return len(to_parse)
+
+#%% query catalog
+
+def query_image_catalog(
+    f_name_db:str,              # path to SQLite catalog file
+    t_s = None,                 # start of time window: UTC date string in ISO 8601 format (2019-05-12T16:10:40.5) or epoch seconds
+    t_e = None,                 # end   of time window: UTC date string in ISO 8601 format (2019-05-12T16:10:40.5) or epoch seconds
+    bbox:tuple = None,          # bounding box (lon_min, lat_min, lon_max, lat_max) in degrees
+    short_name:str = None,      # NSIDC data set ID, e.g., "IOCAM0" or "IAKST1B"
+    instrument:str = None,      # instrument short name, e.g., "CAMBOT"
+    ):
+
+    """
+      query the granule catalog by time window, bounding box, data set and instrument using the
+      time and R*Tree indexes and return the matching granules as Pandas DataFrame sorted by time.
+      Granules overlapping the time window and/or bounding box are returned.
+    """
+
+    import pandas as pd
+    from   asp_airborne_utilities import iso2epoch
+
+    if isinstance(t_s, str):
+        t_s = iso2epoch(t_s.strip())
+    if isinstance(t_e, str):
+        t_e = iso2epoch(t_e.strip())
+
+    sql    = "SELECT g.* FROM granules g"
+    where  = []
+    params = []
+
+    if bbox is not None:
+        sql += " JOIN granules_rtree r ON g.id = r.id"
+        where.append("r.lon_max >= ? AND r.lon_min <= ? AND r.lat_max >= ? AND r.lat_min <= ?")
+        params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+    if t_s is not None:
+        where.append("g.t_end >= ?")
+        params.append(t_s)
+    if t_e is not None:
+        where.append("g.t_start <= ?")
+        params.append(t_e)
+    if short_name is not None:
+        where.append("g.short_name = ?")
+        params.append(short_name)
+    if instrument is not None:
+        where.append("g.instrument = ?")
+        params.append(instrument)
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY g.t_start"
+
+    con = sqlite3.connect(f_name_db)
+    try:
+        cat_df = pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+    return cat_df
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_dir_data = r".." + os.sep + "data"
+    f_name_db  = f_dir_data + os.sep + "granule_catalog.sqlite"
+
+    tic = time.perf_counter()
+    n_parsed = build_image_catalog(f_name_db, [f_dir_data], VERBOSE=True)
+    toc = time.perf_counter()
+    print(f"\tTime to update catalog: {toc - tic:0.2f} seconds")
+
+    cat_df = query_image_catalog(f_name_db, t_s="2019-09-06T13:20:14.0", t_e="2019-09-06T13:20:16.0",
+                                 bbox=(-56.0, 74.0, -55.0, 75.0), short_name="IOCAM0")
+    print(cat_df[["granule", "t_start", "lon_min", "lat_min"]])
@@ -3,6 +3,7 @@
 Created on Mon Dec  4, 2023
 Revised on Thu May  2, 2024
         on Tue Apr 29, 2025 added Dietrich and Parrish, 2025 (https://doi.org/10.1029/2024EA004106)
+        on Mon Oct 19, 2026 moved models into functions that accept scalars and NumPy arrays
 
 Simple Python script for calculating the index of refraction using the empirical model from Christopher Parrish (2020):
 https://research.engr.oregonstate.edu/parrish/index-refraction-seawater-and-freshwater-function-wavelength-and-temperature
@@ -16,6 +17,7 @@ April 29, 205: added Dietrich and Parrish, 2025 (https://doi.org/10.1029/2024EA0
 """
 
 import os
+import numpy as np
 
 """
     Index of Refraction of Seawater and Freshwater as a Function of Wavelength and Temperature
@@ -31,56 +33,87 @@ import os
     
 """
 
-#%% set input parameters
- 
-WATER = 0         # 0 = freshwater, 1 = seawater
-temp  = 0.0       # temperature in °C - valid range: 0-30
-wavelength = 532  # wavelength  in nm - valid range: 400-700 (~ visible spectrum)
+#%% Parrish (2020) empirical model
+
+def ior_parrish_2020(temp, wavelength, WATER=0):
+    """
+    index of refraction of freshwater (WATER = 0) or seawater (WATER = 1) using the empirical model from Parrish (2020)
+    temp       : temperature in °C - valid range: 0-30. scalar or NumPy array (e.g., one value per pixel)
+    wavelength : wavelength  in nm - valid range: 400-700 (~ visible spectrum). scalar or NumPy array
+    raises ValueError for input parameters outside the valid range
+    """
+
+    #%% check input parameters
+    if np.any(np.asarray(temp) > 30) or np.any(np.asarray(temp) < 0):
+        raise ValueError("The temperature in °C needs to be between 0°C and 30°C. Abort.")
+        
+    if np.any(np.asarray(wavelength) > 700) or np.any(np.asarray(wavelength) < 400):
+        raise ValueError("The wavelength in nm needs to be between 400 nm and 700 nm. Abort.")    
+
+    #%% set coefficients
+
+    if WATER == 0:
+        # freshwater constants
+        a = -0.000001978124999
+        b =  0.000000103223477
+        c = -0.000008581249990
+        d = -0.000154833692090
+        e =  1.389193029374634
+    elif WATER == 1:
+        # seawater constants
+        a = -0.000001501562500
+        b =  0.000000107084865
+        c = -0.000042759374989
+        d = -0.000160475520686
+        e =  1.398067112092424
+    else:
+        raise ValueError("WATER needs to be 0 (freshwater) or 1 (seawater). Abort.")
+
+    #%% calculate refractive index of water
+        
+    ior = a*temp**2 + b*wavelength**2 + c*temp + d*wavelength + e
+
+    return ior
 
-#%% check input parameters
-if temp > 30 or temp < 0:
-    os.sys.exit("The temperature in °C needs to be between 0°C and 30°C. Abort.")
-    
-if wavelength > 700 or wavelength < 400:
-    os.sys.exit("The wavelength in nm needs to be between 400 nm and 700 nm. Abort.")    
-
-#%% set coefficients
-
-if WATER == 0:
-    # freshwater constants
-    a = -0.000001978124999
-    b =  0.000000103223477
-    c = -0.000008581249990
-    d = -0.000154833692090
-    e =  1.389193029374634
-    water = "freshwater"
-elif WATER == 1:
-    # seawater constants
-    a = -0.000001501562500
-    b =  0.000000107084865
-    c = -0.000042759374989
-    d = -0.000160475520686
-    e =  1.398067112092424
-    water = "seawater"
-else:
-    os.sys.exit("WATER needs to be 0 (freshwater) or 1 (seawater). Abort.")
-
-#%% calculate refractive index of water
-    
-ior = a*temp**2 + b*wavelength**2 + c*temp + d*wavelength + e
+#%% Dietrich and Parrish, 2025 (https://doi.org/10.1029/2024EA004106) 
+# Development and Analysis of a Global Refractive Index of Water Data Layer for Spaceborne and Airborne Bathymetric Lidar
 
-print(f'\n\tThe index of refraction of {water:s} at {temp:.1f}°C and {wavelength:d} nm is: {ior:.4f}')
+def ior_dietrich_parrish_2025(temp, S):
+    """
+    index of refraction of water at 532 nm (equation 15) from Dietrich and Parrish (2025)
+    temp : temperature in °C. note: temperature range can be 0°C to 40°C here. scalar or NumPy array
+    S    : salinity in practical salinity units (PSU). Essentially, one PSU represents 1 gram of salt 
+           per 1000 grams of water. scalar or NumPy array
+    """
 
+    nw_532 = S * (1.6E-8 * temp**2 - 1.05E-6 * temp + 1.99611E-4) - 2.02E-6 * temp**2 - 7.95113E-6 * temp + 1.336
 
-#%% Dietrich and Parrish, 2025 (https://doi.org/10.1029/2024EA004106) 
-# Development and Analysis of a Global Refractive Index of Water Data Layer for Spaceborne and Airborne Bathymetric Lidar
+    return nw_532
+
+#%% run module/function as script 
+
+if __name__ == '__main__':
+
+    #%% set input parameters
+     
+    WATER = 0         # 0 = freshwater, 1 = seawater
+    temp  = 0.0       # temperature in °C - valid range: 0-30
+    wavelength = 532  # wavelength  in nm - valid range: 400-700 (~ visible spectrum)
+
+    water = "freshwater" if WATER == 0 else "seawater"
+
+    try:
+        ior = ior_parrish_2020(temp, wavelength, WATER)
+    except ValueError as err:
+        os.sys.exit(str(err))
 
-# 532 nm (equation 15) note: temperature range can be 0°C to 40°C here 
- 
-S = 0.1 # salinity in practical salinity units (PSU). Essentially, one PSU represents 1 gram of salt per 1000 grams of water fresh water 0.5
+    print(f'\n\tThe index of refraction of {water:s} at {temp:.1f}°C and {wavelength:d} nm is: {ior:.4f}')
 
-nw_532 = S * (1.6E-8 * temp**2 - 1.05E-6 * temp + 1.99611E-4) - 2.02E-6 * temp**2 - 7.95113E-6 * temp + 1.336
+    # 532 nm (equation 15) note: temperature range can be 0°C to 40°C here 
+     
+    S = 0.1 # salinity in practical salinity units (PSU). Essentially, one PSU represents 1 gram of salt per 1000 grams of water fresh water 0.5
 
-print(f'\n\tDietrich and Parrish 2025 for S = {S:.1f} PSU (practical salinity units)')
-print(f'\tThe index of refraction of {water:s} at {temp:.1f}°C and {wavelength:d} nm is: {nw_532:.4f}')
+    nw_532 = ior_dietrich_parrish_2025(temp, S)
 
+    print(f'\n\tDietrich and Parrish 2025 for S = {S:.1f} PSU (practical salinity units)')
+    print(f'\tThe index of refraction of {water:s} at {temp:.1f}°C and {wavelength:d} nm is: {nw_532:.4f}')
@@ -13,14 +13,22 @@ This Python™ code is designed to work with the ATM CAMBOT L1B data product ava
 Purpose: create georeferenced NDWI_ice GeoTiff images from the above data product
     For information about the Normalized Difference Water Index modified for ice (NDWIice) see:
     https://github.com/mstudinger/ATM-SfM-Bathymetry/blob/main/Jupyter/CAMBOTv2_lake_detection_using_NDWI_and_Otsu_thresholding.ipynb    
+
+    calculate_ndwi_geotiffs() processes the frames in a prefetching pipeline (prefetch_pipeline.py): reading the
+    RGB GeoTiffs, calculating NDWI_ice and compressing/writing the output run in separate threads for different frames.
 """
 
 #%% load required modules
 import rioxarray# as rio
 import numpy as np
 import os
+from   crs_transformer_registry import get_crs, CRS_PS_NORTH
+from   processing_instrumentation import stage, file_size
+from   processing_manifest import needs_processing, record_run
 
 VERBOSE = False
+COG     = False # save NDWI_ice GeoTiffs as Cloud-Optimized GeoTIFFs (COG)
+MOSAIC  = False # mosaic NDWI_ice GeoTiffs into a single COG with mosaic_geotiffs_to_cog.py
 
 #%% set input and output files names
 f_dir_L1b   = r"CAMBOT_L1"
@@ -34,6 +42,9 @@ if FILE_TYPE == "NSIDC":
     f_name_start = "IOCAM1B"
 elif FILE_TYPE == "RAMP":
     f_name_start = "2019"
+
+# WKT of the polar stereographic projection used in NSIDC L1B GeoTiff files without EPSG code
+NSIDC_WKT = 'PROJCS["unnamed",GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]],PROJECTION["Polar_Stereographic"],PARAMETER["latitude_of_origin",70],PARAMETER["central_meridian",-45],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["metre",1],AXIS["Easting",SOUTH],AXIS["Northing",SOUTH]]'
     
 #%% extract R, G, and B bands for calculating NDWI output data set
 
@@ -61,62 +72,155 @@ def extract_band_from_GeoTiff(rgb_array, band1, band2):
 
     return d_array_out
 
-#%% make list with file names to convert
-# allocate empty list for file names to be processed with ASP's dem_mosaic 
-list_of_files = []
-
-for r, d, f in os.walk(f_dir_L1b): 
-        for file in sorted(f):
-            if (file.startswith(f_name_start) & file.endswith(".tif") & (file.count("ndwi") == 0) & (file.count(".tif_gray.tif") == 0)):
-                f_name_inp = f_dir_L1b + os.sep + file
-                f_name_out = f_dir_L1b + os.sep + file.replace(".tif","_ndwi.tif")
-                print(file)
-                list_of_files.append(file.replace(".tif","_ndwi.tif"))
-
-                # load data into a DataArray
-                rgb = rioxarray.open_rasterio(f_name_inp, chunks=True, lock=False)
-
-                # call function and extract bands          
-                ndwi = extract_band_from_GeoTiff(rgb, 1, 3) # keeps green channel for NDWI
-                red  = extract_band_from_GeoTiff(rgb, 2, 3) # red channel
-                blue = extract_band_from_GeoTiff(rgb, 1, 2) # blue channel
-
-                # calculate NDWI - convert DataArray type into numpy array            
-                RED  = np.asarray(red.values,dtype=float)  
-                BLUE = np.asarray(blue.values,dtype=float)
-                
-                # replace 0 values (nodata) with NaNs to avoid warning message dividing by 0
-                RED  = np.where(RED  == 0, np.nan, RED)
-                BLUE = np.where(BLUE == 0, np.nan, BLUE)
-                
-                NDWI = (BLUE - RED)/(BLUE + RED)
-                ndwi.values = NDWI
-                
-                # fix NaN value in NDWI
-                ndwi.rio.write_nodata(np.nan, inplace = True) # works for display in QGIS
-
-                # fix CRS with proper EPSG code                
-                # not needed here. simplistic but works
-                # if (rgb.spatial_ref.standard_parallel == 70.0 and rgb.spatial_ref.straight_vertical_longitude_from_pole == -45.0):
-                #    print('CRS parameters verified')
-                
-                if (rgb.spatial_ref.crs_wkt == 'PROJCS["unnamed",GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]],PROJECTION["Polar_Stereographic"],PARAMETER["latitude_of_origin",70],PARAMETER["central_meridian",-45],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["metre",1],AXIS["Easting",SOUTH],AXIS["Northing",SOUTH]]'):
-                    ndwi.rio.write_crs("epsg:3413", inplace=True)
-                    if VERBOSE:
-                        print("\n\tUpdated CRS EPSG code in exported file based on NSIDC WKT verification.")
-                    
-                # save GeoTiff files as float32 with LZW compression and updated statistics
-                # also seems to properly recognize NaN as the nodata value
-                # and seems to set dtype right, which results in larger file size even with LZW compression
-                
-                ndwi.rio.to_raster(f_name_out, dtype="float32", driver="GTiff", compress="LZW") 
-
-#%% save list with file names to use with ASP dem_mosaic
-f_obj = open(f_name_list, 'w',newline='\n') # use Unix-style LF end-of-line terminators from Windows
-for i in range(len(list_of_files)):
-    f_obj.write(f'{list_of_files[i]:s}\n')
-f_obj.close()
-
-#%% now run ASP dem_mosaic
-# https://stereopipeline.readthedocs.io/en/latest/tools/dem_mosaic.html
+#%% read, compute and write steps of the NDWI_ice calculation for a single L1B GeoTiff file
+
+def read_rgb_geotiff(f_name_inp):
+
+    """
+    read the red and blue bands of a CAMBOT L1B RGB GeoTiff file. returns the RGB DataArray, the
+    green band DataArray used as template for the NDWI_ice output, and the red and blue bands as numpy arrays
+    """
+
+    with stage("NDWI read RGB GeoTIFF", f_name=f_name_inp, bytes_read=file_size(f_name_inp)) as st:
+        # load data into a DataArray
+        rgb = rioxarray.open_rasterio(f_name_inp, chunks=True, lock=False)
+
+        # call function and extract bands          
+        ndwi = extract_band_from_GeoTiff(rgb, 1, 3) # keeps green channel for NDWI
+        red  = extract_band_from_GeoTiff(rgb, 2, 3) # red channel
+        blue = extract_band_from_GeoTiff(rgb, 1, 2) # blue channel
+
+        # calculate NDWI - convert DataArray type into numpy array            
+        RED  = np.asarray(red.values,dtype=float)  
+        BLUE = np.asarray(blue.values,dtype=float)
+        st.n_items = RED.size
+
+    return rgb, ndwi, RED, BLUE
+
+def compute_ndwi(rgb, ndwi, RED, BLUE):
+
+    """ calculate NDWI_ice from the output of read_rgb_geotiff() and return it as DataArray with NaN as nodata value """
+
+    with stage("NDWI compute", n_items=RED.size):
+        # replace 0 values (nodata) with NaNs to avoid warning message dividing by 0
+        RED  = np.where(RED  == 0, np.nan, RED)
+        BLUE = np.where(BLUE == 0, np.nan, BLUE)
+        
+        NDWI = (BLUE - RED)/(BLUE + RED)
+        ndwi.values = NDWI
+    
+    # fix NaN value in NDWI
+    ndwi.rio.write_nodata(np.nan, inplace = True) # works for display in QGIS
+
+    # fix CRS with proper EPSG code                
+    # not needed here. simplistic but works
+    # if (rgb.spatial_ref.standard_parallel == 70.0 and rgb.spatial_ref.straight_vertical_longitude_from_pole == -45.0):
+    #    print('CRS parameters verified')
+    
+    if (rgb.spatial_ref.crs_wkt == NSIDC_WKT):
+        ndwi.rio.write_crs(get_crs(CRS_PS_NORTH), inplace=True)
+        if VERBOSE:
+            print("\n\tUpdated CRS EPSG code in exported file based on NSIDC WKT verification.")
+
+    return ndwi
+
+def write_ndwi_geotiff(ndwi, f_name_out, COG=False):
+
+    """ save NDWI_ice as float32 GeoTiff with LZW compression or as Cloud-Optimized GeoTIFF if COG is True """
+
+    # save GeoTiff files as float32 with LZW compression and updated statistics
+    # also seems to properly recognize NaN as the nodata value
+    # and seems to set dtype right, which results in larger file size even with LZW compression
+    
+    with stage("NDWI write GeoTIFF", f_name=f_name_out, n_items=ndwi.size) as st:
+        if COG:
+            ndwi.rio.to_raster(f_name_out, dtype="float32", driver="COG", compress="DEFLATE", predictor="YES",
+                               blocksize=512, overview_resampling="average")
+        else:
+            ndwi.rio.to_raster(f_name_out, dtype="float32", driver="GTiff", compress="LZW") 
+        st.bytes_written = file_size(f_name_out)
+
+#%% calculate NDWI_ice for a single L1B GeoTiff file
+
+def calculate_ndwi_geotiff(f_name_inp, f_name_out, COG=False, FORCE=False):
+
+    """
+    calculate NDWI_ice from a CAMBOT L1B RGB GeoTiff file and save it as float32 GeoTiff
+    with LZW compression and NaN as nodata value. If COG is True the file is saved as tiled
+    Cloud-Optimized GeoTIFF with internal overviews and DEFLATE compression with floating-point predictor.
+    Frames whose output is up to date in the processing manifest are skipped unless FORCE is True
+    """
+
+    if not needs_processing("NDWI GeoTIFF", f_name_inp, {"COG": bool(COG)}, [f_name_out], FORCE):
+        return
+
+    ndwi = compute_ndwi(*read_rgb_geotiff(f_name_inp))
+    write_ndwi_geotiff(ndwi, f_name_out, COG)
+
+    record_run("NDWI GeoTIFF", f_name_inp, {"COG": bool(COG)}, [f_name_out])
+
+#%% make list with file names to convert and calculate NDWI_ice for all files
+
+def calculate_ndwi_geotiffs(f_dir_L1b, f_name_start, COG=False, FORCE=False, N_READERS=2, N_COMPUTE=1, N_WRITERS=2, QUEUE_DEPTH=4):
+
+    """
+    calculate NDWI_ice for all L1B GeoTiff files starting with f_name_start in f_dir_L1b
+    and return the list of output file names to be processed with ASP's dem_mosaic
+    or mosaic_geotiffs_to_cog(). The files are processed in a prefetching pipeline
+    (see prefetch_pipeline.py): while one NDWI_ice GeoTiff is compressed and written
+    the next RGB GeoTiffs are already read and computed
+    """
+
+    from prefetch_pipeline import run_pipeline
+
+    # allocate empty list for file names to be processed with ASP's dem_mosaic 
+    list_of_files = []
+    f_names = [] # (input, output) file names
+
+    for r, d, f in os.walk(f_dir_L1b): 
+            for file in sorted(f):
+                if (file.startswith(f_name_start) & file.endswith(".tif") & (file.count("ndwi") == 0) & (file.count(".tif_gray.tif") == 0)):
+                    f_name_inp = f_dir_L1b + os.sep + file
+                    f_name_out = f_dir_L1b + os.sep + file.replace(".tif","_ndwi.tif")
+                    print(file)
+                    list_of_files.append(file.replace(".tif","_ndwi.tif"))
+                    f_names.append((f_name_inp, f_name_out))
+
+    params = {"COG": bool(COG)}
+
+    def read_frame(f_names_frame):
+        if not needs_processing("NDWI GeoTIFF", f_names_frame[0], params, [f_names_frame[1]], FORCE):
+            return None
+        return read_rgb_geotiff(f_names_frame[0])
+
+    def compute_frame(f_names_frame, rgb_bands):
+        return compute_ndwi(*rgb_bands)
+
+    def write_frame(f_names_frame, ndwi):
+        write_ndwi_geotiff(ndwi, f_names_frame[1], COG)
+        record_run("NDWI GeoTIFF", f_names_frame[0], params, [f_names_frame[1]])
+
+    run_pipeline(f_names, read_frame, compute_frame, write_frame, N_READERS, N_COMPUTE, N_WRITERS, QUEUE_DEPTH, NAME="NDWI pipeline")
+
+    return list_of_files
+
+#%% run module/function as script 
+
+if __name__ == '__main__':
+
+    list_of_files = calculate_ndwi_geotiffs(f_dir_L1b, f_name_start, COG)
+
+    #%% save list with file names to use with ASP dem_mosaic
+    f_obj = open(f_name_list, 'w',newline='\n') # use Unix-style LF end-of-line terminators from Windows
+    for i in range(len(list_of_files)):
+        f_obj.write(f'{list_of_files[i]:s}\n')
+    f_obj.close()
+
+    #%% optional: mosaic NDWI_ice GeoTiffs into a Cloud-Optimized GeoTIFF instead of running ASP dem_mosaic
+    if MOSAIC:
+        from mosaic_geotiffs_to_cog import mosaic_geotiffs_to_cog
+        f_name_mosaic = mosaic_geotiffs_to_cog([f_dir_L1b + os.sep + f for f in list_of_files], f_dir_L1b + os.sep + "ndwi_mosaic_cog.tif")
+        print(f"\tNDWI_ice mosaic: {f_name_mosaic:s}")
 
+    #%% or run ASP dem_mosaic
+    # https://stereopipeline.readthedocs.io/en/latest/tools/dem_mosaic.html
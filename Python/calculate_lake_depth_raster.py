@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: supraglacial lake depth raster from the water-surface elevation and an ASP lakebed DEM
+         from through-water photogrammetry (SfM) with refraction correction.
+
+         The lakebed DEM from ASP is an apparent lakebed, because the image rays are refracted at the
+         water surface. For near-nadir viewing the true depth is the apparent depth multiplied by the
+         index of refraction of water (small-angle correction, e.g., Westaway et al., 2001):
+
+             depth = n * (surface - lakebed_apparent)
+
+         The index of refraction n is calculated per pixel with the models in calc_refractive_index_of_water.py
+         from a constant water temperature or a temperature raster (e.g., KT19 surface temperatures).
+         Only lake pixels are used. Raster temperatures outside the valid range of the model (e.g., slightly
+         below 0°C) are clipped to the range with a warning.
+         The water-surface elevation is either taken from a water-surface DEM or from the lake polygons
+         (e.g., ele_median_m from fit_lake_water_surface.py). Pixels outside the lake polygons are
+         masked.
+
+         The rasters are processed in blocks on the grid of the lakebed DEM. Water-surface and
+         temperature rasters on a different grid are resampled block by block with a GDAL warped VRT.
+         Blocks are processed in parallel by a thread pool (GDAL and NumPy release the GIL), the output
+         is a tiled, compressed GeoTIFF, and the memory use depends on the block size and the number of
+         threads, not on the DEM size.
+
+         Westaway, R. M., Lane, S. N., & Hicks, D. M. (2001). Remote sensing of clear-water, shallow,
+         gravel-bed rivers using digital photogrammetry. Photogrammetric Engineering and Remote Sensing,
+         67(11), 1271-1281.
+
+usage in code:
+    from calculate_lake_depth_raster import calculate_lake_depth_raster
+    calculate_lake_depth_raster(f_name_bed, "lake_depth.tif", lakes_gdf=lakes_gdf, TEMP=0.5)
+"""
+
+import os
+import threading
+import numpy as np
+
+IOR_MODELS = ("parrish_2020", "dietrich_parrish_2025")
+TEMP_RANGE = {"parrish_2020": (0.0, 30.0), "dietrich_parrish_2025": (0.0, 40.0)} # valid water temperatures in °C
+
+#%% helper functions
+
+def _same_grid(src, ref):
+    """ True if two rasterio datasets have the same CRS, transform and size """
+    return (src.crs == ref.crs) and (src.transform == ref.transform) and (src.width == ref.width) and (src.height == ref.height)
+
+def _open_on_grid(f_name, ref):
+    """
+      open a raster on the grid of the reference dataset. a warped VRT resamples the raster block by block if
+      needed. returns the dataset to read and the list of datasets to close
+    """
+    import rasterio
+    from   rasterio.vrt import WarpedVRT
+    from   rasterio.enums import Resampling
+
+    src = rasterio.open(f_name)
+    if _same_grid(src, ref):
+        return src, [src]
+    vrt = WarpedVRT(src, crs=ref.crs, transform=ref.transform, width=ref.width, height=ref.height,
+                    resampling=Resampling.bilinear, src_nodata=src.nodata, nodata=np.nan, dtype="float32")
+    return vrt, [vrt, src]
+
+def _read_masked(src, window):
+    """ read band 1 of a window as float64 with nodata replaced by NaN """
+    arr = src.read(1, window=window, out_dtype="float64")
+    if src.nodata is not None and not np.isnan(src.nodata):
+        arr[arr == src.nodata] = np.nan
+    return arr
+
+#%% lake depth raster
+
+def calculate_lake_depth_raster(
+    f_name_bed:str,                 # ASP lakebed DEM (apparent lakebed elevation) GeoTiff
+    f_name_out:str,                 # output lake depth GeoTiff
+    lakes_gdf = None,               # GeoDataFrame with lake polygons. None = all pixels with a valid water surface
+    f_name_surface:str = None,      # water-surface DEM GeoTiff. None = SURFACE_COLUMN of lakes_gdf
+    SURFACE_COLUMN:str = "ele_median_m", # column of lakes_gdf with the water-surface elevation in meters
+    TEMP = 0.0,                     # water temperature in °C or GeoTiff file name with temperatures in °C
+    WAVELENGTH_NM:float = 532.0,    # wavelength in nm for the Parrish (2020) model
+    IOR_MODEL:str = "parrish_2020", # "parrish_2020" or "dietrich_parrish_2025" (532 nm)
+    WATER:int = 0,                  # 0 = freshwater, 1 = seawater (Parrish, 2020)
+    SALINITY:float = 0.1,           # salinity in PSU (Dietrich and Parrish, 2025)
+    BLOCKSIZE:int = 512,            # block size in pixels for processing and GeoTiff tiles
+    N_WORKERS:int = None,           # number of threads. None = number of CPUs
+    COMPRESS:str = "DEFLATE",       # GeoTiff compression
+    ) -> str:                       # output file name
+
+    """
+      calculate a refraction-corrected lake depth raster (float32, NaN = no data) on the grid of the
+      lakebed DEM block by block. Pixels where the lakebed is above the water surface are set to NaN.
+    """
+
+    import rasterio
+    import shapely
+    from   rasterio.windows import Window, bounds as window_bounds, transform as window_transform
+    from   rasterio.features import rasterize
+    from   concurrent.futures import ThreadPoolExecutor
+    from   calc_refractive_index_of_water import ior_parrish_2020, ior_dietrich_parrish_2025
+    from   processing_instrumentation import stage, file_size
+
+    if lakes_gdf is None and f_name_surface is None:
+        raise ValueError("\n\tERROR: either lake polygons or a water-surface DEM are needed. Abort.")
+    if IOR_MODEL not in IOR_MODELS:
+        raise ValueError(f"\n\tERROR: IOR_MODEL must be one of {', '.join(IOR_MODELS)}. Abort.")
+    if f_name_surface is None and SURFACE_COLUMN not in lakes_gdf.columns:
+        raise ValueError(f"\n\tERROR: lake polygons have no column {SURFACE_COLUMN}. Abort.")
+    temp_min, temp_max = TEMP_RANGE[IOR_MODEL]
+    if not isinstance(TEMP, str) and not (temp_min <= TEMP <= temp_max):
+        raise ValueError(f"\n\tERROR: TEMP must be between {temp_min:.0f}°C and {temp_max:.0f}°C for {IOR_MODEL}. Abort.")
+    if IOR_MODEL == "parrish_2020":
+        ior_parrish_2020(temp_min, WAVELENGTH_NM, WATER) # raises ValueError for invalid WAVELENGTH_NM or WATER
+
+    N_WORKERS = N_WORKERS or os.cpu_count() or 1
+
+    with rasterio.open(f_name_bed) as bed:
+        profile = bed.profile.copy()
+        width, height, transform, crs = bed.width, bed.height, bed.transform, bed.crs
+
+    # lake polygons in the CRS of the DEM with a spatial index for the block lookup
+    if lakes_gdf is not None:
+        lakes_gdf = lakes_gdf.to_crs(crs) if lakes_gdf.crs is not None and lakes_gdf.crs != crs else lakes_gdf
+        geoms = np.asarray(lakes_gdf.geometry.values)
+        surface_ele = np.asarray(lakes_gdf[SURFACE_COLUMN], dtype=np.float64) if f_name_surface is None else np.ones(len(geoms))
+        ok = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms)) & np.isfinite(surface_ele)
+        geoms, surface_ele = geoms[ok], surface_ele[ok]
+        tree = shapely.STRtree(geoms)
+
+    profile.update(driver="GTiff", dtype="float32", count=1, nodata=np.nan, tiled=True, blockxsize=BLOCKSIZE,
+                   blockysize=BLOCKSIZE, compress=COMPRESS, predictor=3, BIGTIFF="IF_SAFER", SPARSE_OK=True)
+
+    # rasterio datasets must not be shared between threads: each thread opens its own handles
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+    n_clipped = [0] # lake pixels with temperatures outside TEMP_RANGE
+
+    def get_handles():
+        if not hasattr(local, "bed"):
+            local.bed  = rasterio.open(f_name_bed)
+            local.surf = local.temp = None
+            opened = []
+            if f_name_surface is not None:
+                local.surf, to_close = _open_on_grid(f_name_surface, local.bed)
+                opened += to_close
+            if isinstance(TEMP, str):
+                local.temp, to_close = _open_on_grid(TEMP, local.bed)
+                opened += to_close
+            with handles_lock:
+                handles.extend(opened + [local.bed])
+        return local.bed, local.surf, local.temp
+
+    def process_block(window):
+        """ lake depth of one block or None if the block contains no lake pixels """
+        bed, surf, temp = get_handles()
+        w_transform = window_transform(window, transform)
+        shape = (int(window.height), int(window.width))
+
+        # water surface and lake mask
+        if lakes_gdf is not None:
+            idx = np.sort(tree.query(shapely.box(*window_bounds(window, transform)))) # keep the order of overlapping lakes
+            if idx.size == 0:
+                return None
+            lake_ele = rasterize(zip(geoms[idx], surface_ele[idx]), out_shape=shape, transform=w_transform,
+                                 fill=np.nan, dtype="float64")
+            if np.all(np.isnan(lake_ele)):
+                return None
+        surface = _read_masked(surf, window) if surf is not None else lake_ele
+        if lakes_gdf is not None and surf is not None:
+            surface[np.isnan(lake_ele)] = np.nan
+        if np.all(np.isnan(surface)):
+            return None
+
+        lake    = np.isfinite(surface)
+        lakebed = _read_masked(bed, window)
+        temp_c  = TEMP
+        if temp is not None:
+            temp_c  = _read_masked(temp, window)[lake]
+            outside = (temp_c < temp_min) | (temp_c > temp_max)
+            if np.any(outside):
+                with handles_lock:
+                    n_clipped[0] += int(np.count_nonzero(outside))
+                temp_c = np.clip(temp_c, temp_min, temp_max)
+
+        # index of refraction of the lake pixels and small-angle refraction correction
+        if IOR_MODEL == "parrish_2020":
+            ior = ior_parrish_2020(temp_c, WAVELENGTH_NM, WATER)
+        else:
+            ior = ior_dietrich_parrish_2025(temp_c, SALINITY)
+        depth = np.full(shape, np.nan, dtype=np.float32)
+        depth[lake] = ior * (surface[lake] - lakebed[lake])
+        depth[~(depth >= 0.0)] = np.nan # lakebed above water surface or no data
+        return depth
+
+    windows = [Window(col_off, row_off, min(BLOCKSIZE, width - col_off), min(BLOCKSIZE, height - row_off))
+               for row_off in range(0, height, BLOCKSIZE) for col_off in range(0, width, BLOCKSIZE)]
+
+    def process_and_write(dst, window):
+        depth = process_block(window)
+        if depth is not None:
+            with write_lock: # GDAL datasets are not thread-safe for writing
+                dst.write(depth, 1, window=window)
+        return depth is not None
+
+    write_lock = threading.Lock()
+    with stage("lake depth raster", f_name=f_name_out, n_items=width * height) as st:
+        try:
+            with rasterio.open(f_name_out, "w", **profile) as dst:
+                # blocks are submitted in chunks, so that the number of blocks in memory is bounded
+                n_written = 0
+                with ThreadPoolExecutor(max_workers=N_WORKERS) as pool:
+                    for i_s in range(0, len(windows), 4 * N_WORKERS):
+                        n_written += sum(pool.map(lambda window: process_and_write(dst, window), windows[i_s:i_s + 4 * N_WORKERS]))
+        except BaseException:
+            if os.path.exists(f_name_out):
+                os.remove(f_name_out) # no half-written output
+            raise
+        finally:
+            for h in handles:
+                h.close()
+        st.bytes_written = file_size(f_name_out)
+
+    if n_clipped[0]:
+        import warnings
+        warnings.warn(f"{n_clipped[0]:d} lake pixels with water temperatures outside {temp_min:.0f}°C to {temp_max:.0f}°C "
+                      f"({IOR_MODEL}) were clipped to this range.")
+    print(f"{os.path.basename(f_name_out):s}: {n_written:d} of {len(windows):d} blocks with lake pixels")
+
+    return f_name_out
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+    import tempfile
+    import geopandas as gpd
+
+    f_dir       = r".." + os.sep + "data" + os.sep + "example_files"
+    f_name_bed  = f_dir + os.sep + "asp_lakebed-DEM.tif"                          # ASP lakebed DEM from through-water SfM
+    f_name_lake = f_dir + os.sep + "IOCAM1B_2019_GR_NASA_20190506_lakes_surface.gpkg" # from fit_lake_water_surface.py
+    f_dir_out   = tempfile.mkdtemp(prefix="lake_depth_")
+
+    if os.path.isfile(f_name_bed) and os.path.isfile(f_name_lake):
+        lakes_gdf = gpd.read_file(f_name_lake)
+    else:
+        # example files are not part of the repository. use synthetic lakes and lakebed DEM
+        from benchmark_atm_sfm_tools import make_synthetic_lakes_gdf, make_synthetic_lakebed_dem
+        print(f"\t{os.path.basename(f_name_bed)} or {os.path.basename(f_name_lake)} not found. Using synthetic data in {f_dir_out}")
+        lakes_gdf = make_synthetic_lakes_gdf(200)
+        lakes_gdf["ele_median_m"] = 900.0
+        f_name_bed = make_synthetic_lakebed_dem(f_dir_out + os.sep + "lakebed_dem.tif", lakes_gdf.total_bounds, 2048)
+
+    tic = time.perf_counter()
+    f_name_out = calculate_lake_depth_raster(f_name_bed, f_dir_out + os.sep + "lake_depth.tif", lakes_gdf=lakes_gdf, TEMP=0.5)
+    toc = time.perf_counter()
+    print(f"\tTime to calculate lake depth raster {f_name_out}: {toc - tic:0.1f} seconds")
@@ -20,10 +20,12 @@ The code reads the following four fields from the ATM ilatm1b and ilnsa1b HDF5 f
 #%% import required modules
 
 import h5py
-import time
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+from   crs_transformer_registry import get_crs, CRS_GEO
+from   processing_instrumentation import stage, file_size
+from   processing_manifest import needs_processing, record_run
 
 #%% define function for reading and converting ATM NSIDC data products in HDF5 format
     
@@ -32,20 +34,30 @@ def convert_atm_H5_to_csv_and_gpkg(
     EXPORT_CSV:bool,  # if True = CSV output
     EXPORT_GIS:bool,  # if True = GPKG output
     ANGLE_WRAP:float, # wrap longitudes to ±180° or 0°-360°. ANGLE_WRAP variable must either be 180 or 360
+    FORCE:bool = False, # if True = convert even if the outputs are up to date (see processing_manifest.py)
     ):      
 
     """
       read ATM HDF5 L1B data file, convert it to data frame, and save data as CSV and/or,
-      GeoPackage (GPKG) file for plotting with GIS software.
+      GeoPackage (GPKG) file for plotting with GIS software. Files whose outputs are up to date
+      in the processing manifest are skipped.
     """
 
+    # skip conversion if input, parameters and outputs are unchanged since the last run
+    outputs = ([f_name_atm.replace(".h5",".csv")] if EXPORT_CSV else []) + ([f_name_atm.replace(".h5",".gpkg")] if EXPORT_GIS else [])
+    params  = {"EXPORT_CSV": bool(EXPORT_CSV), "EXPORT_GIS": bool(EXPORT_GIS), "ANGLE_WRAP": float(ANGLE_WRAP)}
+    if not needs_processing("ATM CSV/GPKG", f_name_atm, params, outputs, FORCE):
+        return
+
     try:
-      data_hdf_atm = h5py.File(f_name_atm, 'r')
-      # read necessary data fields
-      lon = data_hdf_atm['/longitude'][:]
-      lat = data_hdf_atm['/latitude'][:]
-      ele = data_hdf_atm['/elevation'][:]
-      sig = data_hdf_atm['/instrument_parameters/rcv_sigstr'][:]
+      with stage("ATM read HDF5", f_name=f_name_atm, bytes_read=file_size(f_name_atm)) as st:
+        data_hdf_atm = h5py.File(f_name_atm, 'r')
+        # read necessary data fields
+        lon = data_hdf_atm['/longitude'][:]
+        lat = data_hdf_atm['/latitude'][:]
+        ele = data_hdf_atm['/elevation'][:]
+        sig = data_hdf_atm['/instrument_parameters/rcv_sigstr'][:]
+        st.n_items = len(lon)
       
       f_name_csv = f_name_atm.replace(".h5",".csv")
       f_name_gis = f_name_atm.replace(".h5",".gpkg")
@@ -70,10 +82,10 @@ def convert_atm_H5_to_csv_and_gpkg(
             import os
             os.sys.exit("Parameter ANGLE_WRAP must must either be 180 or 360. Abort.")
             
-        tic = time.perf_counter()    
-        np.savetxt(f_name_csv, X = atm_data, header = header_str, comments='', delimiter=",", fmt = ['%14.9f', '%14.9f' , '%10.4f', '%6.0f'])
-        toc = time.perf_counter()
-        print(f"\tTime to save ASCII (CSV) file: {toc - tic:0.1f} seconds")
+        with stage("ATM save CSV", f_name=f_name_csv, n_items=len(atm_data)) as st:
+            np.savetxt(f_name_csv, X = atm_data, header = header_str, comments='', delimiter=",", fmt = ['%14.9f', '%14.9f' , '%10.4f', '%6.0f'])
+            st.bytes_written = file_size(f_name_csv)
+        print(f"\tTime to save ASCII (CSV) file: {st.wall_s:0.1f} seconds")
         
     # save GeoPackage (GPKG) file with geographic coordinates if desired   
     if EXPORT_GIS:
@@ -81,22 +93,114 @@ def convert_atm_H5_to_csv_and_gpkg(
         # wrap longitudes to ±180° for GeoPackage (GPKG) export with geographic coordinates. 0°-360° is not supported.
         atm_df['lon_deg'] = np.mod(atm_df['lon_deg'] - 180.0, 360.0) - 180.0 
         
-        # populate GeoDataFrame
-        atm_gdf = gpd.GeoDataFrame(atm_df, geometry=gpd.points_from_xy(atm_df['lon_deg'], atm_df['lat_deg']))
+        # populate GeoDataFrame and set up the WGS-84 geographic coordinate system using the cached CRS object
+        # need to wrap longitudes to ±180° for geopgraphic coordinates. 0°-360° is not supported.
+        atm_gdf = gpd.GeoDataFrame(atm_df, geometry=gpd.points_from_xy(atm_df['lon_deg'], atm_df['lat_deg']), crs=get_crs(CRS_GEO))
     
         # remove redundant latitude and longitude columns since coordinates are stored in geometry -> smaller files = faster load in QGIS
         atm_gdf = atm_gdf.drop(columns=['lon_deg'])
         atm_gdf = atm_gdf.drop(columns=['lat_deg'])
         
-        # set up the WGS-84 geographic coordinate system
-        atm_gdf = atm_gdf.set_crs("EPSG:4326") # need to wrap longitudes to ±180° for geopgraphic coordinates. 0°-360° is not supported.
-        
         # save GeoPackage (GPKG) file    
-        tic = time.perf_counter()
-        atm_gdf.to_file(f_name_gis, driver="GPKG")
-        toc = time.perf_counter()
-        print(f"\tTime to save GeoPackage (GPKG) file: {toc - tic:0.1f} seconds")
+        with stage("ATM save GPKG", f_name=f_name_gis, n_items=len(atm_gdf)) as st:
+            atm_gdf.to_file(f_name_gis, driver="GPKG")
+            st.bytes_written = file_size(f_name_gis)
+        print(f"\tTime to save GeoPackage (GPKG) file: {st.wall_s:0.1f} seconds")
+
+    record_run("ATM CSV/GPKG", f_name_atm, params, outputs)
     
+#%% define function for converting ATM NSIDC data products in HDF5 format to LAS/LAZ point clouds
+
+def convert_atm_H5_to_las(
+    f_name_atm:str,           # path to ATM point cloud lidar file in HDF5 format
+    EPSG_OUT:int = 3413,      # output coordinate system: 3413 (polar stereographic, meters) or 4326 (geographic, degrees)
+    COMPRESS:bool = False,    # if True = LAZ output (requires lazrs or laszip backend for laspy), otherwise LAS
+    CHUNK_SIZE:int = 2000000, # number of laser shots read from HDF5 and written per chunk
+    FORCE:bool = False,       # if True = convert even if the output is up to date (see processing_manifest.py)
+    ) -> str:                 # output file name
+
+    """
+      read ATM HDF5 L1B data file in chunks and save the point cloud as LAS 1.4 (point format 6) or
+      LAZ file for streaming display and processing with PDAL, CloudCompare and QGIS.
+      Coordinates are stored as scaled 32-bit integers (1 mm in EPSG:3413 or 1e-7 degrees
+      in geographic coordinates) and the received signal strength rcv_sigstr is stored as intensity.
+      Memory use is limited to one chunk independent of the granule size.
+
+      Note: Cloud-Optimized Point Cloud (COPC) files can be created from the LAS/LAZ output with
+      PDAL (writers.copc) or untwine.
+    """
+
+    try:
+        import laspy
+    except ImportError:
+        raise ImportError("To write LAS/LAZ files install laspy (and lazrs for LAZ): https://laspy.readthedocs.io")
+
+    from crs_transformer_registry import get_crs, geo_to_epsg3413
+
+    if EPSG_OUT == 3413:
+        scale = [0.001, 0.001, 0.001]  # 1 mm
+    elif EPSG_OUT == 4326:
+        scale = [1.0e-7, 1.0e-7, 0.001] # ~1 cm horizontal
+    else:
+        import os
+        os.sys.exit("Parameter EPSG_OUT must either be 3413 or 4326. Abort.")
+
+    f_name_las = f_name_atm.replace(".h5", ".laz" if COMPRESS else ".las")
+
+    # skip conversion if input, parameters and output are unchanged since the last run
+    params = {"EPSG_OUT": int(EPSG_OUT), "COMPRESS": bool(COMPRESS)}
+    if not needs_processing("ATM LAS", f_name_atm, params, [f_name_las], FORCE):
+        return f_name_las
+
+    try:
+      data_hdf_atm = h5py.File(f_name_atm, 'r')
+    except:
+      print(f'Unable to read {f_name_atm}. Check path and input file name.')
+      raise
+
+    with data_hdf_atm:
+        d_lon = data_hdf_atm['/longitude']
+        d_lat = data_hdf_atm['/latitude']
+        d_ele = data_hdf_atm['/elevation']
+        d_sig = data_hdf_atm['/instrument_parameters/rcv_sigstr']
+        n_shots = d_lon.shape[0]
+
+        def read_chunk(i_s, i_e):
+            lon = np.mod(d_lon[i_s:i_e] - 180.0, 360.0) - 180.0 # wrap longitudes to ±180°
+            lat = d_lat[i_s:i_e]
+            if EPSG_OUT == 3413:
+                x, y = geo_to_epsg3413(lon, lat)
+            else:
+                x, y = lon, lat
+            return np.asarray(x), np.asarray(y), d_ele[i_s:i_e], d_sig[i_s:i_e]
+
+        # set up header. offsets are taken from the first chunk, so that the scaled integers stay within int32
+        header = laspy.LasHeader(point_format=6, version="1.4")
+        header.scales = np.array(scale)
+        x, y, z, sig = read_chunk(0, min(CHUNK_SIZE, n_shots))
+        if n_shots > 0:
+            header.offsets = np.array([np.floor(np.min(x)), np.floor(np.min(y)), np.floor(np.min(z))])
+        header.add_crs(get_crs(EPSG_OUT))
+
+        with stage("ATM save LAS", f_name=f_name_las, bytes_read=file_size(f_name_atm), n_items=n_shots) as st:
+            with laspy.open(f_name_las, mode="w", header=header) as writer:
+                for i_s in range(0, n_shots, CHUNK_SIZE):
+                    i_e = min(i_s + CHUNK_SIZE, n_shots)
+                    if i_s > 0:
+                        x, y, z, sig = read_chunk(i_s, i_e)
+                    points = laspy.ScaleAwarePointRecord.zeros(i_e - i_s, header=header)
+                    points.x = x
+                    points.y = y
+                    points.z = z
+                    points.intensity = np.clip(np.rint(sig), 0, 65535).astype(np.uint16)
+                    writer.write_points(points)
+            st.bytes_written = file_size(f_name_las)
+        print(f"\tTime to save {'LAZ' if COMPRESS else 'LAS'} file: {st.wall_s:0.1f} seconds")
+
+    record_run("ATM LAS", f_name_atm, params, [f_name_las])
+
+    return f_name_las
+
 #%% run module/function as script 
 
 if __name__ == '__main__':
@@ -107,7 +211,10 @@ if __name__ == '__main__':
     # set processing options
     EXPORT_CSV = True
     EXPORT_GIS = True
+    EXPORT_LAS = True
     ANGLE_WRAP = 180.0 # wrap longitudes to ±180° or 0°-360°. ANGLE_WRAP variable must either be 180 or 360
 
     # execute function    
     convert_atm_H5_to_csv_and_gpkg(f_name_atm,EXPORT_CSV,EXPORT_GIS,ANGLE_WRAP)
+    if EXPORT_LAS:
+        convert_atm_H5_to_las(f_name_atm, EPSG_OUT=3413, COMPRESS=False)
@@ -20,11 +20,13 @@ Note:   An example data file is included in this repository in the folder
 
 """
 
-import time
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from   asp_airborne_utilities import kt19_to_datetime
+from   asp_airborne_utilities import kt19_to_datetime64, clean_kt19_column_names
+from   crs_transformer_registry import get_crs, CRS_GEO
+from   processing_instrumentation import stage, file_size
+from   processing_manifest import needs_processing, record_run
 
 #%% function to import KT19 ASCII file from NSIDC, convert to GeoDataFrame 
 #   and export as GeoPackage (GPKG) file if desired
@@ -32,51 +34,52 @@ from   asp_airborne_utilities import kt19_to_datetime
 def kt19_to_gdf(
     f_name_kt19_inp:str,    # path to KT19 ASCII text file from NSIDC
     EXPORT_GIS:bool,        # GeoPackage (GPKG) file if True
+    FORCE:bool = False,     # if True = convert even if the GPKG file is up to date (see processing_manifest.py)
     ):      
 
     """
       read KT19 ASCII data file, convert it to GeoDataFrame, and save data as 
-      GeoPackage (GPKG) file if desired.
+      GeoPackage (GPKG) file if desired. If the GPKG file is up to date in the processing
+      manifest (or in dry-run mode), only writing the GPKG file is skipped. The GeoDataFrame is
+      always returned from the text file, because GPKG does not store fractional seconds.
     """
 
+    f_name_kt19_out = f_name_kt19_inp.replace(".txt",".gpkg")
+    if EXPORT_GIS:
+        EXPORT_GIS = needs_processing("KT19 GPKG", f_name_kt19_inp, None, [f_name_kt19_out], FORCE)
+
     try:
-        kt19_df = pd.read_csv(f_name_kt19_inp, skiprows = 10)
+        with stage("KT19 read text file", f_name=f_name_kt19_inp, bytes_read=file_size(f_name_kt19_inp)) as st:
+            kt19_df = pd.read_csv(f_name_kt19_inp, skiprows = 10)
+            st.n_items = len(kt19_df)
     except:
         print(f'Unable to read {f_name_kt19_inp}. Check path and input file name.')
           
     # clean up column names
-    for i in range(len(kt19_df.columns)):
-        kt19_df.rename(columns={kt19_df.columns[i]: kt19_df.columns[i].replace("(", "_").replace(")", "").replace("#","").replace(" ", "").lower()},inplace=True)
-    
-    # create empty datetime object for memory allocation for faster loop execution
-    utc_time = np.empty(len(kt19_df), dtype='datetime64[ns]')
-    
-    for k in range(len(kt19_df)):
-        utc_time[k] = kt19_to_datetime(kt19_df["year"][k], kt19_df["day_of_year"][k], kt19_df["seconds_of_day_utc"][k], 0)
+    kt19_df.columns = clean_kt19_column_names(kt19_df.columns)
     
-    kt19_df["utc_time"] = utc_time
+    # convert time tags of all samples at once
+    with stage("KT19 convert time tags", n_items=len(kt19_df)):
+        kt19_df["utc_time"] = kt19_to_datetime64(kt19_df["year"], kt19_df["day_of_year"], kt19_df["seconds_of_day_utc"], 0)
     
     # need to wrap longitudes to ±180° for exporting geographic coordinates 
     # 0° to 360° is not supported for GeoPackage (GPKG) format
     kt19_df["longitude_deg"] = np.mod(kt19_df["longitude_deg"] - 180.0, 360.0) - 180.0
     
-    # populate lat lon geometry in GeoDataFrame
-    kt19_gdf = gpd.GeoDataFrame(kt19_df, geometry=gpd.points_from_xy(kt19_df["longitude_deg"], kt19_df["latitude_deg"]))
+    # populate lat lon geometry in GeoDataFrame and set the coordinate system using the cached CRS object
+    # EPSG:4326 WGS84 - World Geodetic System 1984, used in DGPS solutions for ATM geolocation
+    kt19_gdf = gpd.GeoDataFrame(kt19_df, geometry=gpd.points_from_xy(kt19_df["longitude_deg"], kt19_df["latitude_deg"]), crs=get_crs(CRS_GEO))
     
     # remove redundant lon lat columns for smaller file size and faster loading in QGIS
     kt19_gdf.drop(columns=["longitude_deg","latitude_deg"],inplace=True)
     
-    # set the coordinate system
-    # EPSG:4326 WGS84 - World Geodetic System 1984, used in DGPS solutions for ATM geolocation
-    kt19_gdf = kt19_gdf.set_crs("EPSG:4326")
-    
     # if desired export file as GeoPackage - note: fractional seconds are not exported in utc_time field
     if EXPORT_GIS:
-        f_name_kt19_out = f_name_kt19_inp.replace(".txt",".gpkg")
-        tic = time.perf_counter()
-        kt19_gdf.to_file(f_name_kt19_out, driver="GPKG")
-        toc = time.perf_counter()
-        print(f"Time to save GeoPackage GPKG file: {toc - tic:0.1f} seconds")       
+        with stage("KT19 save GPKG", f_name=f_name_kt19_out, n_items=len(kt19_gdf)) as st:
+            kt19_gdf.to_file(f_name_kt19_out, driver="GPKG")
+            st.bytes_written = file_size(f_name_kt19_out)
+        print(f"Time to save GeoPackage GPKG file: {st.wall_s:0.1f} seconds")       
+        record_run("KT19 GPKG", f_name_kt19_inp, None, [f_name_kt19_out])
 
     return kt19_gdf
 
@@ -84,7 +87,8 @@ def kt19_to_gdf(
 
 if __name__ == '__main__':
     
-    f_name_kt19_inp = r"..\data\example_files\IAKST1B_KT19_PROCESSED_20190506_102239.txt"
+    import os
+    f_name_kt19_inp = r".." + os.sep + "data" + os.sep + "example_files" + os.sep + "IAKST1B_KT19_PROCESSED_20190506_102239.txt"
     
     # set processing options
     EXPORT_GIS = True
@@ -7,6 +7,9 @@ Created on Fri Mar 15, 2024
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+from   crs_transformer_registry import get_crs, CRS_GEO
+from   processing_instrumentation import stage, file_size
+from   processing_manifest import needs_processing, record_run
 
 #%% CSV format of ASP residual output files:
 
@@ -20,15 +23,24 @@ import geopandas as gpd
 
 def convert_asp_res_to_gpkg(
     f_name_res:str,   # ASP residual data file in CSV format
+    FORCE:bool = False, # if True = convert even if the output is up to date (see processing_manifest.py)
     ):      
 
     """
       read ASP residual output file in CSV format into data frame,
       and save as GeoPackage (GPKG) file for plotting with GIS software.
+      Files whose output is up to date in the processing manifest are skipped.
     """
 
+    # skip conversion if input and output are unchanged since the last run
+    f_name_out = f_name_res.replace(".csv", ".gpkg")
+    if not needs_processing("ASP residuals GPKG", f_name_res, None, [f_name_out], FORCE):
+        return
+
     try:
-      res_df = pd.read_csv(f_name_res, sep=',', header=0, skiprows=[1])
+      with stage("ASP residuals read CSV", f_name=f_name_res, bytes_read=file_size(f_name_res)) as st:
+        res_df = pd.read_csv(f_name_res, sep=',', header=0, skiprows=[1])
+        st.n_items = len(res_df)
       # clean up column names
       res_df.columns = res_df.columns.str.replace('#', '')
       res_df.columns = res_df.columns.str.replace(' ', '')
@@ -38,18 +50,20 @@ def convert_asp_res_to_gpkg(
     # wrap longitudes to ±180 degrees for GeoPackage (GPKG) export with geographic coordinates
     res_df['lon'] = np.mod(res_df['lon'] - 180.0, 360.0) - 180.0 
     
-    # populate GeoDataFrame
-    res_gdf = gpd.GeoDataFrame(res_df, geometry=gpd.points_from_xy(res_df['lon'], res_df['lat']))
+    # populate GeoDataFrame and set up the WGS-84 geographic coordinate system using the cached CRS object
+    # need to wrap longitudes to ±180 degrees for geopgraphic coordinates
+    res_gdf = gpd.GeoDataFrame(res_df, geometry=gpd.points_from_xy(res_df['lon'], res_df['lat']), crs=get_crs(CRS_GEO))
     
     # remove latitude and longitude colums since they are stored in geometry -> smaller files = faster load in QGIS
     res_gdf = res_gdf.drop(columns=['lon'])
     res_gdf = res_gdf.drop(columns=['lat'])
     
-    # set up the WGS-84 geographic coordinate system
-    res_gdf = res_gdf.set_crs("EPSG:4326") # need to wrap longitudes to ±180 degrees for geopgraphic coordinates
-    
     # save GeoPackage (GPKG) file
-    res_gdf.to_file(f_name_out, driver="GPKG")
+    with stage("ASP residuals save GPKG", f_name=f_name_out, n_items=len(res_gdf)) as st:
+        res_gdf.to_file(f_name_out, driver="GPKG")
+        st.bytes_written = file_size(f_name_out)
+
+    record_run("ASP residuals GPKG", f_name_res, None, [f_name_out])
 
 
 #%% run module/function as script 
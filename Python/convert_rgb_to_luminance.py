@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: convert CAMBOTv2 L0 natural-color (RGB) JPEG images to single-channel grayscale (luminance)
+         images for use with the Ames Stereo Pipeline (ASP):
+
+             https://nsidc.org/data/iocam0/versions/1
+
+         Luminance is calculated as weighted sum of the red, green and blue channels:
+
+             rec601: Y = 0.299 R + 0.587 G + 0.114 B      (ITU-R BT.601)
+             rec709: Y = 0.2126 R + 0.7152 G + 0.0722 B   (ITU-R BT.709)
+
+         The output images have the same file names as the input images and are written to a separate
+         directory as JPEG (default) or LZW-compressed GeoTiff. Frames are processed in a prefetching
+         pipeline (see prefetch_pipeline.py), so that reading, decoding, luminance calculation and
+         encoding of different frames overlap. Frames whose output is up to date in the processing
+         manifest are skipped.
+
+usage in code:
+    from convert_rgb_to_luminance import convert_rgb_to_luminance
+    f_names_lum = convert_rgb_to_luminance(f_names_rgb, f_dir_lum)
+"""
+
+import os
+import numpy as np
+
+LUMINANCE_WEIGHTS = {"rec601": (0.299, 0.587, 0.114), "rec709": (0.2126, 0.7152, 0.0722)}
+
+#%% read, compute and write steps for a single frame
+
+def read_rgb_image(f_name_inp:str):
+    """ read a RGB image (3, rows, columns) as uint8 numpy array """
+    import warnings
+    import rasterio
+    from   rasterio.errors import NotGeoreferencedWarning
+    from   processing_instrumentation import stage, file_size
+
+    with stage("luminance read RGB image", f_name=f_name_inp, bytes_read=file_size(f_name_inp)) as st:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", NotGeoreferencedWarning) # CAMBOT L0 JPEGs are not georeferenced
+            with rasterio.open(f_name_inp) as src:
+                if src.count < 3:
+                    raise ValueError(f"\n\tERROR: {f_name_inp} is not a RGB image. Abort.")
+                rgb = src.read((1, 2, 3))
+        st.n_items = rgb[0].size
+    return rgb
+
+def compute_luminance(rgb, WEIGHTS:str = "rec601"):
+    """ luminance (rows, columns) as uint8 from a RGB image (3, rows, columns) """
+    from processing_instrumentation import stage
+
+    w_r, w_g, w_b = LUMINANCE_WEIGHTS[WEIGHTS]
+    with stage("luminance compute", n_items=rgb[0].size):
+        lum = rgb[0] * np.float32(w_r)
+        lum += rgb[1] * np.float32(w_g)
+        lum += rgb[2] * np.float32(w_b)
+        lum = np.clip(np.rint(lum), 0, 255).astype(np.uint8)
+    return lum
+
+def write_luminance(lum, f_name_out:str, DRIVER:str = "JPEG", QUALITY:int = 95):
+    """ save a luminance image as JPEG or LZW-compressed GeoTiff """
+    import warnings
+    import rasterio
+    from   rasterio.errors import NotGeoreferencedWarning
+    from   processing_instrumentation import stage, file_size
+
+    options = {"QUALITY": QUALITY} if DRIVER == "JPEG" else {"compress": "LZW"}
+    with stage("luminance write image", f_name=f_name_out, n_items=lum.size) as st:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", NotGeoreferencedWarning)
+            with rasterio.open(f_name_out, "w", driver=DRIVER, width=lum.shape[1], height=lum.shape[0], count=1,
+                               dtype="uint8", **options) as dst:
+                dst.write(lum, 1)
+        st.bytes_written = file_size(f_name_out)
+
+#%% convert RGB images to luminance images
+
+def convert_rgb_to_luminance(
+    f_names_inp:list,           # CAMBOTv2 L0 RGB JPEG images
+    f_dir_out:str,              # output directory for luminance images. must differ from the input directories
+    WEIGHTS:str = "rec601",     # "rec601" or "rec709"
+    DRIVER:str = "JPEG",        # "JPEG" or "GTiff" (LZW compression)
+    FORCE:bool = False,         # if True = convert even if the output is up to date (see processing_manifest.py)
+    N_READERS:int = 2,          # number of reader threads
+    N_COMPUTE:int = 1,          # number of compute threads
+    N_WRITERS:int = 2,          # number of writer (encoder) threads
+    QUEUE_DEPTH:int = 4,        # maximum number of frames waiting between two pipeline stages
+    ) -> list:                  # output file names
+
+    """
+      convert RGB images to single-channel luminance images with the same file names in f_dir_out.
+      GeoTiff output gets the extension .tif.
+    """
+
+    from prefetch_pipeline import run_pipeline
+    from processing_manifest import needs_processing, record_run
+
+    if WEIGHTS not in LUMINANCE_WEIGHTS:
+        raise ValueError(f"\n\tERROR: WEIGHTS must be one of {', '.join(LUMINANCE_WEIGHTS)}. Abort.")
+    if DRIVER not in ("JPEG", "GTiff"):
+        raise ValueError("\n\tERROR: DRIVER must either be JPEG or GTiff. Abort.")
+
+    os.makedirs(f_dir_out, exist_ok=True)
+    f_names = []
+    for f_name_inp in f_names_inp:
+        if os.path.samefile(os.path.dirname(os.path.abspath(f_name_inp)), f_dir_out):
+            raise ValueError(f"\n\tERROR: output directory {f_dir_out} must differ from the input directory. Abort.")
+        f_name_out = os.path.join(f_dir_out, os.path.basename(f_name_inp))
+        if DRIVER == "GTiff":
+            f_name_out = os.path.splitext(f_name_out)[0] + ".tif"
+        f_names.append((f_name_inp, f_name_out))
+
+    params = {"WEIGHTS": WEIGHTS, "DRIVER": DRIVER}
+
+    def read_frame(f_names_frame):
+        if not needs_processing("luminance image", f_names_frame[0], params, [f_names_frame[1]], FORCE):
+            return None
+        return read_rgb_image(f_names_frame[0])
+
+    def compute_frame(f_names_frame, rgb):
+        return compute_luminance(rgb, WEIGHTS)
+
+    def write_frame(f_names_frame, lum):
+        write_luminance(lum, f_names_frame[1], DRIVER)
+        record_run("luminance image", f_names_frame[0], params, [f_names_frame[1]])
+
+    run_pipeline(f_names, read_frame, compute_frame, write_frame, N_READERS, N_COMPUTE, N_WRITERS, QUEUE_DEPTH, NAME="luminance pipeline")
+
+    return [f_name_out for _, f_name_out in f_names]
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import glob
+    import time
+    import tempfile
+
+    f_dir_rgb = r".." + os.sep + "data" + os.sep + "imagery"
+    f_dir_lum = tempfile.mkdtemp(prefix="lum_") # data/imagery/lum contains the reference images of the tutorial
+    f_names_rgb = sorted(glob.glob(f_dir_rgb + os.sep + "IOCAM0_*.jpg"))
+
+    tic = time.perf_counter()
+    f_names_lum = convert_rgb_to_luminance(f_names_rgb, f_dir_lum)
+    toc = time.perf_counter()
+    print(f"\tTime to convert {len(f_names_lum):d} RGB images to luminance: {toc - tic:0.1f} seconds")
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: shared, cached registry of pyproj Transformer and CRS objects used by all
+         utilities in this repository, together with batched (vectorized) helper functions
+         for the coordinate conversions that are used most frequently:
+
+             geographic (WGS-84 lon, lat, ellipsoid height) <-> geocentric ECEF (WGS-84)
+             geographic (WGS-84 lon, lat)                   <-> NSIDC Sea Ice Polar Stereographic North (EPSG:3413)
+             geocentric ECEF (WGS-84)                       <-> NSIDC Sea Ice Polar Stereographic North (EPSG:3413)
+
+Note:    building a pyproj Transformer takes milliseconds to tens of milliseconds, which adds up
+         quickly when transformers are created inside per-frame loops or when worker processes
+         are started. Transformers are memoized by (src, dst, always_xy) with LRU eviction.
+         The cache is private to each process and is cleared automatically in worker processes
+         that were forked from a parent process (e.g., multiprocessing pools on Linux), so
+         PROJ objects are never shared across process boundaries.
+
+usage in code:
+    from crs_transformer_registry import get_transformer, geo_to_ecef, geo_to_epsg3413
+    x_ecef, y_ecef, z_ecef = geo_to_ecef(lon_deg, lat_deg, ele_m)
+    x_3413, y_3413 = geo_to_epsg3413(lon_deg, lat_deg)
+"""
+
+import os
+from functools import lru_cache
+
+# coordinate reference systems used throughout this repository
+CRS_GEO     = "EPSG:4326" # WGS-84 geographic 2D (lon, lat) used for GeoPackage (GPKG) exports
+CRS_GEO_3D  = "EPSG:4979" # WGS-84 geographic 3D (lon, lat, ellipsoid height) used in ATM and CAMBOT navigation data
+CRS_ECEF    = "EPSG:4978" # WGS-84 geocentric Earth-centered, Earth-fixed (ECEF) used by ASP camera models
+CRS_PS_NORTH = "EPSG:3413" # NSIDC Sea Ice Polar Stereographic North used for CAMBOT L1B GeoTIFFs
+
+# maximum number of transformers/CRS objects kept per process before the least recently used are evicted
+MAX_CACHE_SIZE = 64
+
+# process id that owns the current cache content. used to detect forked worker processes
+_cache_pid = os.getpid()
+
+#%% cached constructors
+
+@lru_cache(maxsize=MAX_CACHE_SIZE)
+def _cached_transformer(src, dst, always_xy):
+    from pyproj import Transformer
+    return Transformer.from_crs(src, dst, always_xy=always_xy)
+
+@lru_cache(maxsize=MAX_CACHE_SIZE)
+def _cached_crs(crs):
+    from pyproj import CRS
+    return CRS.from_user_input(crs)
+
+def _check_process():
+    """
+    clear the cache if we are running in a process that was forked from the process that
+    populated it. PROJ contexts must not be shared across process boundaries.
+    """
+    global _cache_pid
+    pid = os.getpid()
+    if pid != _cache_pid:
+        clear_cache()
+        _cache_pid = pid
+
+def _normalize_crs_key(crs):
+    """ make CRS input hashable and consistent, e.g., 3413, "epsg:3413" and "EPSG:3413" map to the same key """
+    if isinstance(crs, int):
+        return f"EPSG:{crs:d}"
+    if isinstance(crs, str):
+        crs = crs.strip()
+        if crs.lower().startswith("epsg:"):
+            return crs.upper()
+        return crs
+    # pyproj CRS objects are hashable and can be used directly
+    return crs
+
+def get_transformer(src, dst, always_xy:bool=True):
+    """
+    Summary: return a cached pyproj Transformer from src to dst. The transformer is only built once
+             per process and reused on subsequent calls with the same arguments.
+    Usage  : transformer = get_transformer("EPSG:4326", "EPSG:3413")
+
+    INPUT:
+    src : str, int or pyproj.CRS
+        source coordinate reference system, e.g., "EPSG:4326" or 4326
+    dst : str, int or pyproj.CRS
+        destination coordinate reference system, e.g., "EPSG:3413" or 3413
+    always_xy : bool
+        if True (default) coordinates are always in longitude, latitude (x, y) order
+
+    OUTPUT:
+    transformer: pyproj.Transformer
+    """
+    _check_process()
+    return _cached_transformer(_normalize_crs_key(src), _normalize_crs_key(dst), bool(always_xy))
+
+def get_crs(crs):
+    """
+    Summary: return a cached pyproj CRS object, e.g., for GeoDataFrame(..., crs=get_crs("EPSG:4326")),
+             which avoids parsing the CRS definition for every new GeoDataFrame.
+    Usage  : crs_geo = get_crs(CRS_GEO)
+    """
+    _check_process()
+    return _cached_crs(_normalize_crs_key(crs))
+
+def clear_cache():
+    """ remove all cached transformers and CRS objects of the current process """
+    _cached_transformer.cache_clear()
+    _cached_crs.cache_clear()
+
+def cache_info():
+    """ return the lru_cache statistics (hits, misses, maxsize, currsize) for transformers and CRS objects """
+    return _cached_transformer.cache_info(), _cached_crs.cache_info()
+
+#%% batched conversions between geographic, geocentric (ECEF) and polar stereographic (EPSG:3413) coordinates
+
+def geo_to_ecef(lon_deg, lat_deg, ele_m):
+    """
+    convert arrays of WGS-84 geodetic longitude, latitude (degrees) and ellipsoid heights (meters)
+    to geocentric Earth-centered, Earth-fixed (ECEF) x, y, z coordinates in meters.
+    NOTE: calculations must be done with float64 to get the required accuracy.
+    """
+    return get_transformer(CRS_GEO_3D, CRS_ECEF).transform(lon_deg, lat_deg, ele_m)
+
+def ecef_to_geo(x_ecef, y_ecef, z_ecef):
+    """
+    convert arrays of geocentric ECEF x, y, z coordinates in meters to
+    WGS-84 geodetic longitude, latitude (degrees) and ellipsoid heights (meters).
+    """
+    return get_transformer(CRS_ECEF, CRS_GEO_3D).transform(x_ecef, y_ecef, z_ecef)
+
+def geo_to_epsg3413(lon_deg, lat_deg):
+    """ convert arrays of WGS-84 longitude and latitude in degrees to EPSG:3413 x, y in meters """
+    return get_transformer(CRS_GEO, CRS_PS_NORTH).transform(lon_deg, lat_deg)
+
+def epsg3413_to_geo(x_3413, y_3413):
+    """ convert arrays of EPSG:3413 x, y in meters to WGS-84 longitude and latitude in degrees """
+    return get_transformer(CRS_PS_NORTH, CRS_GEO).transform(x_3413, y_3413)
+
+def ecef_to_epsg3413(x_ecef, y_ecef, z_ecef):
+    """
+    convert arrays of geocentric ECEF x, y, z coordinates in meters to EPSG:3413 x, y in meters
+    and ellipsoid heights in meters.
+    """
+    lon_deg, lat_deg, ele_m = ecef_to_geo(x_ecef, y_ecef, z_ecef)
+    x_3413, y_3413 = geo_to_epsg3413(lon_deg, lat_deg)
+    return x_3413, y_3413, ele_m
+
+def epsg3413_to_ecef(x_3413, y_3413, ele_m):
+    """ convert arrays of EPSG:3413 x, y and ellipsoid heights in meters to geocentric ECEF x, y, z in meters """
+    lon_deg, lat_deg = epsg3413_to_geo(x_3413, y_3413)
+    return geo_to_ecef(lon_deg, lat_deg, ele_m)
+
+def geo_to_projected(lon_deg, lat_deg, crs):
+    """
+    convert arrays of WGS-84 longitude and latitude in degrees to x, y of a projected coordinate system,
+    e.g., the CRS of a GeoDataFrame. EPSG:3413 is converted with geo_to_epsg3413().
+    """
+    if get_crs(crs) == get_crs(CRS_PS_NORTH):
+        return geo_to_epsg3413(lon_deg, lat_deg)
+    return get_transformer(CRS_GEO, crs).transform(lon_deg, lat_deg)
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+    import numpy as np
+
+    # CAMBOT frame location from the sun angle notebook
+    lon = np.array([-55.074352])
+    lat = np.array([ 74.315668])
+    ele = np.array([ 965.1029 ])
+
+    tic = time.perf_counter()
+    x_ecef, y_ecef, z_ecef = geo_to_ecef(lon, lat, ele)
+    toc = time.perf_counter()
+    print(f"\tFirst call (builds transformer) : {(toc - tic)*1000:8.3f} ms")
+
+    tic = time.perf_counter()
+    x_ecef, y_ecef, z_ecef = geo_to_ecef(lon, lat, ele)
+    toc = time.perf_counter()
+    print(f"\tSecond call (cached transformer): {(toc - tic)*1000:8.3f} ms")
+
+    x_3413, y_3413, ele_3413 = ecef_to_epsg3413(x_ecef, y_ecef, z_ecef)
+    print(f"\tECEF     : {x_ecef[0]:14.4f} {y_ecef[0]:14.4f} {z_ecef[0]:14.4f}")
+    print(f"\tEPSG:3413: {x_3413[0]:14.4f} {y_3413[0]:14.4f} {ele_3413[0]:10.4f}")
+    print(f"\t{cache_info()[0]}")
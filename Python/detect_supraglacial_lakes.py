@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: batch detection of supraglacial lakes in NDWI_ice GeoTiffs created with calculate_L1B_NDWI_geotiffs.py
+         using Otsu multi-thresholding and Connected Component Analysis (CCA), following the tutorial:
+
+             https://github.com/mstudinger/ATM-SfM-Bathymetry/blob/main/Jupyter/CAMBOTv2_lake_detection_using_NDWI_and_Otsu_thresholding.ipynb
+
+         For each frame:
+             1. the multi-Otsu thresholds are calculated from a fixed-range histogram of the valid NDWI_ice
+                values. All candidate thresholds are evaluated with cumulative sums of the histogram
+                (dynamic programming over classes) instead of the pixel values.
+             2. pixels in the class with the highest NDWI_ice are labeled as connected components.
+             3. per-lake statistics (area, mean and max NDWI_ice, centroid, frame edge contact) are
+                calculated for all components at once from the water pixels with numpy.bincount.
+             4. lakes larger than MIN_AREA_M2 are converted to polygons.
+
+         Frames are processed in parallel in a process pool and lakes are collected into one
+         GeoDataFrame and one GeoPackage (GPKG) file per flight:
+
+             IOCAM1B_2019_GR_NASA_20190506_lakes.gpkg
+
+         Otsu, N.: A Threshold Selection Method from Gray-Level Histograms, IEEE Trans. Syst., Man, Cybern.,
+         9, 62–66, https://doi.org/10.1109/TSMC.1979.4310076, 1979.
+
+usage in code:
+    from detect_supraglacial_lakes import detect_lakes_in_ndwi_geotiff, detect_supraglacial_lakes
+    lakes_gdf   = detect_lakes_in_ndwi_geotiff(f_name_ndwi)
+    lakes_gdfs  = detect_supraglacial_lakes(f_dir_ndwi, N_WORKERS=8) # dictionary: flight id -> GeoDataFrame
+"""
+
+import os
+import re
+import numpy as np
+
+# columns of the lake GeoDataFrames (in addition to geometry)
+LAKE_COLUMNS = ["f_name", "lake_id", "area_pixels", "area_m2", "ndwi_mean", "ndwi_max",
+                "centroid_x", "centroid_y", "touches_edge", "ndwi_threshold"]
+
+#%% multi-Otsu thresholds from histogram
+
+def multi_otsu_thresholds(
+    values:np.ndarray,               # valid (finite) values, any shape
+    N_CLASSES:int = 3,               # number of classes. returns N_CLASSES - 1 thresholds
+    N_BINS:int = 256,                # number of histogram bins
+    VALUE_RANGE:tuple = (-1.0, 1.0), # histogram range. NDWI_ice is bounded by ±1
+    ) -> np.ndarray:                 # thresholds in ascending order
+
+    """
+      Otsu multi-thresholding on a precomputed histogram. The between-class variance of a class
+      containing bins i to j-1 is proportional to (S[j] - S[i])**2 / (P[j] - P[i]) where P and S are the
+      cumulative sums of the histogram counts and of counts * bin centers. The optimal split into
+      N_CLASSES classes is found by dynamic programming over the (N_BINS + 1)**2 table of class scores,
+      so the cost is independent of the number of pixels once the histogram is computed.
+    """
+
+    if N_CLASSES < 2:
+        raise ValueError("\n\tERROR: N_CLASSES must be 2 or larger. Abort.")
+
+    counts, edges = np.histogram(values, bins=N_BINS, range=VALUE_RANGE)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+
+    P = np.concatenate(([0.0], np.cumsum(counts, dtype=np.float64)))
+    S = np.concatenate(([0.0], np.cumsum(counts * centers, dtype=np.float64)))
+
+    # score[i, j] for a class containing bins i .. j-1. empty classes and i >= j are not allowed
+    w = P[None, :] - P[:, None]
+    m = S[None, :] - S[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(w > 0, m**2 / w, -np.inf)
+
+    # best[j]: best total score of splitting bins 0 .. j-1 into k classes
+    best  = score[0, :].copy()
+    split = []
+    for k in range(1, N_CLASSES):
+        total = best[:, None] + score           # previous classes end at i, new class covers i .. j-1
+        i_opt = np.argmax(total, axis=0)
+        best  = total[i_opt, np.arange(N_BINS + 1)]
+        split.append(i_opt)
+
+    if not np.isfinite(best[N_BINS]):
+        return np.full(N_CLASSES - 1, np.nan) # fewer occupied bins than classes
+
+    # backtrack split indices starting at the last bin
+    j = N_BINS
+    i_split = []
+    for i_opt in reversed(split):
+        j = i_opt[j]
+        i_split.append(j)
+
+    return edges[np.array(i_split[::-1])]
+
+#%% flight identifier from file name
+
+def flight_id_from_file_name(f_name:str) -> str:
+    """
+      file name up to and including the date of the flight, e.g., IOCAM1B_2019_GR_NASA_20190506 for
+      IOCAM1B_2019_GR_NASA_20190506-131611.4217_ndwi.tif. Frames with other file names are treated as separate flights.
+    """
+    name  = os.path.basename(f_name)
+    match = re.match(r"^(.*?\d{8})[-_]\d{6}", name)
+    return match.group(1) if match else os.path.splitext(name)[0]
+
+#%% detect lakes in a single NDWI_ice GeoTiff
+
+def detect_lakes_in_ndwi_geotiff(
+    f_name_ndwi:str,            # NDWI_ice GeoTiff from calculate_L1B_NDWI_geotiffs.py (float32, NaN = nodata)
+    N_CLASSES:int = 3,          # number of Otsu classes. lakes are the class with the highest NDWI_ice
+    NDWI_MIN:float = 0.25,      # lower bound for the lake threshold so that frames without water are not split into lakes
+    MIN_AREA_M2:float = 100.0,  # minimum lake area in square meters
+    N_BINS:int = 256,           # number of histogram bins for Otsu thresholding
+    CONNECTIVITY:int = 8,       # 4 or 8 connected components
+    ) -> object:                # GeoDataFrame with one polygon per lake
+
+    """
+      detect supraglacial lakes in a single NDWI_ice GeoTiff and return a GeoDataFrame with one
+      (Multi)Polygon per lake in the coordinate system of the GeoTiff
+    """
+
+    import rasterio
+    import geopandas as gpd
+    from   scipy import ndimage
+    from   rasterio.features import shapes
+    from   shapely.geometry import shape, MultiPolygon
+    from   processing_instrumentation import stage, file_size
+
+    if CONNECTIVITY not in (4, 8):
+        raise ValueError("\n\tERROR: CONNECTIVITY must either be 4 or 8. Abort.")
+
+    with stage("lakes read NDWI GeoTIFF", f_name=f_name_ndwi, bytes_read=file_size(f_name_ndwi)) as st:
+        with rasterio.open(f_name_ndwi) as src:
+            ndwi      = src.read(1).astype(np.float32, copy=False)
+            transform = src.transform
+            crs       = src.crs
+            nodata    = src.nodata
+        st.n_items = ndwi.size
+
+    valid = np.isfinite(ndwi)
+    if nodata is not None and np.isfinite(nodata):
+        valid &= (ndwi != nodata)
+
+    with stage("lakes multi-Otsu", n_items=ndwi.size):
+        thresholds = multi_otsu_thresholds(ndwi[valid], N_CLASSES, N_BINS)
+        ndwi_thr   = max(thresholds[-1], NDWI_MIN) if np.isfinite(thresholds[-1]) else NDWI_MIN
+        water      = valid & (ndwi >= ndwi_thr)
+
+    with stage("lakes label components", n_items=ndwi.size):
+        structure = np.ones((3, 3), dtype=bool) if CONNECTIVITY == 8 else None
+        labels, n_labels = ndimage.label(water, structure=structure)
+
+        # per-component statistics for all components at once, computed on the water pixels only
+        n_rows, n_cols = labels.shape
+        i_water  = np.flatnonzero(water)
+        lbl      = labels.ravel()[i_water]
+        rows, cols = np.divmod(i_water, n_cols)
+        ndwi_w   = ndwi.ravel()[i_water]
+        n_pix    = np.bincount(lbl, minlength=n_labels + 1)
+        ndwi_sum = np.bincount(lbl, weights=ndwi_w, minlength=n_labels + 1)
+        row_sum  = np.bincount(lbl, weights=rows, minlength=n_labels + 1)
+        col_sum  = np.bincount(lbl, weights=cols, minlength=n_labels + 1)
+        ndwi_max = np.full(n_labels + 1, -np.inf)
+        np.maximum.at(ndwi_max, lbl, ndwi_w)
+
+        # components touching the frame edge or nodata pixels are only partially imaged
+        valid_pad = np.pad(valid, 1, constant_values=False)
+        touches   = np.zeros(i_water.size, dtype=bool)
+        for d_r, d_c in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+            touches |= ~valid_pad[rows + 1 + d_r, cols + 1 + d_c]
+        edge = np.zeros(n_labels + 1, dtype=bool)
+        edge[lbl[touches]] = True
+
+        pixel_area = abs(transform.a * transform.e - transform.b * transform.d)
+        keep = n_pix * pixel_area >= MIN_AREA_M2
+        keep[0] = False
+        lake_ids = np.flatnonzero(keep)
+
+    with stage("lakes polygonize", n_items=lake_ids.size):
+        # polygonize each lake within its bounding box only
+        slices   = ndimage.find_objects(labels, max_label=lake_ids[-1] if lake_ids.size else 0)
+        geometry = []
+        for i in lake_ids:
+            sl   = slices[i - 1]
+            mask = labels[sl] == i
+            polys = [shape(geom) for geom, _ in shapes(mask.view(np.uint8), mask=mask, connectivity=CONNECTIVITY,
+                                                        transform=transform * transform.translation(sl[1].start, sl[0].start))]
+            geometry.append(polys[0] if len(polys) == 1 else MultiPolygon(polys))
+
+    # centroids of pixel centers in map coordinates
+    col_c = col_sum[lake_ids] / n_pix[lake_ids] + 0.5
+    row_c = row_sum[lake_ids] / n_pix[lake_ids] + 0.5
+    x_c, y_c = transform * (col_c, row_c)
+
+    data = {
+        "f_name"         : [os.path.basename(f_name_ndwi)] * lake_ids.size,
+        "lake_id"        : lake_ids.astype(np.int32),
+        "area_pixels"    : n_pix[lake_ids].astype(np.int64),
+        "area_m2"        : n_pix[lake_ids] * pixel_area,
+        "ndwi_mean"      : ndwi_sum[lake_ids] / n_pix[lake_ids],
+        "ndwi_max"       : ndwi_max[lake_ids].astype(np.float64),
+        "centroid_x"     : np.asarray(x_c, dtype=np.float64),
+        "centroid_y"     : np.asarray(y_c, dtype=np.float64),
+        "touches_edge"   : edge[lake_ids],
+        "ndwi_threshold" : np.full(lake_ids.size, ndwi_thr, dtype=np.float64),
+    }
+
+    return gpd.GeoDataFrame(data, geometry=geometry, crs=crs)
+
+def _detect_lakes_safe(f_name_ndwi, params):
+    """ worker function for the process pool. returns (f_name_ndwi, GeoDataFrame or None, error message or None) """
+    try:
+        return f_name_ndwi, detect_lakes_in_ndwi_geotiff(f_name_ndwi, **params), None
+    except Exception as err:
+        return f_name_ndwi, None, str(err)
+
+#%% batch detection of lakes for all frames of one or more flights
+
+def detect_supraglacial_lakes(
+    f_names_ndwi,                 # directory with NDWI_ice GeoTiffs or list of NDWI_ice GeoTiff file names
+    f_dir_out:str = None,         # output directory for the GPKG files. None: do not save
+    suffix:str = "_ndwi.tif",     # file name ending of NDWI_ice GeoTiffs when a directory is given
+    N_CLASSES:int = 3,            # number of Otsu classes
+    NDWI_MIN:float = 0.25,        # lower bound for the lake threshold
+    MIN_AREA_M2:float = 100.0,    # minimum lake area in square meters
+    N_WORKERS:int = None,         # number of worker processes. None = number of CPUs
+    VERBOSE:bool = False,         # print one line per flight
+    ) -> dict:                    # dictionary with flight id as key and GeoDataFrame of lakes as value
+
+    """
+      detect supraglacial lakes in all NDWI_ice GeoTiffs in parallel and collect the lakes into one
+      GeoDataFrame per flight. If f_dir_out is given each GeoDataFrame is saved as <flight id>_lakes.gpkg.
+    """
+
+    import pandas as pd
+    import geopandas as gpd
+    from   functools import partial
+    from   concurrent.futures import ProcessPoolExecutor
+    from   processing_instrumentation import stage, file_size
+
+    if isinstance(f_names_ndwi, str):
+        f_dir_ndwi   = f_names_ndwi
+        f_names_ndwi = sorted(os.path.join(f_dir_ndwi, f) for f in os.listdir(f_dir_ndwi) if f.endswith(suffix))
+
+    params = {"N_CLASSES": N_CLASSES, "NDWI_MIN": NDWI_MIN, "MIN_AREA_M2": MIN_AREA_M2}
+    worker = partial(_detect_lakes_safe, params=params)
+
+    with stage("lakes detect frames", n_items=len(f_names_ndwi)):
+        if len(f_names_ndwi) > 1 and (N_WORKERS is None or N_WORKERS > 1):
+            with ProcessPoolExecutor(max_workers=N_WORKERS) as pool:
+                results = list(pool.map(worker, f_names_ndwi, chunksize=4))
+        else:
+            results = [worker(f) for f in f_names_ndwi]
+
+    # group frames by flight
+    frames = {}
+    for f_name_ndwi, gdf, err in results:
+        if gdf is None:
+            print(f"Unable to detect lakes in {f_name_ndwi}: {err}")
+            continue
+        frames.setdefault(flight_id_from_file_name(f_name_ndwi), []).append(gdf)
+
+    lakes_gdfs = {}
+    for flight_id, gdfs in frames.items():
+        lakes_gdf = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True), geometry="geometry", crs=gdfs[0].crs)
+        lakes_gdfs[flight_id] = lakes_gdf
+
+        if f_dir_out is not None:
+            os.makedirs(f_dir_out, exist_ok=True)
+            f_name_gpkg = os.path.join(f_dir_out, f"{flight_id:s}_lakes.gpkg")
+            with stage("lakes save GPKG", f_name=f_name_gpkg, n_items=len(lakes_gdf)) as st:
+                lakes_gdf.to_file(f_name_gpkg, driver="GPKG")
+                st.bytes_written = file_size(f_name_gpkg)
+
+        if VERBOSE:
+            print(f"{flight_id:s}: {len(gdfs):d} frames, {len(lakes_gdf):d} lakes")
+
+    return lakes_gdfs
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_dir_ndwi = r"CAMBOT_L1"  # directory with NDWI_ice GeoTiffs from calculate_L1B_NDWI_geotiffs.py
+
+    tic = time.perf_counter()
+    lakes_gdfs = detect_supraglacial_lakes(f_dir_ndwi, f_dir_out=f_dir_ndwi, VERBOSE=True)
+    toc = time.perf_counter()
+    print(f"\tTime to detect lakes: {toc - tic:0.1f} seconds")
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: water-surface elevation of supraglacial lakes from ATM lidar shots for bathymetry.
+         ATM laser shots are assigned to lake polygons (e.g., from detect_supraglacial_lakes.py) with a
+         vectorized spatial join and a robust water surface is fitted for all lakes at once:
+
+             1. shots with low received signal strength (rcv_sigstr) are rejected. Specular returns from
+                the water surface are strong, weak returns are often from the lake bottom or sub-surface.
+             2. a median surface and a plane are fitted to the shots of each lake. Outliers are rejected
+                iteratively with the median absolute deviation (MAD) of the residuals of each lake.
+
+         All steps are grouped operations on the joined shot arrays (numpy.lexsort and numpy.bincount),
+         so there is no Python loop over lakes. The result has one row per lake with the water-surface
+         elevation, slope and number of shots used.
+
+         ATM data products:
+             https://nsidc.org/data/ilatm1b/versions/2
+             https://nsidc.org/data/ilnsa1b/versions/2
+
+usage in code:
+    from fit_lake_water_surface import fit_lake_water_surfaces, fit_lake_water_surfaces_from_files
+    lakes_gdf = fit_lake_water_surfaces_from_files(lakes_gdf, [f_name_atm_1, f_name_atm_2])
+    lakes_gdf = fit_lake_water_surfaces(lakes_gdf, lon_deg, lat_deg, ele_m, sigstr_cts)
+"""
+
+import os
+import numpy as np
+
+MAD_SCALE = 1.4826 # scale factor between MAD and standard deviation for normally distributed residuals
+
+#%% grouped statistics
+
+def _grouped_median(group, values, n_groups):
+    """
+      median of values per group (NaN for empty groups). values are sorted within the groups with a single
+      argsort of group + values scaled to [0, 1), which is considerably faster than numpy.lexsort
+    """
+    if values.size == 0:
+        return np.full(n_groups, np.nan)
+    v_min, v_max = np.min(values), np.max(values)
+    scale = (1.0 - 1e-9) / (v_max - v_min) if v_max > v_min else 0.0
+    order  = np.argsort(group + (values - v_min) * scale)
+    v      = values[order]
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    med    = np.full(n_groups, np.nan)
+    ok     = counts > 0
+    med[ok] = 0.5 * (v[starts[ok] + (counts[ok] - 1) // 2] + v[starts[ok] + counts[ok] // 2])
+    return med
+
+def _join_points_to_polygons(geoms, x, y):
+    """
+      indices of the points and polygons for all points inside a polygon. Points are bucketed into a regular
+      grid with a cell size of the median polygon extent, candidate polygons are looked up with
+      numpy.searchsorted and tested with shapely.contains_xy, so no shapely point objects are created
+    """
+    import shapely
+
+    bounds = shapely.bounds(geoms)
+    ok     = np.flatnonzero(np.isfinite(bounds[:, 0]))
+    if ok.size == 0 or x.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    bounds = bounds[ok]
+    cell   = max(np.median(np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])), 1.0)
+    x_0, y_0 = np.min(bounds[:, 0]), np.min(bounds[:, 1])
+
+    # grid cells covered by the bounding box of each polygon
+    ix0 = ((bounds[:, 0] - x_0) // cell).astype(np.int64)
+    iy0 = ((bounds[:, 1] - y_0) // cell).astype(np.int64)
+    n_x = ((bounds[:, 2] - x_0) // cell).astype(np.int64) - ix0 + 1
+    n_y = ((bounds[:, 3] - y_0) // cell).astype(np.int64) - iy0 + 1
+    nx  = int(np.max(ix0 + n_x)) + 1
+    ny  = int(np.max(iy0 + n_y)) + 1
+    n_cells = n_x * n_y
+    i_poly  = np.repeat(np.arange(ok.size), n_cells)
+    i_cell  = np.arange(i_poly.size) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+    key     = (iy0[i_poly] + i_cell // n_x[i_poly]) * nx + ix0[i_poly] + i_cell % n_x[i_poly]
+    order   = np.argsort(key)
+    key, i_poly = key[order], ok[i_poly[order]]
+
+    # candidate polygons of each point
+    ix = np.floor((x - x_0) / cell)
+    iy = np.floor((y - y_0) / cell)
+    in_grid = np.flatnonzero((ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny))
+    key_pt  = iy[in_grid].astype(np.int64) * nx + ix[in_grid].astype(np.int64)
+    if nx * ny <= 2**26:
+        # direct lookup of the first candidate and the number of candidates per grid cell
+        cell_start = np.searchsorted(key, np.arange(nx * ny + 1))
+        lo  = cell_start[key_pt]
+        cnt = cell_start[key_pt + 1] - lo
+    else:
+        lo  = np.searchsorted(key, key_pt, side="left")
+        cnt = np.searchsorted(key, key_pt, side="right") - lo
+    i_pt   = np.repeat(in_grid, cnt)
+    i_pair = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt) + np.arange(i_pt.size)
+    i_geom = i_poly[i_pair]
+
+    shapely.prepare(geoms)
+    inside = shapely.contains_xy(geoms[i_geom], x[i_pt], y[i_pt])
+    return i_pt[inside], i_geom[inside]
+
+def _latitude_range(bounds, crs):
+    """
+      latitude range in degrees of a bounding box (x_min, y_min, x_max, y_max) in a projected CRS. The extreme
+      latitudes are not necessarily at the corners (e.g., edge midpoints in EPSG:3413 when the box straddles x = 0).
+      In EPSG:3413 the latitude decreases with the distance from the pole, so the range is calculated exactly from
+      the points of the box nearest to and farthest from the pole. Other CRSs use densified box edges.
+    """
+    from crs_transformer_registry import get_crs, get_transformer, epsg3413_to_geo, CRS_GEO, CRS_PS_NORTH
+    x_min, y_min, x_max, y_max = bounds
+    if not np.all(np.isfinite(bounds)):
+        return np.nan, np.nan
+    if get_crs(crs) == get_crs(CRS_PS_NORTH):
+        x_far = x_min if abs(x_min) > abs(x_max) else x_max
+        y_far = y_min if abs(y_min) > abs(y_max) else y_max
+        _, lat = epsg3413_to_geo(np.array([np.clip(0.0, x_min, x_max), x_far]), np.array([np.clip(0.0, y_min, y_max), y_far]))
+        return lat[1], lat[0]
+    _, lat_min, _, lat_max = get_transformer(crs, CRS_GEO).transform_bounds(x_min, y_min, x_max, y_max, densify_pts=21)
+    return lat_min, lat_max
+
+def _grouped_plane_fit(group, x, y, z, n_groups):
+    """
+      least-squares plane z = z0 + sx * (x - x0) + sy * (y - y0) per group from the normal equations
+      accumulated with numpy.bincount. x0, y0 are the mean shot coordinates of each group.
+      groups with fewer than 3 shots or collinear shots get zero slope.
+    """
+    n   = np.bincount(group, minlength=n_groups).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x0 = np.bincount(group, weights=x, minlength=n_groups) / n
+        y0 = np.bincount(group, weights=y, minlength=n_groups) / n
+        z0 = np.bincount(group, weights=z, minlength=n_groups) / n
+    dx  = x - x0[group]
+    dy  = y - y0[group]
+    dz  = z - z0[group]
+    sxx = np.bincount(group, weights=dx * dx, minlength=n_groups)
+    sxy = np.bincount(group, weights=dx * dy, minlength=n_groups)
+    syy = np.bincount(group, weights=dy * dy, minlength=n_groups)
+    sxz = np.bincount(group, weights=dx * dz, minlength=n_groups)
+    syz = np.bincount(group, weights=dy * dz, minlength=n_groups)
+    det = sxx * syy - sxy**2
+    ok  = (n >= 3) & (det > 1e-9 * np.maximum(sxx * syy, 1e-30))
+    sx  = np.zeros(n_groups)
+    sy  = np.zeros(n_groups)
+    sx[ok] = (syy[ok] * sxz[ok] - sxy[ok] * syz[ok]) / det[ok]
+    sy[ok] = (sxx[ok] * syz[ok] - sxy[ok] * sxz[ok]) / det[ok]
+    return x0, y0, z0, sx, sy
+
+#%% fit water surfaces of all lakes
+
+def fit_lake_water_surfaces(
+    lakes_gdf:object,           # GeoDataFrame with lake polygons in a projected coordinate system, e.g., EPSG:3413
+    lon_deg:np.ndarray,         # ATM laser shot longitudes in degrees east
+    lat_deg:np.ndarray,         # ATM laser shot latitudes in degrees north
+    ele_m:np.ndarray,           # ATM laser shot elevations above WGS-84 ellipsoid in meters
+    sigstr_cts:np.ndarray,      # ATM received signal strength (rcv_sigstr) in digitizer counts
+    SIGSTR_MIN:float = None,    # reject shots with rcv_sigstr below this value. None = no absolute threshold
+    SIGSTR_REL:float = 0.25,    # reject shots with rcv_sigstr below this fraction of the median rcv_sigstr of the lake
+    SHORE_BUFFER_M:float = 2.0, # shrink lake polygons by this distance to exclude shots on the shore
+    MAD_K:float = 3.0,          # reject shots with residuals larger than MAD_K * 1.4826 * MAD
+    MAD_FLOOR_M:float = 0.02,   # lower bound for 1.4826 * MAD to avoid rejecting shots of very flat lakes
+    N_ITER:int = 3,             # number of outlier rejection iterations
+    N_MIN:int = 10,             # minimum number of shots for a water-surface fit
+    ) -> object:                # copy of lakes_gdf with water-surface columns added
+
+    """
+      assign ATM laser shots to lakes and fit a robust median and plane water surface for all lakes in one
+      grouped, vectorized pass. Adds the following columns to a copy of lakes_gdf:
+
+          n_shots           number of shots inside the (shrunk) lake polygon
+          n_shots_used      number of shots used after rcv_sigstr and outlier rejection
+          ele_median_m      median water-surface elevation in meters
+          ele_plane_m       elevation of the fitted plane at the mean shot position in meters
+          slope_x, slope_y  plane slope components in m/m along the x and y axes of the coordinate system
+          slope_deg         plane slope in degrees
+          rmse_m            root mean square of the plane residuals of the used shots in meters
+          sigstr_median     median rcv_sigstr of the used shots
+    """
+
+    import shapely
+    from   crs_transformer_registry import geo_to_projected
+    from   processing_instrumentation import stage
+
+    n_lakes = len(lakes_gdf)
+    lon_deg = np.mod(np.asarray(lon_deg, dtype=np.float64) - 180.0, 360.0) - 180.0 # wrap longitudes to ±180°
+    lat_deg = np.asarray(lat_deg, dtype=np.float64)
+
+    with stage("lake surface spatial join", n_items=lon_deg.size) as st:
+        geoms = np.asarray(lakes_gdf.geometry.values)
+        if SHORE_BUFFER_M:
+            geoms = shapely.buffer(geoms, -SHORE_BUFFER_M)
+
+        # reject shots outside the bounding box of all lakes before projecting them
+        x_min, y_min, x_max, y_max = shapely.total_bounds(geoms) if n_lakes else (np.nan,) * 4
+        lat_min, lat_max = _latitude_range((x_min, y_min, x_max, y_max), lakes_gdf.crs)
+        i_box = np.flatnonzero((lat_deg >= lat_min) & (lat_deg <= lat_max))
+        x, y  = geo_to_projected(lon_deg[i_box], lat_deg[i_box], lakes_gdf.crs)
+        in_box = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        i_box, x, y = i_box[in_box], x[in_box], y[in_box]
+
+        # vectorized point in polygon test of the shots against all lakes
+        i_pt, i_lake = _join_points_to_polygons(geoms, x, y)
+        st.n_items = i_pt.size
+
+    with stage("lake surface fit", n_items=i_pt.size):
+        group = i_lake.astype(np.intp)
+        x_s   = x[i_pt]
+        y_s   = y[i_pt]
+        z_s   = np.asarray(ele_m, dtype=np.float64)[i_box[i_pt]]
+        sig_s = np.asarray(sigstr_cts, dtype=np.float64)[i_box[i_pt]]
+        n_shots = np.bincount(group, minlength=n_lakes)
+
+        # received signal strength filter
+        use = np.isfinite(z_s) & np.isfinite(sig_s)
+        if SIGSTR_MIN is not None:
+            use &= sig_s >= SIGSTR_MIN
+        if SIGSTR_REL:
+            sig_med = _grouped_median(group[use], sig_s[use], n_lakes)
+            use &= sig_s >= SIGSTR_REL * sig_med[group]
+
+        # iterative outlier rejection around the median surface first, then around the plane
+        for i_iter in range(N_ITER + 1):
+            g = group[use]
+            ele_med = _grouped_median(g, z_s[use], n_lakes)
+            x0, y0, z0, sx, sy = _grouped_plane_fit(g, x_s[use], y_s[use], z_s[use], n_lakes)
+            if i_iter == N_ITER:
+                break
+            if i_iter == 0:
+                res = z_s - ele_med[group]
+            else:
+                res = z_s - (z0[group] + sx[group] * (x_s - x0[group]) + sy[group] * (y_s - y0[group]))
+            sigma = np.maximum(MAD_SCALE * _grouped_median(g, np.abs(res[use]), n_lakes), MAD_FLOOR_M)
+            use  &= np.abs(res) <= MAD_K * sigma[group]
+
+        g = group[use]
+        n_used = np.bincount(g, minlength=n_lakes)
+        res    = z_s[use] - (z0[g] + sx[g] * (x_s[use] - x0[g]) + sy[g] * (y_s[use] - y0[g]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rmse = np.sqrt(np.bincount(g, weights=res**2, minlength=n_lakes) / n_used)
+        sig_used = _grouped_median(g, sig_s[use], n_lakes)
+
+    ok = n_used >= N_MIN
+    lakes_out = lakes_gdf.copy()
+    lakes_out["n_shots"]       = n_shots
+    lakes_out["n_shots_used"]  = n_used
+    lakes_out["ele_median_m"]  = np.where(ok, ele_med, np.nan)
+    lakes_out["ele_plane_m"]   = np.where(ok, z0, np.nan)
+    lakes_out["slope_x"]       = np.where(ok, sx, np.nan)
+    lakes_out["slope_y"]       = np.where(ok, sy, np.nan)
+    lakes_out["slope_deg"]     = np.where(ok, np.degrees(np.arctan(np.hypot(sx, sy))), np.nan)
+    lakes_out["rmse_m"]        = np.where(ok, rmse, np.nan)
+    lakes_out["sigstr_median"] = np.where(ok, sig_used, np.nan)
+
+    return lakes_out
+
+#%% read ATM shots from HDF5 files or memory-mapped point stores
+
+def read_atm_points(
+    f_name_atm:str,             # ATM HDF5 file or point store directory from atm_memmap_point_store.py
+    ) -> tuple:                 # lon_deg, lat_deg, ele_m, sigstr_cts
+
+    """ read longitude, latitude, elevation and rcv_sigstr from an ATM HDF5 file or a memory-mapped point store """
+
+    from processing_instrumentation import stage, file_size
+
+    if os.path.isdir(f_name_atm):
+        from atm_memmap_point_store import open_atm_memmap_store
+        atm_pts = open_atm_memmap_store(f_name_atm)
+        return atm_pts.lon_deg, atm_pts.lat_deg, atm_pts.ele_m, atm_pts.sigstr_cts
+
+    import h5py
+    with stage("ATM read HDF5", f_name=f_name_atm, bytes_read=file_size(f_name_atm)) as st, h5py.File(f_name_atm, 'r') as data_hdf_atm:
+        lon = data_hdf_atm['/longitude'][:]
+        lat = data_hdf_atm['/latitude'][:]
+        ele = data_hdf_atm['/elevation'][:]
+        sig = data_hdf_atm['/instrument_parameters/rcv_sigstr'][:]
+        st.n_items = len(lon)
+    return lon, lat, ele, sig
+
+def fit_lake_water_surfaces_from_files(
+    lakes_gdf:object,           # GeoDataFrame with lake polygons in a projected coordinate system
+    f_names_atm:list,           # ATM HDF5 files and/or point store directories covering the lakes
+    **kwargs,                   # parameters passed to fit_lake_water_surfaces()
+    ) -> object:                # copy of lakes_gdf with water-surface columns added
+
+    """
+      read the ATM shots of all granules of a flight and fit the water surfaces of all lakes. Only shots
+      within the latitude range of the lakes are kept from each granule to limit memory use.
+    """
+
+    if isinstance(f_names_atm, str):
+        f_names_atm = [f_names_atm]
+
+    lat_min, lat_max = _latitude_range(lakes_gdf.total_bounds, lakes_gdf.crs)
+
+    cols = ([], [], [], [])
+    for f_name_atm in f_names_atm:
+        lon, lat, ele, sig = read_atm_points(f_name_atm)
+        i_box = np.flatnonzero((lat >= lat_min) & (lat <= lat_max))
+        for col, arr in zip(cols, (lon, lat, ele, sig)):
+            col.append(np.asarray(arr[i_box], dtype=np.float64))
+
+    lon, lat, ele, sig = (np.concatenate(col) if col else np.empty(0) for col in cols)
+
+    return fit_lake_water_surfaces(lakes_gdf, lon, lat, ele, sig, **kwargs)
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+    import geopandas as gpd
+
+    f_name_lakes = r"CAMBOT_L1" + os.sep + "IOCAM1B_2019_GR_NASA_20190506_lakes.gpkg" # from detect_supraglacial_lakes.py
+    f_name_atm   = r".." + os.sep + "data" + os.sep + "example_files" + os.sep + "ILATM1B_20190506_131600.ATM6AT6.h5"
+
+    lakes_gdf = gpd.read_file(f_name_lakes)
+
+    tic = time.perf_counter()
+    lakes_gdf = fit_lake_water_surfaces_from_files(lakes_gdf, [f_name_atm])
+    toc = time.perf_counter()
+    print(f"\tTime to fit water surfaces of {len(lakes_gdf):d} lakes: {toc - tic:0.1f} seconds")
+
+    lakes_gdf.to_file(f_name_lakes.replace("_lakes.gpkg", "_lakes_surface.gpkg"), driver="GPKG")
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: campaign-level store for KT19 surface temperature measurements (IAKST1B) from NSIDC:
+
+             https://nsidc.org/data/iakst1b/versions/2
+
+         All KT19 text files of a campaign are ingested into one column-per-file binary store that is
+         sorted by time and can be memory-mapped:
+
+             KT19_campaign.kt19/
+                 manifest.json
+                 utc_time.<n>.bin                int64   UTC time in nanoseconds since 1970-01-01
+                 longitude_deg.<n>.bin           float64 longitude in degrees east wrapped to ±180°
+                 latitude_deg.<n>.bin            float64 latitude in degrees north
+                 elevation_m.<n>.bin             float32 elevation above WGS-84 ellipsoid in meters
+                 surface_temperature_c.<n>.bin   float32 surface temperature in °C
+                 internal_temperature_c.<n>.bin  float32 internal temperature of the KT19 in °C
+                 file_id.<n>.bin                 uint16  index of the KT19 file in the manifest
+
+         <n> is the generation of the store. Each ingest writes a new generation and replaces the
+         manifest last and atomically, so that readers never see an incomplete store (see
+         memmap_column_store.py). Files that are
+         already in the store are skipped, modified files are replaced.
+
+         The reader only maps the requested columns, finds the time range by binary search in the
+         sorted utc_time column and only builds point geometries if a GeoDataFrame is requested.
+
+usage in code:
+    from kt19_campaign_store import build_kt19_campaign_store, read_kt19_campaign_store
+    build_kt19_campaign_store(f_names_kt19, "KT19_campaign.kt19")
+    kt19_df = read_kt19_campaign_store("KT19_campaign.kt19", ["utc_time", "surface_temperature_c"],
+                                       t_s="2019-05-06T13:16:00", t_e="2019-05-06T13:20:00")
+"""
+
+import os
+import numpy as np
+
+STORE_FORMAT  = "kt19_campaign_store"
+STORE_VERSION = 1
+
+# column name in store and dtype
+STORE_COLUMNS = {"utc_time":               "<i8",
+                 "longitude_deg":          "<f8",
+                 "latitude_deg":           "<f8",
+                 "elevation_m":            "<f4",
+                 "surface_temperature_c":  "<f4",
+                 "internal_temperature_c": "<f4",
+                 "file_id":                "<u2"}
+
+#%% helper functions
+
+def _read_manifest(f_dir_store):
+    """ content of manifest.json or None if the store does not exist yet """
+    from memmap_column_store import read_store_manifest
+    return read_store_manifest(f_dir_store, STORE_FORMAT, "KT19 campaign store")
+
+def _map_column(f_dir_store, manifest, col):
+    """ read-only numpy.memmap of one column """
+    from memmap_column_store import map_column
+    return map_column(f_dir_store, manifest["columns"][col], STORE_COLUMNS[col], manifest["n_samples"])
+
+def read_kt19_text_file(
+    f_name_kt19:str,    # path to KT19 ASCII text file from NSIDC
+    ) -> dict:          # dictionary with one numpy array per store column except file_id
+
+    """ read a KT19 text file and convert the columns to the data types of the store """
+
+    import pandas as pd
+    from   asp_airborne_utilities import kt19_to_datetime64, clean_kt19_column_names
+
+    kt19_df = pd.read_csv(f_name_kt19, skiprows = 10)
+    kt19_df.columns = clean_kt19_column_names(kt19_df.columns)
+
+    cols = {"utc_time": kt19_to_datetime64(kt19_df["year"], kt19_df["day_of_year"], kt19_df["seconds_of_day_utc"], 0).astype(np.int64),
+            "longitude_deg": np.mod(kt19_df["longitude_deg"].to_numpy(np.float64) - 180.0, 360.0) - 180.0} # wrap longitudes to ±180°
+    for col in ("latitude_deg", "elevation_m", "surface_temperature_c", "internal_temperature_c"):
+        cols[col] = kt19_df[col].to_numpy(STORE_COLUMNS[col])
+
+    return cols
+
+#%% build or update the campaign store
+
+def build_kt19_campaign_store(
+    f_names_kt19:list,      # KT19 ASCII text files from NSIDC
+    f_dir_store:str,        # directory of the campaign store. created if it does not exist
+    VERBOSE:bool = False,   # print the number of new, modified and skipped files
+    ) -> str:               # directory of the campaign store
+
+    """
+      ingest KT19 text files into the campaign store. Files that are unchanged since they were ingested
+      (size and modification time) are skipped, modified files are replaced. The merged columns are sorted
+      by time (stable, so samples with identical time tags keep the order of ingestion).
+    """
+
+    from processing_instrumentation import stage, file_size
+    from memmap_column_store import replace_store_manifest, column_file_name, create_column
+
+    os.makedirs(f_dir_store, exist_ok=True)
+    manifest = _read_manifest(f_dir_store) or {"format": STORE_FORMAT, "version": STORE_VERSION, "generation": 0,
+                                               "n_samples": 0, "files": {}, "columns": {}}
+    files = manifest["files"]
+
+    # new and modified files
+    f_names_new, f_names_mod = [], []
+    for f_name in dict.fromkeys(os.path.abspath(f) for f in f_names_kt19):
+        st_f = os.stat(f_name)
+        info = files.get(f_name)
+        if info is None:
+            f_names_new.append(f_name)
+        elif info["size"] != st_f.st_size or info["mtime"] != st_f.st_mtime:
+            f_names_mod.append(f_name)
+    n_skipped = len(set(os.path.abspath(f) for f in f_names_kt19)) - len(f_names_new) - len(f_names_mod)
+
+    if VERBOSE:
+        print(f"{os.path.basename(os.path.normpath(f_dir_store)):s}: {len(f_names_new):d} new, {len(f_names_mod):d} modified, {n_skipped:d} unchanged KT19 files")
+    if not f_names_new and not f_names_mod:
+        return f_dir_store
+
+    next_id = max((info["file_id"] for info in files.values()), default=-1) + 1
+    if next_id + len(f_names_new) > np.iinfo(np.uint16).max + 1:
+        raise ValueError("\n\tERROR: a KT19 campaign store holds at most 65536 files. Abort.")
+
+    # existing samples without the samples of modified files
+    parts = {col: [] for col in STORE_COLUMNS}
+    if manifest["n_samples"] > 0:
+        file_id = _map_column(f_dir_store, manifest, "file_id")
+        keep = ~np.isin(file_id, [files[f]["file_id"] for f in f_names_mod]) if f_names_mod else slice(None)
+        for col in STORE_COLUMNS:
+            parts[col].append(np.asarray(_map_column(f_dir_store, manifest, col)[keep]))
+        del file_id
+
+    # read new and modified files
+    bytes_read = sum(file_size(f) for f in f_names_new + f_names_mod)
+    with stage("KT19 read text files", bytes_read=bytes_read) as st:
+        for f_name in f_names_mod + f_names_new:
+            if f_name in files:
+                f_id = files[f_name]["file_id"]
+            else:
+                f_id, next_id = next_id, next_id + 1
+            try:
+                cols = read_kt19_text_file(f_name)
+            except:
+                print(f'Unable to read {f_name}. Check path and input file name.')
+                raise
+            n = len(cols["utc_time"])
+            for col, arr in cols.items():
+                parts[col].append(arr)
+            parts["file_id"].append(np.full(n, f_id, dtype=STORE_COLUMNS["file_id"]))
+            st_f = os.stat(f_name)
+            files[f_name] = {"file_id": f_id, "size": st_f.st_size, "mtime": st_f.st_mtime, "n_samples": n}
+            st.n_items += n
+
+    # sort merged columns by time and write the next generation of the store
+    generation = manifest["generation"] + 1
+    f_names_old = list(manifest["columns"].values())
+    with stage("KT19 write campaign store", f_name=f_dir_store) as st:
+        utc_time = np.concatenate(parts["utc_time"])
+        order = np.argsort(utc_time, kind="stable")
+        n_samples = len(order)
+        st.n_items = n_samples
+        for col, dtype in STORE_COLUMNS.items():
+            f_name_col = column_file_name(col, generation)
+            out = create_column(f_dir_store, f_name_col, dtype, n_samples)
+            out[:] = np.concatenate(parts[col]).astype(dtype, copy=False)[order]
+            if n_samples > 0:
+                out.flush()
+            del out
+            manifest["columns"][col] = f_name_col
+            st.bytes_written += n_samples * np.dtype(dtype).itemsize
+            parts[col] = None
+
+    manifest.update(generation=generation, n_samples=int(n_samples))
+
+    # write manifest last and atomically, then remove the previous generation
+    replace_store_manifest(f_dir_store, manifest, f_names_old)
+
+    return f_dir_store
+
+#%% read columns and time ranges from the campaign store
+
+def read_kt19_campaign_store(
+    f_dir_store:str,        # directory of the campaign store
+    columns:list = None,    # columns to read. default: all columns
+    t_s = None,             # start of time window (inclusive): UTC date string in ISO 8601 format (2019-05-06T13:16:00.0), numpy.datetime64, pandas.Timestamp or epoch seconds
+    t_e = None,             # end   of time window (inclusive): UTC date string in ISO 8601 format (2019-05-06T13:16:00.0), numpy.datetime64, pandas.Timestamp or epoch seconds
+    GEOMETRY:bool = False,  # if True return a GeoDataFrame with point geometries (EPSG:4326)
+    ):
+
+    """
+      read selected columns of the samples within a time window into a Pandas DataFrame with utc_time
+      as datetime64[ns]. Only the requested columns are mapped and only the rows within the time window
+      are read. With GEOMETRY=True a GeoDataFrame is returned and the longitude and latitude columns are
+      replaced by point geometries like in kt19_to_gdf().
+    """
+
+    import pandas as pd
+    from   asp_airborne_utilities import to_epoch_ns
+
+    manifest = _read_manifest(f_dir_store)
+    if manifest is None:
+        raise FileNotFoundError(f"\n\tERROR: {f_dir_store} is not a complete KT19 campaign store (manifest.json not found). Abort.")
+
+    columns = list(STORE_COLUMNS) if columns is None else list(columns)
+    unknown = [col for col in columns if col not in STORE_COLUMNS]
+    if unknown:
+        raise ValueError(f"\n\tERROR: unknown columns {', '.join(unknown)}. Available: {', '.join(STORE_COLUMNS)}. Abort.")
+
+    # binary search for the time window in the sorted time column
+    i_s, i_e = 0, manifest["n_samples"]
+    if t_s is not None or t_e is not None:
+        utc_time = _map_column(f_dir_store, manifest, "utc_time")
+        if t_s is not None:
+            i_s = int(np.searchsorted(utc_time, to_epoch_ns(t_s), side="left"))
+        if t_e is not None:
+            i_e = int(np.searchsorted(utc_time, to_epoch_ns(t_e), side="right"))
+        i_e = max(i_s, i_e)
+        del utc_time
+
+    read_cols = columns + [col for col in ("longitude_deg", "latitude_deg") if GEOMETRY and col not in columns]
+    data = {}
+    for col in read_cols:
+        arr = np.array(_map_column(f_dir_store, manifest, col)[i_s:i_e]) # copy, so that the file is not kept open
+        data[col] = arr.view("datetime64[ns]") if col == "utc_time" else arr
+    kt19_df = pd.DataFrame(data, columns=read_cols)
+
+    if not GEOMETRY:
+        return kt19_df
+
+    import geopandas as gpd
+    from   crs_transformer_registry import get_crs, CRS_GEO
+
+    geometry = gpd.points_from_xy(kt19_df["longitude_deg"], kt19_df["latitude_deg"])
+    kt19_df.drop(columns=["longitude_deg", "latitude_deg"], inplace=True)
+    return gpd.GeoDataFrame(kt19_df, geometry=geometry, crs=get_crs(CRS_GEO))
+
+def kt19_campaign_file_names(
+    f_dir_store:str,        # directory of the campaign store
+    ) -> dict:              # file_id -> KT19 file name
+
+    """ KT19 file names of the file_id column """
+
+    manifest = _read_manifest(f_dir_store) or {"files": {}}
+    return {info["file_id"]: f_name for f_name, info in manifest["files"].items()}
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+    import glob
+
+    f_dir         = r".." + os.sep + "data" + os.sep + "example_files"
+    f_names_kt19  = sorted(glob.glob(f_dir + os.sep + "IAKST1B_KT19_PROCESSED_*.txt"))
+    f_dir_store   = f_dir + os.sep + "KT19_campaign.kt19"
+
+    tic = time.perf_counter()
+    build_kt19_campaign_store(f_names_kt19, f_dir_store, VERBOSE=True)
+    toc = time.perf_counter()
+    print(f"\tTime to ingest {len(f_names_kt19):d} KT19 files: {toc - tic:0.1f} seconds")
+
+    tic = time.perf_counter()
+    kt19_df = read_kt19_campaign_store(f_dir_store, ["utc_time", "surface_temperature_c"], t_s="2019-05-06T13:16:00", t_e="2019-05-06T13:20:00")
+    toc = time.perf_counter()
+    print(f"\tTime to read {len(kt19_df):d} surface temperatures: {toc - tic:0.3f} seconds")
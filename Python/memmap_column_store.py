@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: shared helpers for the column-per-file binary stores (atm_memmap_point_store.py and
+         kt19_campaign_store.py). A store is a directory with a JSON manifest and one raw
+         little-endian binary file per column:
+
+             <store>/
+                 manifest.json
+                 <column>.<n>.bin
+
+         <n> is the generation of the store. Each write creates a new generation of column files and
+         replaces the manifest last and atomically, so that readers never see the manifest of one
+         generation together with the columns of another. The column files of the previous generation
+         are removed afterwards. Columns are read as zero-copy, read-only numpy.memmap views.
+
+usage in code:
+    from memmap_column_store import read_store_manifest, column_file_name, create_column, map_column, replace_store_manifest
+    manifest = read_store_manifest(f_dir_store, "kt19_campaign_store", "KT19 campaign store")
+"""
+
+import os
+import json
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+
+#%% manifest
+
+def read_store_manifest(
+    f_dir_store:str,        # directory of the store
+    store_format:str,       # expected value of "format" in the manifest
+    store_name:str,         # name of the store for error messages, e.g., "ATM point store"
+    ) -> dict:              # content of the manifest or None if the store does not exist yet
+
+    """ read the manifest of a store. raises ValueError if the manifest cannot be read or has a different format """
+
+    f_name_manifest = os.path.join(f_dir_store, MANIFEST_NAME)
+    if not os.path.exists(f_name_manifest):
+        return None
+    try:
+        with open(f_name_manifest, "r") as f_obj:
+            manifest = json.load(f_obj)
+    except (ValueError, OSError):
+        raise ValueError(f"\n\tERROR: unable to read {f_name_manifest}. Abort.")
+    if not isinstance(manifest, dict) or manifest.get("format") != store_format:
+        raise ValueError(f"\n\tERROR: {f_dir_store} is not a {store_name:s}. Abort.")
+    return manifest
+
+def replace_store_manifest(
+    f_dir_store:str,        # directory of the store
+    manifest:dict,          # new manifest that references the new generation of column files
+    f_names_old:list = (),  # column files of the previous generation, removed after the manifest is replaced
+    ):
+
+    """ write the manifest last and atomically, then remove the column files of the previous generation """
+
+    f_name_manifest = os.path.join(f_dir_store, MANIFEST_NAME)
+    f_name_tmp = f_name_manifest + ".tmp"
+    with open(f_name_tmp, "w") as f_obj:
+        json.dump(manifest, f_obj, indent=2)
+    os.replace(f_name_tmp, f_name_manifest)
+
+    for f_name_col in f_names_old:
+        try:
+            os.remove(os.path.join(f_dir_store, f_name_col))
+        except OSError:
+            pass # still mapped by a reader (Windows)
+
+#%% column files
+
+def column_file_name(col:str, generation:int) -> str:
+    """ file name of a column in a generation of the store """
+    return f"{col:s}.{generation:d}.bin"
+
+def create_column(
+    f_dir_store:str,        # directory of the store
+    f_name_col:str,         # file name of the column, see column_file_name()
+    dtype:str,              # little-endian dtype, e.g., "<f8"
+    n_rows:int,             # number of rows
+    ):                      # writable numpy.memmap (empty numpy array for n_rows = 0)
+
+    """ create a column file of n_rows and return a writable memmap. call flush() on the memmap when done """
+
+    f_name = os.path.join(f_dir_store, f_name_col)
+    if n_rows == 0:
+        open(f_name, "wb").close() # numpy.memmap does not support empty files
+        return np.empty(0, dtype=dtype)
+    return np.memmap(f_name, dtype=dtype, mode="w+", shape=(n_rows,))
+
+def map_column(
+    f_dir_store:str,        # directory of the store
+    f_name_col:str,         # file name of the column from the manifest
+    dtype:str,              # little-endian dtype, e.g., "<f8"
+    n_rows:int,             # number of rows from the manifest
+    ):                      # read-only numpy.memmap (empty numpy array for n_rows = 0)
+
+    """ zero-copy, read-only numpy.memmap of a column """
+
+    if n_rows == 0:
+        return np.empty(0, dtype=dtype) # numpy.memmap does not support empty files
+    return np.memmap(os.path.join(f_dir_store, f_name_col), dtype=dtype, mode="r", shape=(n_rows,))
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: mosaic georeferenced GeoTiff frames (e.g., NDWI_ice GeoTiffs from calculate_L1B_NDWI_geotiffs.py)
+         into a single Cloud-Optimized GeoTIFF (COG) without ASP's dem_mosaic:
+
+             1. a GDAL Virtual Raster (VRT) is written that references all frames on a common grid.
+                Frames are drawn in the order of the file list, later frames cover earlier frames,
+                and nodata (NaN) pixels are transparent.
+             2. the VRT is streamed block by block into a tiled COG with internal overviews and
+                DEFLATE compression with floating-point or horizontal predictor. The memory use is
+                bounded by the GDAL block cache (CACHE_MB), not by the size of the mosaic.
+
+         Single frames can be converted to COG with geotiff_to_cog().
+
+         COG specification: https://docs.ogc.org/is/21-026/21-026.html
+         GDAL COG driver:   https://gdal.org/en/stable/drivers/raster/cog.html
+
+usage in code:
+    from mosaic_geotiffs_to_cog import build_vrt, mosaic_geotiffs_to_cog
+    f_name_cog = mosaic_geotiffs_to_cog(f_names_ndwi, "IOCAM1B_2019_GR_NASA_20190506_ndwi_mosaic.tif")
+"""
+
+import os
+import numpy as np
+from   xml.sax.saxutils import escape
+
+# numpy dtype to GDAL data type names used in VRT files
+GDAL_DTYPES = {"uint8": "Byte", "int8": "Int8", "uint16": "UInt16", "int16": "Int16", "uint32": "UInt32",
+               "int32": "Int32", "float32": "Float32", "float64": "Float64"}
+
+#%% build virtual raster (VRT) mosaic
+
+def build_vrt(
+    f_names:list,               # list of GeoTiff file names. later frames are drawn on top of earlier frames
+    f_name_vrt:str,             # output VRT file name
+    RESOLUTION = "average",     # pixel size of the mosaic: "average", "highest", "lowest" or a value in CRS units
+    ) -> str:                   # VRT file name
+
+    """
+      write a GDAL Virtual Raster (VRT) mosaic of north-up GeoTiff frames with the same coordinate
+      system, data type and number of bands. Only the file headers are read.
+    """
+
+    import rasterio
+
+    if len(f_names) == 0:
+        raise ValueError("\n\tERROR: no files to mosaic. Abort.")
+
+    frames = []
+    for f_name in f_names:
+        with rasterio.open(f_name) as src:
+            if src.transform.b != 0.0 or src.transform.d != 0.0:
+                raise ValueError(f"\n\tERROR: {f_name} is not north-up. Only north-up frames can be mosaicked. Abort.")
+            frames.append({"f_name": os.path.abspath(f_name), "bounds": src.bounds, "res": src.res,
+                           "width": src.width, "height": src.height, "count": src.count,
+                           "dtype": src.dtypes[0], "nodata": src.nodata, "crs": src.crs,
+                           "block": src.block_shapes[0]})
+
+    ref = frames[0]
+    for frame in frames[1:]:
+        if frame["crs"] != ref["crs"] or frame["count"] != ref["count"] or frame["dtype"] != ref["dtype"]:
+            raise ValueError(f"\n\tERROR: {frame['f_name']} differs in CRS, number of bands or data type from {ref['f_name']}. Abort.")
+
+    res_all = np.array([f["res"] for f in frames])
+    if RESOLUTION == "average":
+        res_x, res_y = res_all.mean(axis=0)
+    elif RESOLUTION == "highest":
+        res_x, res_y = res_all.min(axis=0)
+    elif RESOLUTION == "lowest":
+        res_x, res_y = res_all.max(axis=0)
+    else:
+        res_x = res_y = float(RESOLUTION)
+
+    # mosaic grid aligned to multiples of the pixel size
+    left   = np.floor(min(f["bounds"].left   for f in frames) / res_x) * res_x
+    right  = np.ceil (max(f["bounds"].right  for f in frames) / res_x) * res_x
+    bottom = np.floor(min(f["bounds"].bottom for f in frames) / res_y) * res_y
+    top    = np.ceil (max(f["bounds"].top    for f in frames) / res_y) * res_y
+    left, right, bottom, top, res_x, res_y = (float(v) for v in (left, right, bottom, top, res_x, res_y))
+    width  = int(round((right - left) / res_x))
+    height = int(round((top - bottom) / res_y))
+
+    dtype_gdal = GDAL_DTYPES[ref["dtype"]]
+    nodata = ref["nodata"]
+    if nodata is None and np.dtype(ref["dtype"]).kind == "f":
+        nodata = np.nan
+    nodata_str = None if nodata is None else ("nan" if np.isnan(nodata) else repr(float(nodata)))
+
+    lines = [f'<VRTDataset rasterXSize="{width:d}" rasterYSize="{height:d}">',
+             f'  <SRS>{escape(ref["crs"].to_wkt())}</SRS>',
+             f'  <GeoTransform>{left!r}, {res_x!r}, 0.0, {top!r}, 0.0, {-res_y!r}</GeoTransform>']
+    for band in range(1, ref["count"] + 1):
+        lines.append(f'  <VRTRasterBand dataType="{dtype_gdal:s}" band="{band:d}">')
+        if nodata_str is not None:
+            lines.append(f'    <NoDataValue>{nodata_str:s}</NoDataValue>')
+        for f in frames:
+            x_off  = float((f["bounds"].left - left) / res_x)
+            y_off  = float((top - f["bounds"].top) / res_y)
+            x_size = float((f["bounds"].right - f["bounds"].left) / res_x)
+            y_size = float((f["bounds"].top - f["bounds"].bottom) / res_y)
+            lines += ['    <ComplexSource>',
+                      f'      <SourceFilename relativeToVRT="0">{escape(f["f_name"])}</SourceFilename>',
+                      f'      <SourceBand>{band:d}</SourceBand>',
+                      f'      <SourceProperties RasterXSize="{f["width"]:d}" RasterYSize="{f["height"]:d}" DataType="{dtype_gdal:s}" '
+                      f'BlockXSize="{f["block"][1]:d}" BlockYSize="{f["block"][0]:d}"/>',
+                      f'      <SrcRect xOff="0" yOff="0" xSize="{f["width"]:d}" ySize="{f["height"]:d}"/>',
+                      f'      <DstRect xOff="{x_off!r}" yOff="{y_off!r}" xSize="{x_size!r}" ySize="{y_size!r}"/>']
+            if nodata_str is not None:
+                lines.append(f'      <NODATA>{nodata_str:s}</NODATA>')
+            lines.append('    </ComplexSource>')
+        lines.append('  </VRTRasterBand>')
+    lines.append('</VRTDataset>')
+
+    with open(f_name_vrt, "w", newline="\n") as f_obj:
+        f_obj.write("\n".join(lines) + "\n")
+
+    return f_name_vrt
+
+#%% convert a raster to Cloud-Optimized GeoTIFF
+
+def geotiff_to_cog(
+    f_name_inp:str,             # GeoTiff, VRT or any raster file readable by GDAL
+    f_name_cog:str,             # output COG file name
+    BLOCKSIZE:int = 512,        # internal tile size in pixels
+    COMPRESS:str = "DEFLATE",   # DEFLATE, LZW or ZSTD
+    RESAMPLING:str = "AVERAGE", # resampling method for the internal overviews
+    CACHE_MB:int = 512,         # GDAL block cache size in MB. bounds the memory use
+    ) -> str:                   # COG file name
+
+    """
+      copy a raster into a tiled Cloud-Optimized GeoTIFF with internal overviews. The GDAL COG driver
+      reads the input block by block, so the memory use does not depend on the raster size. The
+      predictor is selected by GDAL: floating-point predictor for float data, horizontal differencing
+      for integer data.
+    """
+
+    import rasterio
+    import rasterio.shutil
+    from   processing_instrumentation import stage, file_size
+
+    with stage("COG write", f_name=f_name_cog) as st:
+        with rasterio.Env(GDAL_CACHEMAX=CACHE_MB, GDAL_NUM_THREADS="ALL_CPUS"):
+            rasterio.shutil.copy(f_name_inp, f_name_cog, driver="COG", BLOCKSIZE=BLOCKSIZE, COMPRESS=COMPRESS,
+                                 PREDICTOR="YES", OVERVIEWS="AUTO", RESAMPLING=RESAMPLING,
+                                 BIGTIFF="IF_SAFER", NUM_THREADS="ALL_CPUS")
+        with rasterio.open(f_name_cog) as dst:
+            st.n_items = dst.width * dst.height * dst.count
+        st.bytes_written = file_size(f_name_cog)
+
+    return f_name_cog
+
+#%% mosaic GeoTiff frames into a Cloud-Optimized GeoTIFF
+
+def mosaic_geotiffs_to_cog(
+    f_names:list,               # list of GeoTiff file names. later frames are drawn on top of earlier frames
+    f_name_cog:str,             # output COG file name
+    RESOLUTION = "average",     # pixel size of the mosaic: "average", "highest", "lowest" or a value in CRS units
+    KEEP_VRT:bool = True,       # keep the VRT next to the COG for inspection in QGIS
+    **kwargs,                   # parameters passed to geotiff_to_cog()
+    ) -> str:                   # COG file name
+
+    """ mosaic GeoTiff frames into a single Cloud-Optimized GeoTIFF via a GDAL Virtual Raster (VRT) """
+
+    from processing_instrumentation import stage
+
+    f_name_vrt = os.path.splitext(f_name_cog)[0] + ".vrt"
+    with stage("COG build VRT", n_items=len(f_names)):
+        build_vrt(f_names, f_name_vrt, RESOLUTION)
+
+    geotiff_to_cog(f_name_vrt, f_name_cog, **kwargs)
+
+    if not KEEP_VRT:
+        os.remove(f_name_vrt)
+
+    return f_name_cog
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_dir_ndwi = r"CAMBOT_L1"  # directory with NDWI_ice GeoTiffs from calculate_L1B_NDWI_geotiffs.py
+    f_names    = sorted(os.path.join(f_dir_ndwi, f) for f in os.listdir(f_dir_ndwi) if f.endswith("_ndwi.tif"))
+
+    tic = time.perf_counter()
+    f_name_cog = mosaic_geotiffs_to_cog(f_names, os.path.join(f_dir_ndwi, "ndwi_mosaic_cog.tif"))
+    toc = time.perf_counter()
+    print(f"\tTime to mosaic {len(f_names):d} frames into {f_name_cog}: {toc - tic:0.1f} seconds")
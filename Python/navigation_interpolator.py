@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: position and attitude of the aircraft at arbitrary times from the IOCAM0 AUX navigation
+         records that are sampled at the camera trigger times:
+
+             https://nsidc.org/data/iocam0/versions/1
+
+         ATM laser shots, KT19 samples and refined image times fall between navigation records.
+         The interpolator is built once from the output of aux_reader() and evaluates any number of
+         query times in one vectorized call. The enclosing records of all query times are found with
+         numpy.searchsorted:
+
+             position: linear interpolation of the GPS antenna position in geocentric ECEF coordinates
+             attitude: spherical linear interpolation (slerp) of unit quaternions built from roll,
+                       pitch and heading (yaw), so that heading crossing 0°/360° is interpolated along
+                       the shortest arc
+
+         The lever arm from the GPS antenna to the sensor (AUX file header, [x-forward, y-starboard, z-down]
+         in the aircraft body frame) is rotated with the interpolated attitude into the local north-east-down
+         frame and then into ECEF, which gives the sensor position at the query times.
+
+         Query times outside the navigation records or inside gaps longer than MAX_GAP_SEC return NaN.
+
+usage in code:
+    from asp_airborne_utilities import aux_reader
+    from navigation_interpolator import NavInterpolator
+    aux_df, _, lever_arm_sensor = aux_reader(f_name_aux)
+    nav = NavInterpolator(aux_df, lever_arm_sensor)
+    nav_df = nav.interpolate(epoch_sec, LEVER_ARM=True)
+"""
+
+import numpy as np
+
+#%% quaternion helper functions (scalar first: w, x, y, z)
+
+def euler_to_quaternion(roll_deg, pitch_deg, yaw_deg):
+    """ unit quaternions (n, 4) of the rotation from the aircraft body frame to north-east-down (yaw-pitch-roll sequence) """
+    r, p, y = (np.deg2rad(np.asarray(a, dtype=np.float64)) * 0.5 for a in (roll_deg, pitch_deg, yaw_deg))
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.stack([cr * cp * cy + sr * sp * sy,
+                     sr * cp * cy - cr * sp * sy,
+                     cr * sp * cy + sr * cp * sy,
+                     cr * cp * sy - sr * sp * cy], axis=-1)
+
+def quaternion_to_euler(q):
+    """ roll, pitch and yaw in degrees of unit quaternions (n, 4). yaw is wrapped to 0° to 360° """
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    roll  = np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0))
+    yaw   = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return np.rad2deg(roll), np.rad2deg(pitch), np.mod(np.rad2deg(yaw), 360.0)
+
+def rotate_by_quaternion(q, v):
+    """ rotate vectors v (n, 3) or (3,) by unit quaternions q (n, 4) """
+    u = q[..., 1:]
+    t = 2.0 * np.cross(u, v)
+    return v + q[..., :1] * t + np.cross(u, t)
+
+def ned_to_ecef(v_ned, lon_deg, lat_deg):
+    """ rotate vectors (n, 3) from the local north-east-down frame at geodetic lon, lat into ECEF """
+    lon, lat = np.deg2rad(lon_deg), np.deg2rad(lat_deg)
+    s_lon, c_lon, s_lat, c_lat = np.sin(lon), np.cos(lon), np.sin(lat), np.cos(lat)
+    n, e, d = v_ned[..., 0], v_ned[..., 1], v_ned[..., 2]
+    return np.stack([-s_lat * c_lon * n - s_lon * e - c_lat * c_lon * d,
+                     -s_lat * s_lon * n + c_lon * e - c_lat * s_lon * d,
+                      c_lat * n                     - s_lat * d], axis=-1)
+
+#%% navigation interpolator
+
+class NavInterpolator():
+
+    """
+      interpolate position and attitude of IOCAM0 AUX navigation records (aux_reader() output) at arbitrary
+      query times in epoch seconds. Everything that depends only on the navigation records (ECEF positions,
+      quaternions, slerp angles) is calculated once when the interpolator is built.
+    """
+
+    def __init__(
+        self,
+        aux_df,                         # DataFrame created from ATM AUX file with function aux_reader()
+        lever_arm_sensor = None,        # lever arm [fwd, right, down] in meters from GPS antenna to sensor (aux_reader() output)
+        MAX_GAP_SEC:float = None,       # query times between records further apart than this return NaN. None = no limit
+        ):
+
+        from crs_transformer_registry import geo_to_ecef
+
+        # check if input aux_df is a Pandas DataFrame with expected column labels
+        columns = ('PosixTime_UTC', 'gps_lon_deg', 'gps_lat_deg', 'gps_ele_m', 'roll_deg', 'pitch_deg', 'yaw_deg')
+        if not all(hasattr(aux_df, col) for col in columns):
+            raise ValueError("\n\tERROR: input variable aux_df must be a DataFrame created with function aux_reader(). Abort.")
+
+        t = np.asarray(aux_df['PosixTime_UTC'], dtype=np.float64)
+        if not np.all(t[1:] >= t[:-1]):
+            raise ValueError("\n\tERROR: time tags are not monotonically increasing. Abort.")
+        keep = np.r_[True, t[1:] > t[:-1]] # drop records with duplicate time tags
+        if np.count_nonzero(keep) < 2:
+            raise ValueError("\n\tERROR: at least two navigation records with different time tags are needed. Abort.")
+
+        self.epoch_sec   = t[keep]                              # time tags of navigation records in epoch seconds
+        self.lever_arm   = None if lever_arm_sensor is None else np.asarray(lever_arm_sensor, dtype=np.float64)
+        self.max_gap_sec = MAX_GAP_SEC
+
+        # GPS antenna positions in ECEF (float64)
+        x, y, z = geo_to_ecef(np.asarray(aux_df['gps_lon_deg'], dtype=np.float64)[keep],
+                              np.asarray(aux_df['gps_lat_deg'], dtype=np.float64)[keep],
+                              np.asarray(aux_df['gps_ele_m'],   dtype=np.float64)[keep])
+        self.xyz_ecef = np.column_stack([x, y, z])
+
+        # attitude quaternions with the sign of each quaternion chosen for the shorter arc to its predecessor
+        q = euler_to_quaternion(np.asarray(aux_df['roll_deg'])[keep], np.asarray(aux_df['pitch_deg'])[keep], np.asarray(aux_df['yaw_deg'])[keep])
+        flip = np.sum(q[1:] * q[:-1], axis=1) < 0.0
+        sign = np.r_[1.0, np.where(np.cumsum(flip) % 2 == 1, -1.0, 1.0)]
+        self.quat = q * sign[:, None]
+
+        # slerp angle and its sine per interval
+        dot = np.clip(np.sum(self.quat[1:] * self.quat[:-1], axis=1), -1.0, 1.0)
+        self._theta     = np.arccos(dot)
+        self._sin_theta = np.sin(self._theta)
+
+    def _locate(self, epoch_sec):
+        """ index of the interval, interpolation weight and validity of the query times """
+        t_q = np.atleast_1d(np.asarray(epoch_sec, dtype=np.float64))
+        i   = np.clip(np.searchsorted(self.epoch_sec, t_q, side='right') - 1, 0, len(self.epoch_sec) - 2)
+        dt  = self.epoch_sec[i + 1] - self.epoch_sec[i]
+        w   = (t_q - self.epoch_sec[i]) / dt
+        valid = (t_q >= self.epoch_sec[0]) & (t_q <= self.epoch_sec[-1]) # False for NaN
+        if self.max_gap_sec is not None:
+            valid &= dt <= self.max_gap_sec
+        return i, w, valid
+
+    def _position(self, i, w, valid):
+        xyz = self.xyz_ecef[i] + w[:, None] * (self.xyz_ecef[i + 1] - self.xyz_ecef[i])
+        xyz[~valid] = np.nan
+        return xyz
+
+    def _quaternion(self, i, w, valid):
+        theta, sin_theta = self._theta[i], self._sin_theta[i]
+        small = sin_theta < 1e-9 # nearly identical attitude: linear interpolation
+        with np.errstate(invalid='ignore', divide='ignore'):
+            w_0 = np.where(small, 1.0 - w, np.sin((1.0 - w) * theta) / sin_theta)
+            w_1 = np.where(small, w,       np.sin(w * theta) / sin_theta)
+        q = w_0[:, None] * self.quat[i] + w_1[:, None] * self.quat[i + 1]
+        q /= np.linalg.norm(q, axis=1, keepdims=True)
+        q[~valid] = np.nan
+        return q
+
+    def position_ecef(self, epoch_sec):
+        """ GPS antenna positions (n, 3) in ECEF in meters """
+        return self._position(*self._locate(epoch_sec))
+
+    def quaternions(self, epoch_sec):
+        """ unit quaternions (n, 4) of the rotation from the aircraft body frame to north-east-down """
+        return self._quaternion(*self._locate(epoch_sec))
+
+    def attitude(self, epoch_sec):
+        """ roll, pitch and yaw (heading, 0° to 360°) in degrees """
+        return quaternion_to_euler(self.quaternions(epoch_sec))
+
+    def sensor_position_ecef(self, epoch_sec, lever_arm = None):
+        """ sensor positions (n, 3) in ECEF in meters: antenna position plus lever arm [fwd, right, down] rotated with the attitude """
+        return self._sensor_position(*self._locate(epoch_sec), lever_arm)[0]
+
+    def _sensor_position(self, i, w, valid, lever_arm = None):
+        from crs_transformer_registry import ecef_to_geo
+
+        lever_arm = self.lever_arm if lever_arm is None else np.asarray(lever_arm, dtype=np.float64)
+        if lever_arm is None:
+            raise ValueError("\n\tERROR: no lever arm. Use the lever arm from aux_reader() or pass one. Abort.")
+
+        xyz = self._position(i, w, valid)
+        q   = self._quaternion(i, w, valid)
+        lon_deg, lat_deg, ele_m = ecef_to_geo(xyz[:, 0], xyz[:, 1], xyz[:, 2])
+        xyz_sensor = xyz + ned_to_ecef(rotate_by_quaternion(q, lever_arm), lon_deg, lat_deg)
+        return xyz_sensor, xyz, q, (lon_deg, lat_deg, ele_m)
+
+    def interpolate(
+        self,
+        epoch_sec,                  # query times in epoch seconds
+        LEVER_ARM:bool = False,     # add sensor position (sensor_lon_deg, sensor_lat_deg, sensor_ele_m)
+        ):
+
+        """
+          return a Pandas DataFrame with the interpolated navigation at the query times with the column
+          names of aux_reader(): PosixTime_UTC, gps_lat_deg, gps_lon_deg, gps_ele_m, roll_deg, pitch_deg, yaw_deg
+        """
+
+        import pandas as pd
+        from   crs_transformer_registry import ecef_to_geo
+
+        t_q = np.atleast_1d(np.asarray(epoch_sec, dtype=np.float64))
+        i, w, valid = self._locate(t_q)
+        if LEVER_ARM:
+            xyz_sensor, xyz, q, (lon_deg, lat_deg, ele_m) = self._sensor_position(i, w, valid)
+        else:
+            xyz = self._position(i, w, valid)
+            q   = self._quaternion(i, w, valid)
+            lon_deg, lat_deg, ele_m = ecef_to_geo(xyz[:, 0], xyz[:, 1], xyz[:, 2])
+        roll_deg, pitch_deg, yaw_deg = quaternion_to_euler(q)
+
+        nav_df = pd.DataFrame({'PosixTime_UTC': t_q, 'gps_lat_deg': lat_deg, 'gps_lon_deg': lon_deg, 'gps_ele_m': ele_m,
+                               'roll_deg': roll_deg, 'pitch_deg': pitch_deg, 'yaw_deg': yaw_deg})
+        if LEVER_ARM:
+            s_lon_deg, s_lat_deg, s_ele_m = ecef_to_geo(xyz_sensor[:, 0], xyz_sensor[:, 1], xyz_sensor[:, 2])
+            nav_df['sensor_lat_deg'] = s_lat_deg
+            nav_df['sensor_lon_deg'] = s_lon_deg
+            nav_df['sensor_ele_m']   = s_ele_m
+
+        return nav_df
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import os
+    import time
+    import tempfile
+    import pandas as pd
+    from   asp_airborne_utilities import aux_reader
+    from   crs_transformer_registry import geo_to_ecef
+
+    # accuracy check with a smooth synthetic trajectory: 2 Hz navigation records of a banked 360° turn
+    # with heading crossing 0°/360°, written to an AUX file with a CAMBOTv2 header and read with aux_reader()
+    def trajectory(t):
+        return pd.DataFrame({'ID': [f"IOCAM0_synthetic_{k:05d}.jpg" for k in range(len(t))],
+                             'Timestamp_UTC': pd.to_datetime(1557148560.0 + t, unit='s').strftime('%Y-%m-%dT%H:%M:%S.%f'),
+                             'PosixTime_UTC': 1557148560.0 + t,
+                             'gps_lat_deg': 69.0 + 0.01 * np.sin(np.deg2rad(1.5 * t)),
+                             'gps_lon_deg': -49.5 + 0.03 * (1.0 - np.cos(np.deg2rad(1.5 * t))),
+                             'gps_ele_m': 1500.0 + 0.5 * t,
+                             'gps_agl_m': 600.0 + 0.5 * t,
+                             'roll_deg': 15.0 + 2.0 * np.sin(2 * np.pi * t / 60.0),
+                             'pitch_deg': 2.0 + 0.5 * np.cos(2 * np.pi * t / 45.0),
+                             'yaw_deg': np.mod(300.0 + 1.5 * t, 360.0)}) # 1.5°/s turn rate
+
+    f_name_aux = os.path.join(tempfile.mkdtemp(prefix="nav_"), "IOCAM0_2019_GR_NASA_20190506_ancillary_data.csv")
+    with open(f_name_aux, 'w', newline='\n') as f_obj:
+        f_obj.write("# Input ancillary file: synthetic.csv,\n")
+        f_obj.write("# Sensor offset from GPS antenna [x-forward, y-starboard, z-down]: 1.234, -0.567, 2.345\n")
+        f_obj.write("# ImageFilename, Timestamp(UTC), PosixTime(UTC), Lat(deg), Lon(deg), AntAlt(m), AGL(m), Roll(deg), Pitch(deg), Heading(deg)\n")
+        trajectory(np.arange(0.0, 240.0, 0.5)).to_csv(f_obj, header=False, index=False, float_format='%.10f')
+    aux_df, _, lever_arm_sensor = aux_reader(f_name_aux)
+
+    def position_error_m(nav_df, ref_df):
+        xyz   = np.column_stack(geo_to_ecef(nav_df['gps_lon_deg'], nav_df['gps_lat_deg'], nav_df['gps_ele_m']))
+        xyz_r = np.column_stack(geo_to_ecef(ref_df['gps_lon_deg'], ref_df['gps_lat_deg'], ref_df['gps_ele_m']))
+        return np.linalg.norm(xyz - xyz_r, axis=1).max()
+
+    def attitude_error_deg(nav_df, ref_df):
+        d_ang = nav_df[['roll_deg', 'pitch_deg', 'yaw_deg']].to_numpy() - ref_df[['roll_deg', 'pitch_deg', 'yaw_deg']].to_numpy()
+        return np.abs(np.mod(d_ang + 180.0, 360.0) - 180.0).max(axis=0)
+
+    # 1) the records are reproduced at their own times
+    nav    = NavInterpolator(aux_df, lever_arm_sensor)
+    nav_df = nav.interpolate(aux_df['PosixTime_UTC'])
+    assert np.array_equal(nav_df['PosixTime_UTC'].to_numpy(), aux_df['PosixTime_UTC'].to_numpy())
+    assert position_error_m(nav_df, aux_df) < 1e-6, "records not reproduced (position)"
+    assert np.all(attitude_error_deg(nav_df, aux_df) < 1e-9), "records not reproduced (attitude)"
+    assert nav.interpolate([nav.epoch_sec[0] - 1.0, nav.epoch_sec[-1] + 1.0]).drop(columns='PosixTime_UTC').isna().all(axis=None)
+    print(f"\tat records : max. position error {position_error_m(nav_df, aux_df):.1e} m, max. attitude error {attitude_error_deg(nav_df, aux_df).max():.1e}°")
+
+    # 2) leave one out: interpolator built from the 1 Hz records, compared with the records in between. the
+    #    tolerances are the interpolation errors expected for the curvature of the turn (chord error of
+    #    about 0.1 m) and the changes of roll and pitch during 1 s
+    nav_1hz = NavInterpolator(aux_df.iloc[::2], lever_arm_sensor)
+    ref_df  = aux_df.iloc[1:-1:2]
+    nav_df  = nav_1hz.interpolate(ref_df['PosixTime_UTC'])
+    d_pos, (d_roll, d_pitch, d_yaw) = position_error_m(nav_df, ref_df), attitude_error_deg(nav_df, ref_df)
+    assert d_pos < 0.25, f"leave-one-out position error {d_pos:.3f} m"
+    assert max(d_roll, d_pitch, d_yaw) < 0.01, f"leave-one-out attitude error {max(d_roll, d_pitch, d_yaw):.4f}°"
+    print(f"\tleft out   : max. position error {d_pos:.3f} m, max. |d_roll| = {d_roll:.4f}°, "
+          f"max. |d_pitch| = {d_pitch:.4f}°, max. |d_yaw| = {d_yaw:.4f}°")
+
+    # 3) lever arm: sensor positions at the records compared with ecef_ant_pos_to_sensor_pos() from
+    #    Jupyter/CAMBOTv2_convert_GPS_to_camera_pos.ipynb (rotation matrices, one record at a time)
+    def ecef_ant_pos_to_sensor_pos(ant_lon, ant_lat, x_ant_ecef, y_ant_ecef, z_ant_ecef, pitch, roll, yaw, lever_arm):
+        ant_ecef = np.array([x_ant_ecef, y_ant_ecef, z_ant_ecef])
+        cp, sp, cr, sr, ch, sh = np.cos(pitch), np.sin(pitch), np.cos(roll), np.sin(roll), np.cos(yaw), np.sin(yaw)
+        T = np.array([[ch*cp, ch*sp*sr-sh*cr, ch*sp*cr+sh*sr],
+                      [sh*cp, sh*sp*sr+ch*cr, sh*sp*cr-ch*sr],
+                      [-1.0*sp,        cp*sr,          cp*cr]])
+        st, ct, sl, cl = np.sin(ant_lat), np.cos(ant_lat), np.sin(ant_lon), np.cos(ant_lon)
+        NED_R = np.array([[-1.0*st*cl, -1.0*sl, -1.0*ct*cl],
+                          [-1.0*st*sl,      cl, -1.0*ct*sl],
+                          [        ct,     0.0,    -1.0*st]])
+        return NED_R @ T @ lever_arm + ant_ecef
+
+    # the rotated lever arm vectors are compared (antenna position zero), because their differences are below the
+    # floating point resolution of ECEF coordinates. the sensor positions are compared with a tolerance of 1 mm
+    lon_rad, lat_rad = np.deg2rad(aux_df['gps_lon_deg'].to_numpy()), np.deg2rad(aux_df['gps_lat_deg'].to_numpy())
+    p_rad, r_rad, y_rad = (np.deg2rad(aux_df[col].to_numpy()) for col in ('pitch_deg', 'roll_deg', 'yaw_deg'))
+    lever_ref = np.array([ecef_ant_pos_to_sensor_pos(lon_rad[k], lat_rad[k], 0.0, 0.0, 0.0, p_rad[k], r_rad[k], y_rad[k], lever_arm_sensor)
+                          for k in range(len(aux_df))])
+    t_rec    = aux_df['PosixTime_UTC']
+    lever    = ned_to_ecef(rotate_by_quaternion(nav.quaternions(t_rec), lever_arm_sensor), aux_df['gps_lon_deg'].to_numpy(), aux_df['gps_lat_deg'].to_numpy())
+    d_lever  = np.linalg.norm(lever - lever_ref, axis=1).max()
+    d_sensor = np.linalg.norm(nav.sensor_position_ecef(t_rec) - (nav.position_ecef(t_rec) + lever_ref), axis=1).max()
+    assert d_lever < 1e-9, f"lever arm differs from notebook by {d_lever:.2e} m"
+    assert d_sensor < 1e-3, f"sensor position differs from notebook by {d_sensor:.2e} m"
+    print(f"\tlever arm  : max. difference to notebook {d_lever:.1e} m (lever arm vectors), {d_sensor:.1e} m (sensor positions)")
+
+    # vectorized evaluation of many query times
+    t_q = np.random.default_rng(0).uniform(nav.epoch_sec[0], nav.epoch_sec[-1], 2000000)
+    tic = time.perf_counter()
+    nav_df = nav.interpolate(t_q, LEVER_ARM=True)
+    toc = time.perf_counter()
+    print(f"\tTime to interpolate {len(t_q):d} query times with lever arm: {toc - tic:0.2f} seconds")
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: predict which CAMBOT frames and pixels are affected by sun glint over supraglacial lakes
+         before running ASP, so that bad frames can be removed from the stereo/SfM processing.
+
+         For every frame the camera pose and intrinsics are read from the ASP .tsai camera model,
+         the trigger time from the file name and the sun azimuth and elevation are calculated for
+         the camera position and time (with Astropy as in the Jupyter notebook
+         calcuate_sun_azimuth_and_elevation.ipynb, or an analytic solar position if Astropy is not
+         installed). The view ray of every pixel of a low-resolution pixel grid is reflected at a
+         flat, horizontal water surface and the specular angle between the reflected ray and the
+         sun is calculated for all pixels and frames of a batch at once with NumPy broadcasting.
+         Pixels with a specular angle below GLINT_ANGLE_DEG are flagged as glint.
+
+         The reflection at a flat water surface does not depend on the water-surface elevation,
+         so no DEM is needed. Lens distortion is ignored, which is well below the resolution of
+         the glint masks. Caustics (sunlight focused by surface waves onto a shallow lake bottom)
+         are strongest for a high sun. The sun elevation is reported for each frame so that
+         frames with caustics risk can be selected as well.
+
+usage in code:
+    from predict_sun_glint import predict_sun_glint
+    glint = predict_sun_glint(f_names_tsai, GLINT_ANGLE_DEG=15.0, RETURN_MASKS=True)
+    f_names_ok = glint.frames.loc[glint.frames.glint_fraction < 0.01, 'f_name']
+"""
+
+import os
+import numpy as np
+
+# CAMBOT 2.0 image size in pixels (width, height) for the 28 mm lens calibration in data/calibration
+CAMBOT_IMG_SIZE = (4896, 3264)
+
+#%% sun position
+
+def _sun_azimuth_elevation_analytic(epoch_sec, lon_deg, lat_deg):
+    """
+      sun azimuth (degrees clockwise from true north) and elevation (degrees, no atmospheric refraction)
+      from the NOAA solar position equations (Meeus, Astronomical Algorithms). Accuracy is better than
+      0.02° for 1950-2050, which is far below the angular size of the sun (0.53°).
+    """
+
+    epoch_sec = np.asarray(epoch_sec, dtype=np.float64)
+    lat_rad   = np.radians(np.asarray(lat_deg, dtype=np.float64))
+
+    jc = (epoch_sec / 86400.0 + 2440587.5 - 2451545.0) / 36525.0 # Julian centuries since J2000.0
+
+    l0_deg = np.mod(280.46646 + jc * (36000.76983 + jc * 0.0003032), 360.0)  # geometric mean longitude
+    m_rad  = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))     # geometric mean anomaly
+    e_orb  = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)            # eccentricity of Earth's orbit
+    c_deg  = (np.sin(m_rad) * (1.914602 - jc * (0.004817 + 0.000014 * jc)) +
+              np.sin(2.0 * m_rad) * (0.019993 - 0.000101 * jc) + np.sin(3.0 * m_rad) * 0.000289)
+    omega_rad  = np.radians(125.04 - 1934.136 * jc)
+    lambda_rad = np.radians(l0_deg + c_deg - 0.00569 - 0.00478 * np.sin(omega_rad)) # apparent longitude
+    eps_rad    = np.radians(23.0 + (26.0 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60.0) / 60.0
+                            + 0.00256 * np.cos(omega_rad)) # obliquity of the ecliptic
+    decl_rad   = np.arcsin(np.sin(eps_rad) * np.sin(lambda_rad))
+
+    # equation of time in minutes
+    y     = np.tan(eps_rad / 2.0)**2
+    l0    = np.radians(l0_deg)
+    eq_t  = 4.0 * np.degrees(y * np.sin(2.0 * l0) - 2.0 * e_orb * np.sin(m_rad) + 4.0 * e_orb * y * np.sin(m_rad) * np.cos(2.0 * l0)
+                             - 0.5 * y**2 * np.sin(4.0 * l0) - 1.25 * e_orb**2 * np.sin(2.0 * m_rad))
+
+    # true solar time and hour angle
+    tst_min  = np.mod(epoch_sec, 86400.0) / 60.0 + eq_t + 4.0 * np.asarray(lon_deg, dtype=np.float64)
+    hour_rad = np.radians(tst_min / 4.0 - 180.0)
+
+    sin_ele = np.sin(lat_rad) * np.sin(decl_rad) + np.cos(lat_rad) * np.cos(decl_rad) * np.cos(hour_rad)
+    ele_deg = np.degrees(np.arcsin(np.clip(sin_ele, -1.0, 1.0)))
+    az_deg  = np.mod(np.degrees(np.arctan2(np.sin(hour_rad), np.cos(hour_rad) * np.sin(lat_rad) - np.tan(decl_rad) * np.cos(lat_rad))) + 180.0, 360.0)
+
+    return az_deg, ele_deg
+
+def sun_azimuth_elevation(
+    epoch_sec,                  # array of times in epoch seconds (UTC)
+    lon_deg,                    # array of longitudes in degrees
+    lat_deg,                    # array of latitudes in degrees
+    ele_m = 0.0,                # array of ellipsoid heights in meters
+    USE_ASTROPY:bool = True,    # use Astropy if it is installed, otherwise the analytic solar position
+    ) -> tuple:                 # sun azimuth (degrees clockwise from true north) and elevation (degrees)
+
+    """
+      sun azimuth and elevation without atmospheric refraction for arrays of times and locations.
+      Astropy (as in calcuate_sun_azimuth_and_elevation.ipynb) is used if it is installed and
+      USE_ASTROPY is True. Otherwise the analytic solar position is used.
+    """
+
+    if USE_ASTROPY:
+        try:
+            import astropy.units as u
+            from   astropy.coordinates import EarthLocation, AltAz, get_sun
+            from   astropy.time import Time
+        except ImportError:
+            USE_ASTROPY = False
+
+    if not USE_ASTROPY:
+        return _sun_azimuth_elevation_analytic(epoch_sec, lon_deg, lat_deg)
+
+    t_utc = Time(np.asarray(epoch_sec, dtype=np.float64), format="unix", scale="utc")
+    loc   = EarthLocation.from_geodetic(lon=np.asarray(lon_deg) * u.deg, lat=np.asarray(lat_deg) * u.deg, height=np.asarray(ele_m) * u.m)
+    sun   = get_sun(t_utc).transform_to(AltAz(obstime=t_utc, location=loc))
+
+    return sun.az.deg, sun.alt.deg
+
+#%% camera models
+
+def read_tsai_poses(
+    f_names_tsai:list,          # list of ASP .tsai camera model files with camera pose in ECEF coordinates
+    ) -> tuple:                 # camera centers (n, 3), camera-to-world rotation matrices (n, 3, 3), intrinsics (n, 5): fu, fv, cu, cv, pitch
+
+    """ read camera centers, rotation matrices and intrinsics from ASP .tsai camera model files """
+
+    from parse_ASP_TSAI_camera_calibration_files import parse_asp_tsai_file
+
+    n_frames   = len(f_names_tsai)
+    center     = np.full((n_frames, 3), np.nan)
+    rot_mat    = np.full((n_frames, 3, 3), np.nan)
+    intrinsics = np.full((n_frames, 5), np.nan)
+
+    for i, f_name in enumerate(f_names_tsai):
+        tsai_params = parse_asp_tsai_file(f_name)
+        if not (hasattr(tsai_params, 'x') & hasattr(tsai_params, 'm1')):
+            print(f"{os.path.basename(f_name):s}: camera pose is undefined. Skipped.")
+            continue
+        center[i]     = (tsai_params.x, tsai_params.y, tsai_params.z)
+        rot_mat[i]    = np.reshape([getattr(tsai_params, f"m{k:d}") for k in range(1, 10)], (3, 3))
+        intrinsics[i] = (tsai_params.fu, tsai_params.fv, tsai_params.cu, tsai_params.cv, tsai_params.pitch or 1.0)
+
+    return center, rot_mat, intrinsics
+
+def _enu_basis(lon_deg, lat_deg):
+    """ rows are the east, north and up unit vectors in ECEF coordinates: array (n, 3, 3) """
+    lon = np.radians(lon_deg)
+    lat = np.radians(lat_deg)
+    sin_lon, cos_lon, sin_lat, cos_lat = np.sin(lon), np.cos(lon), np.sin(lat), np.cos(lat)
+    zero = np.zeros_like(lon)
+    return np.stack([np.stack([-sin_lon, cos_lon, zero], axis=-1),
+                     np.stack([-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat], axis=-1),
+                     np.stack([cos_lat * cos_lon, cos_lat * sin_lon, sin_lat], axis=-1)], axis=1)
+
+#%% sun glint prediction
+
+def predict_sun_glint(
+    f_names_tsai:list,                  # list of ASP .tsai camera model files named after the CAMBOT frames
+    epoch_sec = None,                   # array of frame times in epoch seconds. default: from the file names
+    IMG_SIZE:tuple = CAMBOT_IMG_SIZE,   # image width and height in pixels
+    STEP:int = 32,                      # pixel spacing of the low-resolution glint grid
+    GLINT_ANGLE_DEG:float = 15.0,       # maximum angle between reflected view ray and sun. 15° ≈ wave facets tilted by up to 7.5°
+    USE_ASTROPY:bool = True,            # use Astropy for the sun position if it is installed
+    RETURN_MASKS:bool = False,          # return low-resolution glint masks (n_frames, rows, columns)
+    N_BATCH:int = 256,                  # number of frames processed at once. bounds the memory use
+    ) -> object:                        # a class with a DataFrame of per-frame results and the optional masks
+
+    """
+      predict the sun glint of CAMBOT frames over flat water from ASP camera models and the sun position.
+      Per frame, the fraction of glint pixels, the minimum specular angle and the sun azimuth and
+      elevation are returned. Frames without camera pose or valid time have NaN values.
+    """
+
+    import pandas as pd
+    from   asp_airborne_utilities import image_names_to_epoch
+    from   crs_transformer_registry import ecef_to_geo
+    from   processing_instrumentation import stage
+
+    class GlintPrediction():
+        def __init__(self):
+            self.frames  = None # DataFrame with one row per frame
+            self.masks   = None # boolean array (n_frames, rows, columns) of glint pixels or None
+            self.pix_col = None # image columns of the low-resolution grid
+            self.pix_row = None # image rows of the low-resolution grid
+
+    n_frames = len(f_names_tsai)
+
+    with stage("glint read camera models", n_items=n_frames):
+        center, rot_mat, intrinsics = read_tsai_poses(f_names_tsai)
+
+    if epoch_sec is None:
+        epoch_sec = image_names_to_epoch(f_names_tsai)
+    epoch_sec = np.asarray(epoch_sec, dtype=np.float64)
+    if epoch_sec.shape != (n_frames,):
+        raise ValueError(f"\n\tERROR: {epoch_sec.size:d} frame times for {n_frames:d} camera models. Abort.")
+
+    with stage("glint sun position", n_items=n_frames):
+        lon_deg, lat_deg, ele_m = ecef_to_geo(center[:, 0], center[:, 1], center[:, 2])
+        lon_deg, lat_deg, ele_m = np.asarray(lon_deg), np.asarray(lat_deg), np.asarray(ele_m)
+        valid = np.isfinite(center[:, 0]) & np.isfinite(epoch_sec)
+        sun_az = np.full(n_frames, np.nan)
+        sun_ele = np.full(n_frames, np.nan)
+        if np.any(valid):
+            sun_az[valid], sun_ele[valid] = sun_azimuth_elevation(epoch_sec[valid], lon_deg[valid], lat_deg[valid], ele_m[valid], USE_ASTROPY)
+
+    # sun direction in the local east, north, up frame
+    sun_az_rad, sun_ele_rad = np.radians(sun_az), np.radians(sun_ele)
+    sun_enu = np.stack([np.cos(sun_ele_rad) * np.sin(sun_az_rad), np.cos(sun_ele_rad) * np.cos(sun_az_rad), np.sin(sun_ele_rad)], axis=-1)
+
+    # low-resolution pixel grid at pixel centers (same for all frames)
+    pix_col = np.arange(STEP // 2, IMG_SIZE[0], STEP, dtype=np.float64)
+    pix_row = np.arange(STEP // 2, IMG_SIZE[1], STEP, dtype=np.float64)
+    uu, vv  = np.meshgrid(pix_col, pix_row)
+    uu, vv  = uu.ravel(), vv.ravel()
+    n_pix   = uu.size
+
+    cos_glint = np.cos(np.radians(GLINT_ANGLE_DEG))
+    glint_fraction  = np.full(n_frames, np.nan)
+    min_angle_deg   = np.full(n_frames, np.nan)
+    water_fraction  = np.full(n_frames, np.nan)
+    masks = np.zeros((n_frames, pix_row.size, pix_col.size), dtype=bool) if RETURN_MASKS else None
+
+    with stage("glint specular angles", n_items=int(valid.sum()) * n_pix):
+        i_valid = np.flatnonzero(valid)
+        for i_start in range(0, i_valid.size, N_BATCH):
+            idx = i_valid[i_start:i_start + N_BATCH]
+
+            # view rays in camera coordinates (x, y, 1) of the pinhole model of each frame: (batch, pixels)
+            fu, fv, cu, cv, pitch = (intrinsics[idx, k][:, np.newaxis] for k in range(5))
+            x_cam = ((uu * pitch - cu) / fu).astype(np.float32)
+            y_cam = ((vv * pitch - cv) / fv).astype(np.float32)
+            inv_norm = 1.0 / np.sqrt(x_cam * x_cam + y_cam * y_cam + 1.0)
+
+            # camera to local east, north, up: ENU rows (ECEF) times camera-to-ECEF rotation. the reflection of a
+            # view ray r at the horizontal water surface (normal = up) is (r_e, r_n, -r_u), so the cosine of the
+            # specular angle is r · (s_e, s_n, -s_u). both dot products are evaluated in camera coordinates.
+            cam_to_enu = np.matmul(_enu_basis(lon_deg[idx], lat_deg[idx]), rot_mat[idx])
+            sun_mirror = sun_enu[idx] * np.array([1.0, 1.0, -1.0])
+            w_sun = np.einsum('bij,bi->bj', cam_to_enu, sun_mirror).astype(np.float32)
+            w_up  = cam_to_enu[:, 2, :].astype(np.float32)
+
+            hits_water = (x_cam * w_up[:, 0:1] + y_cam * w_up[:, 1:2] + w_up[:, 2:3]) < 0.0
+            cos_angle  = (x_cam * w_sun[:, 0:1] + y_cam * w_sun[:, 1:2] + w_sun[:, 2:3]) * inv_norm
+            cos_angle  = np.where(hits_water, cos_angle, -1.0)
+            glint      = cos_angle >= cos_glint
+
+            n_water = hits_water.sum(axis=1)
+            water_fraction[idx] = n_water / n_pix
+            glint_fraction[idx] = glint.sum(axis=1) / np.maximum(n_water, 1)
+            min_angle_deg[idx]  = np.where(n_water > 0, np.degrees(np.arccos(np.clip(cos_angle.max(axis=1), -1.0, 1.0))), np.nan)
+            if RETURN_MASKS:
+                masks[idx] = glint.reshape(idx.size, pix_row.size, pix_col.size)
+
+    glint_prediction = GlintPrediction()
+    glint_prediction.frames = pd.DataFrame({'f_name': [os.path.basename(f) for f in f_names_tsai], 'epoch_sec': epoch_sec,
+                                            'lon_deg': lon_deg, 'lat_deg': lat_deg, 'ele_m': ele_m,
+                                            'sun_az_deg': sun_az, 'sun_ele_deg': sun_ele,
+                                            'glint_fraction': glint_fraction, 'min_specular_angle_deg': min_angle_deg,
+                                            'water_view_fraction': water_fraction})
+    glint_prediction.masks   = masks
+    glint_prediction.pix_col = pix_col
+    glint_prediction.pix_row = pix_row
+
+    return glint_prediction
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    f_dir_tsai = r".." + os.sep + "data" + os.sep + "example_files"
+    f_names    = sorted(os.path.join(f_dir_tsai, f) for f in os.listdir(f_dir_tsai) if f.endswith(".tsai"))
+
+    tic = time.perf_counter()
+    glint = predict_sun_glint(f_names, RETURN_MASKS=True)
+    toc = time.perf_counter()
+
+    with np.printoptions(precision=3, suppress=True):
+        print(glint.frames.T)
+    print(f"\n\tTime to predict sun glint for {len(f_names):d} frames: {toc - tic:0.2f} seconds")
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: reusable prefetching pipeline for per-frame image loops. Instead of running
+
+             read -> compute -> compress and write
+
+         strictly in order for one frame after the other, the three steps run in separate stages that
+         are connected by bounded queues:
+
+             reader threads   prefetch the next frames from disk
+             compute threads  run the kernel (e.g., NDWI_ice or luminance)
+             writer threads   encode (LZW, DEFLATE) and write the results
+
+         While one frame is compressed and written the next frames are already read and computed, so
+         that the CPU does not sit idle during disk I/O and the disk does not sit idle during compression.
+         GDAL, NumPy and the compression libraries release the GIL, so threads are sufficient.
+
+         The number of threads per stage and the queue depth are configurable. The queue depth limits
+         the number of frames held in memory per stage. A read function that returns None skips the frame
+         (e.g., output up to date in the processing manifest). An exception in any stage stops the pipeline
+         and is raised again in the calling thread.
+
+usage in code:
+    from prefetch_pipeline import run_pipeline
+    results = run_pipeline(f_names, read_frame, compute_frame, write_frame, N_READERS=2, N_WRITERS=2, QUEUE_DEPTH=4)
+"""
+
+import queue
+import threading
+
+_DONE = object() # end-of-stream marker passed to the next stage
+
+#%% prefetching pipeline
+
+def run_pipeline(
+    items:list,                 # items to process, e.g., list of (input, output) file names
+    read_fn,                    # read_fn(item) -> data or None to skip the item
+    compute_fn,                 # compute_fn(item, data) -> result passed to write_fn
+    write_fn,                   # write_fn(item, result) -> return value stored for the item
+    N_READERS:int = 2,          # number of reader threads
+    N_COMPUTE:int = 1,          # number of compute threads
+    N_WRITERS:int = 2,          # number of writer threads
+    QUEUE_DEPTH:int = 4,        # maximum number of items waiting between two stages
+    NAME:str = "pipeline",      # name of the stage in processing_instrumentation.py
+    ) -> list:                  # return values of write_fn in the order of items (None for skipped items)
+
+    """
+      run read_fn, compute_fn and write_fn for all items in three threaded stages connected by bounded
+      queues. Items are processed in input order by each stage, but can finish in any order when a stage
+      has more than one thread.
+    """
+
+    from processing_instrumentation import stage
+
+    if min(N_READERS, N_COMPUTE, N_WRITERS, QUEUE_DEPTH) < 1:
+        raise ValueError("\n\tERROR: N_READERS, N_COMPUTE, N_WRITERS and QUEUE_DEPTH must be at least 1. Abort.")
+
+    items   = list(items)
+    results = [None] * len(items)
+
+    q_items   = queue.Queue()
+    q_read    = queue.Queue(maxsize=QUEUE_DEPTH)
+    q_compute = queue.Queue(maxsize=QUEUE_DEPTH)
+    for i, item in enumerate(items):
+        q_items.put((i, item))
+
+    stop   = threading.Event() # set on the first exception
+    errors = []
+
+    def put(q, obj):
+        """ blocking put that gives up when the pipeline is stopped, so that no thread waits forever """
+        while not stop.is_set():
+            try:
+                q.put(obj, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    # the last thread of a stage to finish passes one end-of-stream marker per thread to the next stage
+    n_running = {"read": N_READERS, "compute": N_COMPUTE}
+    n_lock    = threading.Lock()
+
+    def finish(name, q_out, n_next):
+        with n_lock:
+            n_running[name] -= 1
+            last = n_running[name] == 0
+        if last:
+            for _ in range(n_next):
+                put(q_out, _DONE)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                try:
+                    i, item = q_items.get_nowait()
+                except queue.Empty:
+                    break
+                data = read_fn(item)
+                if data is not None:
+                    put(q_read, (i, item, data))
+        except BaseException as err:
+            errors.append(err)
+            stop.set()
+        finally:
+            finish("read", q_read, N_COMPUTE)
+
+    def computer():
+        try:
+            while True:
+                task = get(q_read)
+                if task is _DONE:
+                    break
+                i, item, data = task
+                put(q_compute, (i, item, compute_fn(item, data)))
+        except BaseException as err:
+            errors.append(err)
+            stop.set()
+        finally:
+            finish("compute", q_compute, N_WRITERS)
+
+    def writer():
+        try:
+            while True:
+                task = get(q_compute)
+                if task is _DONE:
+                    break
+                i, item, result = task
+                results[i] = write_fn(item, result)
+        except BaseException as err:
+            errors.append(err)
+            stop.set()
+
+    threads = ([threading.Thread(target=reader,   name=f"{NAME}-read-{k}",    daemon=True) for k in range(N_READERS)] +
+               [threading.Thread(target=computer, name=f"{NAME}-compute-{k}", daemon=True) for k in range(N_COMPUTE)] +
+               [threading.Thread(target=writer,   name=f"{NAME}-write-{k}",   daemon=True) for k in range(N_WRITERS)])
+
+    with stage(NAME, n_items=len(items)):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+
+    return results
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import time
+
+    # frames that take 20 ms to read, 20 ms to compute and 20 ms to write (GIL released like in GDAL and NumPy)
+    def read_frame(item):
+        time.sleep(0.02)
+        return item
+
+    def compute_frame(item, data):
+        time.sleep(0.02)
+        return data * 2
+
+    def write_frame(item, result):
+        time.sleep(0.02)
+        return result
+
+    frames = list(range(50))
+
+    tic = time.perf_counter()
+    serial = [write_frame(f, compute_frame(f, read_frame(f))) for f in frames]
+    toc = time.perf_counter()
+    print(f"\tTime for {len(frames):d} frames in a serial loop: {toc - tic:0.2f} seconds")
+
+    tic = time.perf_counter()
+    results = run_pipeline(frames, read_frame, compute_frame, write_frame)
+    toc = time.perf_counter()
+    print(f"\tTime for {len(frames):d} frames in the pipeline : {toc - tic:0.2f} seconds (identical results: {results == serial})")
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: lightweight instrumentation layer for per-stage timing and throughput reporting.
+         All tools in this repository report their processing stages through the stage()
+         context manager or the timed_stage() decorator. Each stage records:
+
+             wall time in seconds
+             bytes read and written
+             number of items processed (rows, laser shots, pixels, frames)
+             peak resident set size (RSS) of the process in MB
+
+         Records are collected in memory and can be written as JSON lines or printed as a
+         summary table. If a JSON lines file is given, records are only appended to this file and
+         are not kept in memory, so that long campaign runs with per-frame stages do not grow the
+         memory use (see read_records_jsonl()). Recording is disabled by default. When disabled, a stage only measures
+         its wall time with time.perf_counter(), so the overhead is negligible.
+
+         Recording is enabled with enable_instrumentation() or by setting the environment
+         variable ATM_SFM_INSTRUMENTATION to a file name for JSON lines output (or to 1 to
+         collect records in memory only).
+
+usage in code:
+    from processing_instrumentation import stage, timed_stage
+    with stage("save GPKG", f_name=f_name_gis, n_items=len(atm_gdf)) as st:
+        atm_gdf.to_file(f_name_gis, driver="GPKG")
+        st.bytes_written = os.path.getsize(f_name_gis)
+    print(f"Time to save GeoPackage (GPKG) file: {st.wall_s:0.1f} seconds")
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+#%% collector state
+
+_enabled     = False
+_f_name_jsonl = None
+_f_obj_jsonl = None # append handle of _f_name_jsonl, kept open while recording
+_records     = []
+_lock        = threading.Lock()
+
+def _close_jsonl():
+    global _f_obj_jsonl
+    with _lock:
+        if _f_obj_jsonl is not None:
+            _f_obj_jsonl.close()
+            _f_obj_jsonl = None
+
+atexit.register(_close_jsonl)
+
+def enable_instrumentation(f_name_jsonl:str = None):
+    """
+    enable recording of stage records. if f_name_jsonl is given, every record is appended
+    to this file as one JSON object per line (JSON lines) instead of being kept in memory,
+    which is safe to use from several worker processes writing to the same file.
+    """
+    global _enabled, _f_name_jsonl, _f_obj_jsonl
+    _close_jsonl()
+    with _lock:
+        _f_name_jsonl = f_name_jsonl
+        # unbuffered append: each record is a single write call, so that lines of several processes stay intact
+        _f_obj_jsonl  = open(f_name_jsonl, "ab", buffering=0) if f_name_jsonl else None
+    _enabled = True
+
+def disable_instrumentation():
+    """ disable recording of stage records. collected records are kept and the JSON lines file is closed """
+    global _enabled
+    _enabled = False
+    _close_jsonl()
+
+def is_enabled() -> bool:
+    return _enabled
+
+def get_records() -> list:
+    """ return a copy of the stage records collected in memory (list of dictionaries). empty when streaming to JSON lines """
+    with _lock:
+        return list(_records)
+
+def clear_records():
+    with _lock:
+        _records.clear()
+
+# enable from environment, e.g., for cluster job arrays: ATM_SFM_INSTRUMENTATION=/scratch/run_0001.jsonl
+_env = os.environ.get("ATM_SFM_INSTRUMENTATION", "").strip()
+if _env and _env != "0":
+    enable_instrumentation(None if _env == "1" else _env)
+
+#%% peak memory
+
+def peak_rss_mb():
+    """ peak resident set size of this process in MB (None if not available on this platform) """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024.0**2 if sys.platform == 'darwin' else peak / 1024.0 # bytes on macOS, kilobytes on Linux
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024.0**2 # Windows
+        except (ImportError, AttributeError):
+            return None
+
+#%% stage record, context manager and decorator
+
+class StageRecord():
+    """
+    record of a single processing stage. the counters bytes_read, bytes_written and n_items
+    can be set or incremented inside the with block.
+    """
+    __slots__ = ("name", "f_name", "bytes_read", "bytes_written", "n_items", "t_start", "wall_s", "peak_rss_mb", "pid")
+
+    def __init__(self, name, f_name=None, bytes_read=0, bytes_written=0, n_items=0):
+        self.name          = name          # name of the processing stage
+        self.f_name        = f_name        # file name processed in this stage (optional)
+        self.bytes_read    = bytes_read    # number of bytes read
+        self.bytes_written = bytes_written # number of bytes written
+        self.n_items       = n_items       # number of rows, laser shots, pixels or frames processed
+        self.t_start       = None          # start time in epoch seconds
+        self.wall_s        = None          # wall time in seconds
+        self.peak_rss_mb   = None          # peak resident set size of the process in MB at the end of the stage
+        self.pid           = None          # process id
+
+    def as_dict(self):
+        rec = {k: getattr(self, k) for k in self.__slots__}
+        rec["items_per_s"] = (self.n_items / self.wall_s) if (self.n_items and self.wall_s) else None
+        rec["mb_per_s"]    = ((self.bytes_read + self.bytes_written) / 1024.0**2 / self.wall_s) if self.wall_s else None
+        return rec
+
+def _collect(rec):
+    rec_dict = rec.as_dict()
+    with _lock:
+        if _f_obj_jsonl is not None:
+            _f_obj_jsonl.write((json.dumps(rec_dict) + "\n").encode("utf-8"))
+        else:
+            _records.append(rec_dict)
+
+@contextmanager
+def stage(name:str, f_name:str = None, bytes_read:int = 0, bytes_written:int = 0, n_items:int = 0):
+    """
+    context manager that measures the wall time of a processing stage and, if instrumentation
+    is enabled, records bytes read/written, items processed and peak RSS. the StageRecord is
+    returned by the with statement, so that counters can be updated inside the block and the
+    wall time (st.wall_s) can be used after the block.
+    """
+    rec = StageRecord(name, f_name, bytes_read, bytes_written, n_items)
+    tic = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec.wall_s = time.perf_counter() - tic
+        if _enabled:
+            rec.t_start     = time.time() - rec.wall_s
+            rec.peak_rss_mb = peak_rss_mb()
+            rec.pid         = os.getpid()
+            _collect(rec)
+
+def timed_stage(name:str = None):
+    """ decorator that wraps a function call in a stage with the function name as default stage name """
+    def decorator(func):
+        stage_name = name or func.__name__
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def file_size(f_name:str) -> int:
+    """ size of a file in bytes, 0 if the file does not exist. used for bytes_read/bytes_written """
+    try:
+        return os.path.getsize(f_name)
+    except OSError:
+        return 0
+
+#%% reporting
+
+def write_records_jsonl(f_name_jsonl:str, records:list = None):
+    """ write collected stage records (or the given records) as JSON lines """
+    records = get_records() if records is None else records
+    with open(f_name_jsonl, "w") as f_obj:
+        for rec in records:
+            f_obj.write(json.dumps(rec) + "\n")
+
+def read_records_jsonl(f_name_jsonl:str) -> list:
+    """ read stage records from a JSON lines file, e.g., written by several worker processes """
+    with open(f_name_jsonl, "r") as f_obj:
+        return [json.loads(line) for line in f_obj if line.strip()]
+
+def summarize_records(records:list = None, PRINT:bool = True) -> list:
+    """
+    aggregate stage records by stage name and return (and print) a summary table with number of calls,
+    total and mean wall time, share of total time, data volume, items processed, throughput and peak RSS
+    """
+    records = get_records() if records is None else records
+
+    summary = {}
+    for rec in records:
+        s = summary.setdefault(rec["name"], {"name": rec["name"], "calls": 0, "wall_s": 0.0, "bytes_read": 0,
+                                             "bytes_written": 0, "n_items": 0, "peak_rss_mb": 0.0})
+        s["calls"]         += 1
+        s["wall_s"]        += rec["wall_s"] or 0.0
+        s["bytes_read"]    += rec["bytes_read"] or 0
+        s["bytes_written"] += rec["bytes_written"] or 0
+        s["n_items"]       += rec["n_items"] or 0
+        s["peak_rss_mb"]    = max(s["peak_rss_mb"], rec["peak_rss_mb"] or 0.0)
+
+    rows = sorted(summary.values(), key=lambda s: s["wall_s"], reverse=True)
+    t_total = sum(s["wall_s"] for s in rows)
+
+    if PRINT:
+        print(f"{'stage':36s} {'calls':>6s} {'total [s]':>10s} {'mean [s]':>9s} {'share':>6s} {'read [MB]':>10s} {'written [MB]':>12s} {'items':>12s} {'items/s':>11s} {'RSS [MB]':>9s}")
+        for s in rows:
+            items_per_s = s["n_items"] / s["wall_s"] if (s["n_items"] and s["wall_s"]) else 0.0
+            share = s["wall_s"] / t_total * 100.0 if t_total > 0 else 0.0
+            print(f"{s['name'][:36]:36s} {s['calls']:6d} {s['wall_s']:10.2f} {s['wall_s']/s['calls']:9.3f} {share:5.1f}% "
+                  f"{s['bytes_read']/1024.0**2:10.1f} {s['bytes_written']/1024.0**2:12.1f} {s['n_items']:12d} {items_per_s:11.0f} {s['peak_rss_mb']:9.0f}")
+
+    return rows
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print a summary table of stage records from JSON lines files.")
+    parser.add_argument("f_names_jsonl", nargs="+", help="JSON lines files written with ATM_SFM_INSTRUMENTATION=<file>")
+    args = parser.parse_args()
+
+    records = []
+    for f_name_jsonl in args.f_names_jsonl:
+        records += read_records_jsonl(f_name_jsonl)
+    summarize_records(records)
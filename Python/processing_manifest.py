@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19, 2026
+
+@author: Michael Studinger, NASA - Goddard Space Flight Center
+
+Purpose: shared processing manifest for incremental processing during a campaign. For each processing
+         task and input file the manifest records:
+
+             input file size, modification time and (optionally) BLAKE2 hash
+             processing parameters (JSON)
+             output file names with their size and modification time
+
+         Before a converter processes a file it asks needs_processing(). The work is skipped if the input
+         file, the parameters and all output files are unchanged since the last successful run. After
+         the outputs are written the converter calls record_run().
+
+         The manifest is a SQLite database. By default a single manifest in the user cache directory is
+         used for all input files ($XDG_CACHE_HOME/atm_sfm or ~/.cache/atm_sfm, %LOCALAPPDATA%\atm_sfm on
+         Windows), so that no files are written into the data directories. Input files are stored with
+         their absolute path. A different manifest can be set with the environment variable
+         ATM_SFM_MANIFEST=<file.sqlite>.
+
+         set_force() reprocesses all files regardless of the manifest and set_dry_run() only reports what
+         would be processed without writing any output (see print_dry_run_report()). set_hash() stores the
+         BLAKE2 hash of the input files, so that files with a new modification time but unchanged content
+         (e.g., copied again from the aircraft) are not processed again.
+
+usage in code:
+    from processing_manifest import needs_processing, record_run
+    params  = {"EPSG_OUT": EPSG_OUT}
+    if needs_processing("ATM LAS", f_name_atm, params, [f_name_las], FORCE):
+        ...  # write f_name_las
+        record_run("ATM LAS", f_name_atm, params, [f_name_las])
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+MANIFEST_NAME = "atm_sfm_manifest.sqlite"
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    task         TEXT NOT NULL,
+    input_path   TEXT NOT NULL,
+    input_size   INTEGER,
+    input_mtime  REAL,
+    input_hash   TEXT,
+    params       TEXT,
+    outputs      TEXT,
+    t_done       REAL,
+    PRIMARY KEY (task, input_path)
+);
+"""
+
+#%% global processing options
+
+_force   = False
+_dry_run = False
+_hash    = False
+_report  = []
+_lock    = threading.Lock()
+
+def set_force(FORCE:bool = True):
+    """ reprocess all files regardless of the manifest """
+    global _force
+    _force = bool(FORCE)
+
+def set_dry_run(DRY_RUN:bool = True):
+    """ report which files would be processed without processing them """
+    global _dry_run
+    _dry_run = bool(DRY_RUN)
+
+def set_hash(HASH:bool = True):
+    """ record and compare the BLAKE2 hash of the input files """
+    global _hash
+    _hash = bool(HASH)
+
+def is_dry_run() -> bool:
+    return _dry_run
+
+def get_dry_run_report() -> list:
+    """ list of (task, input file, status) with status "run", "forced" or "up to date" """
+    with _lock:
+        return list(_report)
+
+def print_dry_run_report():
+    report = get_dry_run_report()
+    n_run  = sum(1 for _, _, status in report if status != "up to date")
+    for task, f_name_inp, status in report:
+        print(f"{'would run' if status != 'up to date' else 'up to date':10s} {task:20s} {f_name_inp:s}{' (forced)' if status == 'forced' else ''}")
+    print(f"\n{n_run:d} of {len(report):d} tasks would run")
+
+#%% file signatures and manifest database
+
+def file_hash(f_name:str, CHUNK_SIZE:int = 1 << 20) -> str:
+    """ BLAKE2b hash of a file read in chunks """
+    h = hashlib.blake2b(digest_size=20)
+    with open(f_name, "rb") as f_obj:
+        for chunk in iter(lambda: f_obj.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _signature(f_name):
+    """ (size, mtime) of a file or None if it does not exist """
+    try:
+        st = os.stat(f_name)
+        return st.st_size, st.st_mtime
+    except OSError:
+        return None
+
+def manifest_path(f_name_inp:str = None) -> str:
+    """ manifest file: ATM_SFM_MANIFEST or atm_sfm_manifest.sqlite in the user cache directory """
+    if os.environ.get("ATM_SFM_MANIFEST"):
+        return os.environ["ATM_SFM_MANIFEST"]
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        f_dir_cache = os.environ["LOCALAPPDATA"]
+    else:
+        f_dir_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(f_dir_cache, "atm_sfm", MANIFEST_NAME)
+
+def _connect(f_name_db):
+    os.makedirs(os.path.dirname(os.path.abspath(f_name_db)), exist_ok=True)
+    con = sqlite3.connect(f_name_db, timeout=60.0) # several worker processes may share one manifest
+    con.executescript(MANIFEST_SCHEMA)
+    return con
+
+def _params_json(params):
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+#%% check and record processing runs
+
+def is_up_to_date(
+    task:str,                   # name of the processing task, e.g., "ATM LAS"
+    f_name_inp:str,             # input file name
+    params:dict = None,         # processing parameters that affect the outputs
+    outputs:list = None,        # output file names
+    HASH:bool = None,           # compare the BLAKE2 hash if only the modification time of the input changed. default: set_hash()
+    f_name_db:str = None,       # manifest file. default: manifest_path(f_name_inp)
+    ) -> bool:
+
+    """
+      True if the input file, the parameters and the output files are unchanged since the last run
+      recorded in the manifest and all output files still exist
+    """
+
+    HASH       = _hash if HASH is None else HASH
+    f_name_db  = f_name_db or manifest_path(f_name_inp)
+    input_path = os.path.abspath(f_name_inp)
+    if not os.path.exists(f_name_db):
+        return False
+
+    con = _connect(f_name_db)
+    row = con.execute("SELECT input_size, input_mtime, input_hash, params, outputs FROM runs WHERE task = ? AND input_path = ?",
+                      (task, input_path)).fetchone()
+    if row is None:
+        con.close()
+        return False
+    size, mtime, f_hash, params_json, outputs_json = row
+
+    sig = _signature(f_name_inp)
+    if sig is None or sig[0] != size or params_json != _params_json(params):
+        con.close()
+        return False
+
+    if sig[1] != mtime:
+        # modification time changed, e.g., file copied again from the aircraft. unchanged content can be verified with the hash
+        if not (HASH and f_hash and file_hash(f_name_inp) == f_hash):
+            con.close()
+            return False
+        with con:
+            con.execute("UPDATE runs SET input_mtime = ? WHERE task = ? AND input_path = ?", (sig[1], task, input_path))
+
+    con.close()
+
+    recorded = json.loads(outputs_json)
+    if sorted(recorded) != sorted(os.path.abspath(f) for f in (outputs or [])):
+        return False
+    for f_name_out, sig_out in recorded.items():
+        if sig_out is None or _signature(f_name_out) != tuple(sig_out):
+            return False
+
+    return True
+
+def record_run(
+    task:str,                   # name of the processing task
+    f_name_inp:str,             # input file name
+    params:dict = None,         # processing parameters that affect the outputs
+    outputs:list = None,        # output file names written by the task
+    HASH:bool = None,           # store the BLAKE2 hash of the input file. default: set_hash()
+    f_name_db:str = None,       # manifest file. default: manifest_path(f_name_inp)
+    ):
+
+    """ record a successful run with the current input signature, parameters and output signatures """
+
+    if _dry_run:
+        return
+
+    HASH      = _hash if HASH is None else HASH
+    f_name_db = f_name_db or manifest_path(f_name_inp)
+    size, mtime = _signature(f_name_inp)
+    outputs_sig = {os.path.abspath(f): _signature(f) for f in (outputs or [])}
+
+    con = _connect(f_name_db)
+    with con:
+        con.execute("INSERT OR REPLACE INTO runs (task, input_path, input_size, input_mtime, input_hash, params, outputs, t_done) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task, os.path.abspath(f_name_inp), size, mtime, file_hash(f_name_inp) if HASH else None,
+                     _params_json(params), json.dumps(outputs_sig), time.time()))
+    con.close()
+
+def needs_processing(
+    task:str,                   # name of the processing task
+    f_name_inp:str,             # input file name
+    params:dict = None,         # processing parameters that affect the outputs
+    outputs:list = None,        # output file names
+    FORCE:bool = False,         # process regardless of the manifest
+    HASH:bool = None,           # compare the BLAKE2 hash if only the modification time of the input changed. default: set_hash()
+    f_name_db:str = None,       # manifest file. default: manifest_path(f_name_inp)
+    ) -> bool:                  # True if the task has to be run now
+
+    """
+      decide whether a task has to be run for an input file. In dry-run mode the decision is added to
+      the dry-run report and False is returned, so that no output is written.
+    """
+
+    if FORCE or _force:
+        status = "forced"
+    elif is_up_to_date(task, f_name_inp, params, outputs, HASH, f_name_db):
+        status = "up to date"
+    else:
+        status = "run"
+
+    if _dry_run:
+        with _lock:
+            _report.append((task, f_name_inp, status))
+        return False
+
+    if status == "up to date":
+        print(f"{os.path.basename(f_name_inp):s}: {task:s} outputs are up to date. Skipped.")
+        return False
+
+    return True
+
+#%% run module/function as script
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List the runs recorded in a processing manifest.")
+    parser.add_argument("f_name_db", nargs="?", default=manifest_path(), help=f"manifest file (default: {manifest_path():s})")
+    args = parser.parse_args()
+
+    con = sqlite3.connect(args.f_name_db)
+    for task, input_path, params, outputs, t_done in con.execute("SELECT task, input_path, params, outputs, t_done FROM runs ORDER BY t_done"):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t_done)):s}  {task:20s} {input_path:s}  {params:s}  -> {len(json.loads(outputs)):d} outputs")
+    con.close()